@@ -2,330 +2,86 @@
 #Down the line we will be looking for peaks for gamma spectroscopy purposes. So to prepare for this, I began the 
 #framework for a script that will find the peaks of graphs. 
 
-#import numpy and matplotlib
+'''
+Walks through a peak search on a random spectrum: every local maximum, then a prominence cut over a SNIP background,
+then an energy calibration and line identification.
+'''
+
 import numpy as np
-get_ipython().magic('matplotlib inline')
-import matplotlib.pyplot as plt
 
-#Lets start with a quadratic 
-#One way to plot functions is to go completely discrete
-#we use the np.linspace function to create a list from -2 to 2 with 50 entries
-x = np.linspace(-2, 2, 50)
-def test_func_1(x): 
-    '''
-    This just defines the quadratic
-    '''
-    return -x**2 + 1
-y = [] 
-i = 0
+from nedc_rpc.background import snip
+from nedc_rpc.calibration import default_lines, fit_calibration
+from nedc_rpc.peak_finder import find_peaks
 
-#we iterate through all of x and make a new list with the values of the function for each entry in x
-while i < 50:
-    y.append(test_func_1(x[i]))
-    i+=1
-plt.plot(x, y)
-plt.xlabel('x')
-plt.ylabel('y')
 
-def peak_finder(y):
+def peak_finder(y, **cuts):
     '''
-    This is the main function that needs development. 
-    Essentially it looks through three consequative values of y at the time and checks in the middle value is a max. 
-    If it is a max, it saves it to a peak list.
+    It finds every local max of y at once with find_peaks from nedc_rpc/peak_finder.py. A flat top counts as one max in its middle.
+    Cuts on the peaks (min_prominence, min_width, min_significance, ...) can be passed on to find_peaks.
+    The peaks come back as a numpy structured array; peak['index'] and peak['height'] are the old [j, second] pairs.
     '''
-    peaks = []
-    i, j, k = 0, 1, 2
-    counter = 0
-    first, second, third = y[i], y[j], y[k]
-    while k < len(y): 
-        if second >= third: 
-            if second >= first: 
-                peaks.append([j, second])
-        
-        i += 1
-        j += 1
-        k += 1
-        if k < len(y):
-            first, second, third = y[i], y[j], y[k]
-        else: 
-            pass
-        
+    return find_peaks(y, **cuts)
 
-    return peaks
-
-peak = peak_finder(y)
-print(peak)
 
 def plotting_max(x, peak): 
     '''
     This function just automates part of the process
     '''
-    length = len(peak)
-    i = 0
-    horizontal = []
-    vertical = []
-    argument = []
-    while i < length: 
-        horizontal.append(x[peak[i][0]])
-        vertical.append(peak[i][1])
-        i+=1
-    return horizontal, vertical
-print(plotting_max(x, peak))
-argument = plotting_max(x, peak)
-plt.plot(x, y)
-plt.xlabel('x')
-plt.ylabel('y')
-plt.plot(argument[0], argument[1], 'ro')
-plt.axis([-2.5, 2.5, -3, 1.5])
-#The Red circles are maxes. Why do we get two?
-
-#Lets use np.random.randint
-#Look up documentation to see what it does
-y = np.random.randint(10, size=50)
-plt.plot(x, y)
-plt.xlabel('x')
-plt.ylabel('y')
-
-peak = peak_finder(y)
-argument = plotting_max(x, peak)
-plt.plot(x, y)
-plt.xlabel('x')
-plt.ylabel('y')
-plt.plot(argument[0], argument[1], 'ro')
-#We have some double peaks once again. What should we do with those? Also some of these peaks are pretty small, 
-#How should we deal with the small peaks?
-
-x = np.linspace(-2, 2, 1000)
-y = np.random.randint(100, size=1000)
-plt.plot(x, y)
-plt.xlabel('x')
-plt.ylabel('y')
-
-peak = peak_finder(y)
-argument = plotting_max(x, peak)
-plt.plot(x, y)
-plt.xlabel('x')
-plt.ylabel('y')
-plt.plot(argument[0], argument[1], 'ro')
-#It can get chaotic.....
-
-x = np.linspace(-2, 2, 1000)
-y = np.random.randint(10, size=1000)
-plt.plot(x, y)
-plt.xlabel('x')
-plt.ylabel('y')
-
-peak = peak_finder(y)
-argument = plotting_max(x, peak)
-plt.plot(x, y)
-plt.xlabel('x')
-plt.ylabel('y')
-plt.plot(argument[0], argument[1], 'ro')
-
-x = np.linspace(-2, 2, 500)
-y = np.random.randint(10, size=500)
-plt.plot(x, y)
-plt.xlabel('x')
-plt.ylabel('y')
-
-peak = peak_finder(y)
-argument = plotting_max(x, peak)
-plt.plot(x, y)
-plt.xlabel('x')
-plt.ylabel('y')
-plt.plot(argument[0], argument[1], 'ro')
-
-x = np.linspace(-2, 2, 250)
-y = np.random.randint(10, size=250)
-plt.plot(x, y)
-plt.xlabel('x')
-plt.ylabel('y')
-
-peak = peak_finder(y)
-argument = plotting_max(x, peak)
-plt.plot(x, y)
-plt.xlabel('x')
-plt.ylabel('y')
-plt.plot(argument[0], argument[1], 'ro')
-
-x = np.linspace(-2, 2, 120)
-y = np.random.randint(10, size=120)
-plt.plot(x, y)
-plt.xlabel('x')
-plt.ylabel('y')
-
-peak = peak_finder(y)
-argument = plotting_max(x, peak)
-plt.plot(x, y)
-plt.xlabel('x')
-plt.ylabel('y')
-plt.plot(argument[0], argument[1], 'ro')
-
-#More accurate Spectra generator
-
-def random_spectra_generator(spikes, length): 
-    '''
-    Generates a more accurate spectra for testing purposes. 
-    There is length entries. 
-    Spikes is how many peaks there should be. 
-    '''
-    higher = length//3
-    i = 0 
-    spectra = []
-    while i < higher: 
-        spectra.append(np.random.randint(low=45, high=55))
-        i+=1
-    while i < length: 
-        spectra.append(np.random.randint(low=0, high=10))
-        i+=1
-    j = 0 
-    while j < spikes: 
-        spectra[np.random.randint(low=0, high=length-1)] = np.random.randint(low=40, high=100)
-        j+=1
-    return spectra
-
-x = np.linspace(0, 1800, 120)
-y = random_spectra_generator(1, 120)
-plt.plot(x, y)
-plt.xlabel('x')
-plt.ylabel('y')
-
-peak = peak_finder(y)
-argument = plotting_max(x, peak)
-plt.plot(x, y)
-plt.xlabel('x')
-plt.ylabel('y')
-plt.plot(argument[0], argument[1], 'ro')
-
-#So the prior graph is a demonstration of what a spectra might look like. 
-#We have all this noise which leads to the current iteration of the peak finder to add extra peaks. 
-#We have to deal with this noise somehow. 
-
-#I will do a couple more examples then there will be instructions how to run the code in its current state. 
-x = np.linspace(0, 1800, 120)
-y = random_spectra_generator(5, 120)
-plt.plot(x, y)
-plt.xlabel('x')
-plt.ylabel('y')
-
-peak = peak_finder(y)
-argument = plotting_max(x, peak)
-plt.plot(x, y)
-plt.xlabel('x')
-plt.ylabel('y')
-plt.plot(argument[0], argument[1], 'ro')
-
-length = 1000
-x = np.linspace(0, 1800, length)
-y = random_spectra_generator(5, length)
-plt.plot(x, y)
-plt.xlabel('x')
-plt.ylabel('y')
-
-peak = peak_finder(y)
-argument = plotting_max(x, peak)
-plt.plot(x, y)
-plt.xlabel('x')
-plt.ylabel('y')
-plt.plot(argument[0], argument[1], 'ro')
-
-length = 10000
-x = np.linspace(0, 1800, length)
-y = random_spectra_generator(10, length)
-plt.plot(x, y)
-plt.xlabel('x')
-plt.ylabel('y')
-
-peak = peak_finder(y)
-argument = plotting_max(x, peak)
-plt.plot(x, y)
-plt.xlabel('x')
-plt.ylabel('y')
-plt.plot(argument[0], argument[1], 'ro')
-
-#Instructions how to run: 
-#There are three main functions that I already designed for you
-#You can modify them how you see fit
-def peak_finder(y):
-    '''
-    This is the main function that needs development. 
-    Essentially it looks through three consequative values of y at the time and checks in the middle value is a max. 
-    If it is a max, it saves it to a peak list.
-    '''
-    peaks = []
-    i, j, k = 0, 1, 2
-    counter = 0
-    first, second, third = y[i], y[j], y[k]
-    while k < len(y): 
-        if second >= third: 
-            if second >= first: 
-                peaks.append([j, second])
-        
-        i += 1
-        j += 1
-        k += 1
-        if k < len(y):
-            first, second, third = y[i], y[j], y[k]
-        else: 
-            pass
-        
+    return np.asarray(x)[peak['index']], peak['height']
 
-    return peaks
-
-def plotting_max(x, peak): 
-    '''
-    This function just automates part of the process
-    '''
-    length = len(peak)
-    i = 0
-    horizontal = []
-    vertical = []
-    argument = []
-    while i < length: 
-        horizontal.append(x[peak[i][0]])
-        vertical.append(peak[i][1])
-        i+=1
-    return horizontal, vertical
 
 def random_spectra_generator(spikes, length): 
     '''
     Generates a more accurate spectra for testing purposes. 
     There is length entries. 
     Spikes is how many peaks there should be. 
+    For realistic spectra with Gaussian peaks, Compton continua and counting noise use generate from nedc_rpc/synthetic.py.
     '''
     higher = length//3
-    i = 0 
-    spectra = []
-    while i < higher: 
-        spectra.append(np.random.randint(low=45, high=55))
-        i+=1
-    while i < length: 
-        spectra.append(np.random.randint(low=0, high=10))
-        i+=1
-    j = 0 
-    while j < spikes: 
-        spectra[np.random.randint(low=0, high=length-1)] = np.random.randint(low=40, high=100)
-        j+=1
+    spectra = np.concatenate([np.random.randint(low=45, high=55, size=higher), 
+                              np.random.randint(low=0, high=10, size=length - higher)])
+    spectra[np.random.randint(low=0, high=length-1, size=spikes)] = np.random.randint(low=40, high=100, size=spikes)
     return spectra
 
-#After you have your functions defined, you need to first generate data
-length = 1000
-x = np.linspace(0, 1800, length)
-y = random_spectra_generator(7, length)
-plt.plot(x, y)
-plt.xlabel('x')
-plt.ylabel('y')
-#This will generate a sample spectra with a length that you can define. You can also define how many spikes that will 
-#occur. Each spikes intensity will be random, and the location is also random. I also plot it for good measure. 
-#For this example I am just going to use length=1000 and spikes=7
-
-#Now is when we use the peak finder. After we get the peaks, we also need to add the circles to the graph. 
-peak = peak_finder(y)
-argument = plotting_max(x, peak)
-plt.plot(x, y)
-plt.xlabel('x')
-plt.ylabel('y')
-plt.plot(argument[0], argument[1], 'ro')
 
-#We should only get 7 red circles but the randomly generated noise causes more circles to appear. 
-#Also there should be some nice way to demonstrate which peak corresponds to which values
+if __name__ == '__main__':
+    import matplotlib.pyplot as plt
+
+    #Generate a sample spectra with a length that you can define, and how many spikes will occur. Each spikes 
+    #intensity will be random, and the location is also random. 
+    length = 1000
+    x = np.linspace(0, 1800, length)
+    y = random_spectra_generator(7, length)
+
+    #Every local max is a peak, so the randomly generated noise gives many more than 7 red circles. 
+    peak = peak_finder(y)
+    print(len(peak), 'local maxima')
+    plt.figure()
+    plt.plot(x, y)
+    plt.plot(*plotting_max(x, peak), 'ro')
+    plt.xlabel('x')
+    plt.ylabel('y')
+
+    #Cutting on prominence gets rid of the noise wiggles: a spike has to stand well above the 0-10 and 45-55 noise 
+    #bands. The 45-55 plateau can also be taken out before the search: snip estimates the continuum under the spikes 
+    #and find_peaks subtracts it, so the heights are net counts.
+    background = snip(y, max_half_width=5)
+    peak = peak_finder(y, background=background, min_prominence=20)
+    print(peak)
+    position, height = plotting_max(x, peak)
+    plt.figure()
+    plt.plot(x, y)
+    plt.plot(x, background)
+    plt.plot(position, height + background[peak['index']], 'ro')
+    plt.xlabel('x')
+    plt.ylabel('y')
+
+    #A real x axis comes from an energy calibration: measure sources with known lines, find the channels of their 
+    #peaks and fit a polynomial through them. Say Am-241, Cs-137 and the two Co-60 lines showed up at these channels:
+    calibration = fit_calibration([33, 367, 651, 739], [59.54, 661.66, 1173.23, 1332.49])
+    #Every peak energy can then be looked up in the gamma line library (nedc_rpc/data/gamma_lines.csv) within a 
+    #tolerance in keV.
+    line, source = default_lines().identify(calibration(peak['index']), tolerance=5)
+    print(list(zip(calibration(peak['index']).round(1), source)))
+
+    plt.show()
@@ -0,0 +1,9 @@
+'''
+NEDC radiation protection clothing models.
+
+Importing the package is cheap: it loads none of its modules, so import only what you need, for example
+from nedc_rpc.depletion import solve_depletion. matplotlib is imported only by the plot functions of the model modules
+(boron_lifetime, cadmium_economy, gamma_current, neutron_absorption). The command line entry point is nedc_rpc.cli.
+'''
+
+__version__ = '0.1.0'
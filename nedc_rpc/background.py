@@ -0,0 +1,87 @@
+'''
+Continuum background estimates for gamma spectra.
+
+Both estimators work on the last axis of arrays of any shape, so a whole (spectra, channels) stack is done in one go,
+and both cost a fixed number of array passes per channel:
+
+    snip                the SNIP clipping filter (Ryan et al., NIM B 34 (1988) 396; Morhac et al., NIM A 401 (1997)
+                        113). Every pass replaces each channel by the mean of its two neighbours p channels away if
+                        that is lower, for p from max_half_width down to 1, on the LLS (log log square root)
+                        transformed counts.
+    rolling_percentile  a low percentile of the counts in a sliding window, evaluated every step channels and
+                        interpolated in between.
+
+The background is meant to be subtracted before the peak search: find_peaks(y, background=snip(y)).
+'''
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def _lls(y):
+    return np.log(np.log(np.sqrt(y + 1) + 1) + 1)
+
+
+def _inverse_lls(v):
+    return (np.exp(np.exp(v) - 1) - 1) ** 2 - 1
+
+
+def snip(y, max_half_width=20, lls=True):
+    '''
+    SNIP background of y (..., channels). max_half_width [channels] should be about the full width of the widest
+    peak at its base; wider structures are kept as background. lls compresses the dynamic range of the counts first,
+    which keeps the clipping from being dominated by the tallest peaks.
+    '''
+
+    y = np.asarray(y, dtype=float)
+    v = _lls(np.maximum(y, 0)) if lls else y.copy()
+    for p in range(min(max_half_width, (y.shape[-1] - 1) // 2), 0, -1):
+        inner = v[..., p:-p]
+        np.minimum(inner, (v[..., :-2 * p] + v[..., 2 * p:]) / 2, out=inner)
+    return _inverse_lls(v) if lls else v
+
+
+def rolling_percentile(y, window=41, q=10, step=None):
+    '''
+    Rolling q-th percentile of y (..., channels) over window channels centred on each channel, the ends padded with
+    the end values. The percentile is evaluated every step channels (default a quarter of the window) and linearly
+    interpolated in between.
+    '''
+
+    y = np.asarray(y, dtype=float)
+    n = y.shape[-1]
+    half = window // 2
+    step = max(1, window // 4) if step is None else step
+
+    padded = np.pad(y, [(0, 0)] * (y.ndim - 1) + [(half, half)], mode='edge')
+    centres = np.arange(0, n + step - 1, step).clip(max=n - 1)
+    windows = sliding_window_view(padded, 2 * half + 1, axis=-1)[..., centres, :]
+    knots = np.percentile(windows, q, axis=-1)
+
+    i = np.minimum(np.arange(n) // step, centres.size - 2).clip(min=0)
+    if centres.size < 2:
+        return np.broadcast_to(knots, y.shape).copy()
+    w = (np.arange(n) - centres[i]) / np.maximum(centres[i + 1] - centres[i], 1)
+    return knots[..., i] * (1 - w) + knots[..., i + 1] * w
+
+
+estimators = {
+    'snip': snip,
+    'percentile': rolling_percentile,
+}
+
+
+def estimate_background(spectra, method='snip', **kwargs):
+    '''
+    Backgrounds of a list of spectra with the estimator named method. Spectra of the same length are stacked and done
+    together. kwargs are passed on to the estimator.
+    '''
+
+    spectra = [np.asarray(y, dtype=float) for y in spectra]
+    backgrounds = [None] * len(spectra)
+    lengths = np.array([y.size for y in spectra])
+    for n in np.unique(lengths):
+        group = np.flatnonzero(lengths == n)
+        for i, b in zip(group, estimators[method](np.stack([spectra[i] for i in group]), **kwargs)):
+            backgrounds[i] = b
+    return backgrounds
@@ -0,0 +1,135 @@
+'''
+Batch peak search over spectrum files on disk.
+
+A night of irradiation runs leaves hundreds of spectrum files behind. process_files reads them with the memory-mapped
+readers of spectrum_io.py, runs find_peaks on every spectrum across a process pool, and writes all the peaks into one
+columnar table: an .npz file with one array per peak field, where the 'spectrum' column indexes into the stored list of
+file names.
+
+    python -m nedc_rpc.batch_pipeline peaks.npz spectra/*.csv --background snip --min-prominence 20 --fit
+'''
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .background import estimate_background, estimators
+from .peak_finder import find_peaks, peak_dtype
+from .peak_fitting import fit_dtype, fit_spectra
+from .spectrum_io import read_spectrum
+
+# Fields of the peak table: the number of the spectrum file a peak was found in, followed by the fields of find_peaks.
+table_dtype = np.dtype([('spectrum', 'i4')] + peak_dtype.descr)
+
+# Fields of the peak table with fitted peaks: the fit results follow the find_peaks fields.
+fit_table_dtype = np.dtype(table_dtype.descr + fit_dtype.descr)
+
+
+def _process_chunk(args):
+    '''
+    Peak tables of a chunk of files, tagged with their file numbers. The backgrounds of the chunk are estimated as one
+    stack, and with fit set the peaks of the whole chunk are fitted in one batch.
+    '''
+
+    first, paths, cuts, background, fit = args
+    dtype = table_dtype if fit is None else fit_table_dtype
+    spectra = [read_spectrum(path) for path in paths]
+    if background is None:
+        peaks = [find_peaks(y, **cuts) for y in spectra]
+    else:
+        backgrounds = estimate_background(spectra, **background)
+        peaks = [find_peaks(y, background=b, **cuts) for y, b in zip(spectra, backgrounds)]
+    fits = fit_spectra(spectra, peaks, **fit) if fit is not None else [None] * len(peaks)
+
+    tables = []
+    for number, found, fitted in zip(range(first, first + len(paths)), peaks, fits):
+        table = np.empty(found.size, dtype=dtype)
+        table['spectrum'] = number
+        for name in peak_dtype.names:
+            table[name] = found[name]
+        if fitted is not None:
+            for name in fit_dtype.names:
+                table[name] = fitted[name]
+        tables.append(table)
+    return np.concatenate(tables) if tables else np.empty(0, dtype=dtype)
+
+
+def process_files(paths, output=None, workers=None, chunk_size=16, background=None, fit=False, tail=False, **cuts):
+    '''
+    Find the peaks of every spectrum file in paths and return them as one structured array with the fields of
+    table_dtype, ordered by file and channel. background names an estimator of background.py ('snip' or 'percentile',
+    or a dict of estimate_background arguments) whose background is subtracted before the search. With fit set the
+    peaks are also fitted (see peak_fitting.fit_spectra, tail adds the low-energy tail) and the table has the fields of
+    fit_table_dtype.
+
+    The files are handed to a process pool in chunks of chunk_size; each worker maps its files itself, so no spectrum
+    is copied between processes. workers=1 runs in the calling process. cuts are passed on to find_peaks. If output is
+    given the table is also written there with write_peak_table.
+    '''
+
+    paths = [os.fspath(path) for path in paths]
+    background = {'method': background} if isinstance(background, str) else background
+    fit = {'tail': tail} if fit else None
+    tasks = [(start, paths[start:start + chunk_size], cuts, background, fit)
+             for start in range(0, len(paths), chunk_size)]
+
+    if workers == 1 or len(tasks) <= 1:
+        tables = [_process_chunk(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            tables = list(pool.map(_process_chunk, tasks))
+
+    table = np.concatenate(tables) if tables else np.empty(0, dtype=table_dtype if fit is None else fit_table_dtype)
+    if output is not None:
+        write_peak_table(output, table, paths)
+    return table
+
+
+def write_peak_table(path, table, files):
+    '''
+    Write a peak table column by column into a compressed .npz file, together with the list of file names.
+    '''
+
+    np.savez_compressed(path, files=np.asarray(files, dtype=str), **{name: table[name] for name in table.dtype.names})
+
+
+def read_peak_table(path):
+    '''
+    Read a peak table written by write_peak_table. Returns the structured table and the list of file names.
+    '''
+
+    with np.load(path) as data:
+        files = data['files'].tolist()
+        names = [name for name in data.files if name != 'files']
+        table = np.empty(data[names[0]].size if names else 0, dtype=[(name, data[name].dtype) for name in names])
+        for name in names:
+            table[name] = data[name]
+    return table, files
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Find the peaks of a batch of spectrum files.')
+    parser.add_argument('output', help='.npz file to write the peak table to')
+    parser.add_argument('files', nargs='+', help='spectrum files (.csv, .txt, .mca, .spe, .chn, .npy)')
+    parser.add_argument('--workers', type=int, default=None, help='number of worker processes')
+    parser.add_argument('--min-height', type=float, default=None)
+    parser.add_argument('--min-prominence', type=float, default=None)
+    parser.add_argument('--min-width', type=float, default=None)
+    parser.add_argument('--min-significance', type=float, default=None)
+    parser.add_argument('--background', choices=sorted(estimators), default=None,
+                        help='subtract a continuum background before the search')
+    parser.add_argument('--fit', action='store_true', help='fit every peak for centroid, FWHM and net area')
+    parser.add_argument('--tail', action='store_true', help='include a low-energy tail in the fits')
+    args = parser.parse_args(argv)
+
+    cuts = {name: getattr(args, name) for name in ('min_height', 'min_prominence', 'min_width', 'min_significance')
+            if getattr(args, name) is not None}
+    table = process_files(args.files, args.output, args.workers, background=args.background, fit=args.fit or args.tail,
+                          tail=args.tail, **cuts)
+    print('%d peaks in %d files written to %s' % (table.size, len(args.files), args.output))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,259 @@
+'''
+Benchmarks of the core calculations, with a JSON history and regression checks.
+
+Every benchmark times one model function over a series of problem sizes (time points, thicknesses, compositions,
+spectrum channels...). For every size it records the best wall time over a few repeats, the throughput in size units
+per second and the peak memory traced by tracemalloc during a separate run. Each run of the suite is appended to a
+JSON history file, and compared with a stored baseline run: a size that got slower than the baseline by more than the
+threshold is reported as a regression.
+
+    nedc-rpc bench                              run everything, append to benchmark_history.json
+    nedc-rpc bench peak_finder --quick          one benchmark on its smaller sizes
+    nedc-rpc bench --save-baseline              make this run the baseline for later comparisons
+
+The history and baseline files default to the current directory.
+
+The exit status is 1 when a regression was found, so the suite can gate a CI job.
+'''
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_HISTORY = 'benchmark_history.json'
+DEFAULT_BASELINE = 'benchmark_baseline.json'
+
+
+'''
+Benchmark cases. Each setup function takes a problem size, does the untimed preparation and returns the function to
+time. The imports are inside so that one broken module does not take the whole suite down.
+'''
+
+def _boron_depletion(n):
+    from .depletion import ABSORBERS, fraction_remaining, point_source_flux
+    flux = point_source_flux(10**9, 1)
+    t = np.linspace(0, 1e14, n)
+    sigma = ABSORBERS['B'].sigma[0]
+    return lambda: fraction_remaining(t, flux, sigma)
+
+
+def _cadmium_burnup(n):
+    from .depletion import ABSORBERS, solve_depletion
+    cadmium = ABSORBERS['Cd']
+    A = cadmium.matrix(10**9)
+    times = np.linspace(0, 1e12, n)
+    return lambda: solve_depletion(A, cadmium.number_densities, times)
+
+
+def _gamma_attenuation(n):
+    from .gamma_attenuation import attenuation_tensor
+    from .materials import default_table, li7_gamma_energy
+    table = default_table()
+    materials = [table.material(name, li7_gamma_energy) for name in ('Iron', 'Lead', 'Polyethylene', 'Boron')]
+    thickness = np.linspace(0, 20, n)
+    times = np.linspace(0, 1e4, 100)
+    return lambda: attenuation_tensor(materials, thickness, times)
+
+
+def _neutron_attenuation(n):
+    from .composite_optimizer import sample_simplex
+    from .neutron_attenuation import neut_atten_percent
+    fracs = sample_simplex(n, np.random.default_rng(0))
+    x = np.arange(0.05, 1.4, 0.05)
+    return lambda: neut_atten_percent(x[:, None], *fracs.T)
+
+
+def _spectrum_attenuation(n):
+    from .composite_optimizer import sample_simplex
+    from .neutron_attenuation import spectrum_atten_percent, thermal_epithermal
+    fracs = sample_simplex(n, np.random.default_rng(0))
+    energy = np.logspace(-3, 7, 200)
+    flux = thermal_epithermal(energy)
+    x = np.arange(0.05, 1.4, 0.05)
+    return lambda: spectrum_atten_percent(x, fracs, energy, flux)
+
+
+def _spectrum(n, seed=0):
+    from .synthetic import generate
+    spectra, _ = generate(1, n, n_peaks=max(3, n // 1000), seed=seed)
+    return spectra[0]
+
+
+def _peak_finder(n):
+    from .peak_finder import find_peaks
+    y = _spectrum(n)
+    return lambda: find_peaks(y, min_prominence=50)
+
+
+def _background(n):
+    from .background import snip
+    y = _spectrum(n)
+    return lambda: snip(y)
+
+
+def _peak_fitting(n):
+    from .peak_finder import find_peaks
+    from .peak_fitting import fit_peaks
+    y = _spectrum(n)
+    peaks = find_peaks(y, min_prominence=50)
+    return lambda: fit_peaks(y, peaks)
+
+
+def _synthetic(n):
+    from .synthetic import generate
+    return lambda: generate(n // 4096, 4096, seed=0)
+
+
+def _transport(n):
+    from .neutron_transport import simulate
+    return lambda: simulate([([0.333, 0.333, 0.206, 0.128], 0.5)], histories=n, workers=1, seed=0)
+
+
+# name: (setup, sizes, what the size counts, how many of the sizes --quick runs)
+BENCHMARKS = {
+    'boron_depletion': (_boron_depletion, [10**4, 10**5, 10**6, 10**7], 'time points', 3),
+    'cadmium_burnup': (_cadmium_burnup, [10**2, 10**3, 10**4, 10**5], 'time points', 3),
+    'gamma_attenuation': (_gamma_attenuation, [10**2, 10**3, 10**4, 8 * 10**4], 'thicknesses x 100 times', 3),
+    'neutron_attenuation': (_neutron_attenuation, [10**2, 10**3, 10**4, 10**5], 'compositions x 27 thicknesses', 3),
+    'spectrum_attenuation': (_spectrum_attenuation, [10, 10**2, 10**3, 10**4], 'compositions', 2),
+    'peak_finder': (_peak_finder, [2**10, 2**12, 2**14, 2**16, 2**18], 'channels', 3),
+    'background': (_background, [2**10, 2**12, 2**14, 2**16, 2**18], 'channels', 3),
+    'peak_fitting': (_peak_fitting, [2**12, 2**14, 2**16], 'channels', 2),
+    'synthetic': (_synthetic, [2**14, 2**16, 2**18, 2**20], 'channels', 2),
+    'transport': (_transport, [10**3, 10**4, 10**5], 'histories', 2),
+}
+
+
+def measure(func, repeat=5, min_time=0.05):
+    '''
+    Best wall time [s] of func over repeat rounds, each round calling it often enough to last at least min_time, and
+    the peak memory [bytes] allocated during one traced call.
+    '''
+
+    func()
+    start = time.perf_counter()
+    func()
+    once = time.perf_counter() - start
+    number = max(1, int(min_time / max(once, 1e-9)))
+
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+
+def run(names=None, quick=False, repeat=5, log=print):
+    '''
+    Run the benchmarks called names (all by default) and return a run record: when and where it ran, and the
+    seconds, throughput and peak memory for every size of every benchmark.
+    '''
+
+    results = {}
+    for name in names or BENCHMARKS:
+        setup, sizes, unit, n_quick = BENCHMARKS[name]
+        results[name] = []
+        for size in sizes[:n_quick] if quick else sizes:
+            seconds, peak = measure(setup(size), repeat)
+            results[name].append({'size': size, 'seconds': seconds, 'throughput': size / seconds,
+                                  'peak_bytes': peak})
+            log('%-22s %10d %-30s %10.3g s %12.4g /s %10.1f MB' % (name, size, unit, seconds, size / seconds,
+                                                                     peak / 2**20))
+
+    return {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'commit': _commit(), 'machine': platform.node(),
+            'python': platform.python_version(), 'numpy': np.__version__, 'results': results}
+
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_history(path=DEFAULT_HISTORY):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+
+def append_history(record, path=DEFAULT_HISTORY):
+    '''
+    Append a run record to the JSON history file, replacing it atomically.
+    '''
+
+    history = load_history(path) + [record]
+    tmp = path + '.%d.tmp' % os.getpid()
+    with open(tmp, 'w') as f:
+        json.dump(history, f, indent=1)
+    os.replace(tmp, path)
+
+
+def compare(record, baseline, threshold=0.2):
+    '''
+    Regressions of a run against a baseline run: (name, size, seconds, baseline seconds) for every size that ran
+    more than threshold (a fraction) slower than in the baseline. Sizes missing from either run are skipped.
+    '''
+
+    regressions = []
+    for name, results in record['results'].items():
+        base = {r['size']: r['seconds'] for r in baseline['results'].get(name, [])}
+        for r in results:
+            if r['size'] in base and r['seconds'] > (1 + threshold) * base[r['size']]:
+                regressions.append((name, r['size'], r['seconds'], base[r['size']]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Time the core calculations over increasing problem sizes.')
+    parser.add_argument('names', nargs='*', metavar='name',
+                        help='benchmarks to run: %s (default all)' % ', '.join(BENCHMARKS))
+    parser.add_argument('--quick', action='store_true', help='only the smaller sizes')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--history', default=DEFAULT_HISTORY, help='JSON file the run is appended to')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='JSON file of the baseline run')
+    parser.add_argument('--save-baseline', action='store_true', help='store this run as the baseline')
+    parser.add_argument('--threshold', type=float, default=0.2, help='slowdown counted as a regression')
+    args = parser.parse_args(argv)
+    unknown = set(args.names) - set(BENCHMARKS)
+    if unknown:
+        parser.error('unknown benchmarks: %s' % ', '.join(sorted(unknown)))
+
+    record = run(args.names, args.quick, args.repeat)
+    append_history(record, args.history)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(record, f, indent=1)
+        return 0
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(record, json.load(f), args.threshold)
+        for name, size, seconds, base in regressions:
+            print('REGRESSION %s at size %d: %.3g s, baseline %.3g s (%+.0f%%)' % (
+                name, size, seconds, base, 100 * (seconds / base - 1)))
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,88 @@
+'''
+Lifetime of the B-10 in a natural boron sheet next to a thermal neutron source.
+
+The B-10 is burnt up by B-10(n,a)Li-7 captures; the estimated lifetime is the time until 10% of it is left. Only B-10
+is taken into account, at natural abundance, 1 cm away from a 10^9 neutron/s source. Units are CGS.
+
+The point model lets all of the B-10 see the full flux. In a sheet the front shields the back, which slab_depletion
+takes into account through the depth of the sheet.
+'''
+
+import numpy as np
+
+from .depletion import ABSORBERS, fraction_remaining, point_source_flux, time_to_fraction
+from .plotting import plot as plot_series
+from .slab_depletion import deplete_slab, front_depth, uniform_lifetime
+
+boron = ABSORBERS['B']
+atoms_per_volume = boron.atoms_per_volume
+B_10 = boron.number_densities[boron.key_index]          # [# nuclei/cm^3], initial B-10
+sigma_10 = boron.sigma[boron.key_index]                 # [cm^2]
+flux = point_source_flux(10**9, 1)                      # [neutrons/(cm^2 s)]
+thickness = 0.1                                         # [cm], assumed thickness of the sheet
+
+# Time grid of the plot: t = 0 to 10^14 s in steps of 10^8 s.
+default_time = np.arange(0, 10**14 + 10**8, 10**8, dtype=float)
+
+
+def remaining(t):
+    '''
+    [# nuclei/cm^3], B-10 left after the neutron + target reaction has run for times t [s].
+    '''
+
+    return B_10 * fraction_remaining(t, flux, sigma_10)
+
+
+def lifetime(fraction=0.1):
+    '''
+    [s], time until the given fraction of the B-10 is left.
+    '''
+
+    return time_to_fraction(fraction, flux, sigma_10)
+
+
+def self_shielded(times, cells=1000):
+    '''
+    [# nuclei/cm^3], B-10 through the depth of the sheet at times [s], shape (len(times), cells).
+    '''
+
+    return deplete_slab(B_10, thickness, times, flux, sigma_10, cells=cells)
+
+
+def shielded_lifetime(fraction=0.1):
+    '''
+    [s], time until the given fraction of the B-10 of the sheet is left, with self-shielding.
+    '''
+
+    return uniform_lifetime(fraction, thickness, B_10, flux, sigma_10)
+
+
+def report():
+    print('starting amount of B 10')
+    print(B_10)
+    print('10% of B 10')
+    print(atoms_per_volume * .1)
+    print('time until 10% of B 10 is left (s)')
+    print(lifetime())
+    print('time until 10%% of B 10 is left in a %g mm sheet, with self-shielding (s)' % (thickness * 10))
+    t = shielded_lifetime()
+    print(t)
+    print('depth of the depletion front at that time (mm)')
+    print(front_depth(self_shielded([t])[0], B_10, thickness) * 10)
+
+
+def plot(time=default_time, ax=None):
+    '''
+    Percentage of the B-10 left against time, reduced to the width of the axes. pyplot is imported only when no axes
+    are given.
+    '''
+
+    if ax is None:
+        import matplotlib.pyplot as plt
+        ax = plt.figure().gca()
+    plot_series(ax, time, remaining(time) * 100 / B_10, xscale='log')
+    ax.set_ylim([0, 100])
+    ax.set_xlabel('Time elapsed (s)', fontsize=18)
+    ax.set_ylabel('Percentage of B-10 Isotope Left (%)', fontsize=18)
+    ax.set_title('Boron Lifetime Calculation', fontsize=18)
+    return ax
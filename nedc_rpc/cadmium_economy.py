@@ -0,0 +1,64 @@
+'''
+Neutron capture economy of Cd-113 in natural cadmium.
+
+Cd-112 captures feed Cd-113, and Cd-113 captures end up in Cd-114. The chain is solved exactly with a matrix
+exponential for a thermal flux of 10^9 neutrons/(cm^2 s). For now the metal should keep more than 10.00 at% Cd-113,
+which is arbitrary. Units are CGS.
+'''
+
+import numpy as np
+
+from .depletion import ABSORBERS, solve_depletion
+
+cadmium = ABSORBERS['Cd']
+atoms_per_volume = cadmium.atoms_per_volume
+cd_112, cd_113, cd_114 = cadmium.number_densities     # [# nuclei/cm^3], initial amounts
+flux = 10**9                                          # [neutrons/(cm^2 s)]
+
+# Cd-112 -> Cd-113 -> Cd-114 capture chain.
+chain = cadmium.matrix(flux)
+
+# Time grid of the plot: t = 0 to 0.5 10^10 s in steps of 10^8 s, and the Cd-113 level marking the lifetime.
+default_time = np.arange(0, .05 * 10**11 + 10**8, 10**8)
+threshold = 4.6 * 10**21                              # [# nuclei/cm^3]
+
+
+def inventory(times):
+    '''
+    [# nuclei/cm^3], Cd-112, Cd-113 and Cd-114 at times [s], shape (len(times), 3).
+    '''
+
+    return solve_depletion(chain, np.array([cd_112, cd_113, cd_114]), times)
+
+
+def remaining(t=10**8):
+    '''
+    Cd-112 and Cd-113 left after the neutron + target reaction has run for a time t [s]. The chain is advanced exactly,
+    so t can be as large as we like.
+    '''
+
+    z, y, _ = inventory([t])[0]
+    return z, y
+
+
+def report():
+    print('starting amount of Cd 113')
+    print(cd_113)
+    print('10% of Cd 113')
+    print(atoms_per_volume * .1)
+
+
+def plot(time=default_time, ax=None):
+    '''
+    Cd-113 left against time, with the threshold line; the intersection is an estimated lifetime. pyplot is imported
+    only when no axes are given.
+    '''
+
+    if ax is None:
+        import matplotlib.pyplot as plt
+        ax = plt.figure().gca()
+    ax.plot(time, np.full(len(time), threshold))
+    ax.plot(time, inventory(time)[:, 1])
+    ax.set_xlabel('Time elapsed (s)')
+    ax.set_ylabel('Number of Strong Absorber isotopes left (cm^-3)')
+    return ax
@@ -0,0 +1,172 @@
+'''
+Energy calibration of spectra and identification of peaks against a library of gamma lines.
+
+A Calibration is a polynomial from channel to energy, fitted by least squares to the centroids of peaks with known
+energies. The LineLibrary holds gamma lines as arrays sorted by energy, so a whole batch of peak energies is matched
+with two binary searches per peak whatever the size of the library. Energies are in keV here, as on a spectrometer;
+the physics modules use MeV.
+'''
+
+import csv
+import os
+
+import numpy as np
+
+from .materials import DATA_DIR
+
+DEFAULT_LINES = os.path.join(DATA_DIR, 'gamma_lines.csv')
+
+# Fields of the match table returned by LineLibrary.matches.
+match_dtype = np.dtype([('peak', 'i8'),             # position of the peak in the query
+                        ('line', 'i8'),             # position of the line in the library
+                        ('energy', 'f8'),           # [keV], line energy
+                        ('delta', 'f8'),            # [keV], peak energy minus line energy
+                        ('intensity', 'f8')])       # [%], emission probability of the line
+
+
+class Calibration:
+    '''
+    Polynomial channel -> energy [keV] calibration. coefficients are in increasing order: E = c0 + c1 ch + c2 ch^2...
+    '''
+
+    def __init__(self, coefficients, residuals=None):
+        self.coefficients = np.asarray(coefficients, dtype=float)
+        self.residuals = residuals
+
+    def __repr__(self):
+        return 'Calibration(%s)' % ', '.join('%.6g' % c for c in self.coefficients)
+
+    def __call__(self, channel):
+        '''
+        [keV], energy of (fractional) channels.
+        '''
+
+        return np.polynomial.polynomial.polyval(np.asarray(channel, dtype=float), self.coefficients)
+
+    def slope(self, channel):
+        '''
+        [keV/channel], derivative of the calibration, for converting widths and errors.
+        '''
+
+        return np.polynomial.polynomial.polyval(np.asarray(channel, dtype=float),
+                                                np.polynomial.polynomial.polyder(self.coefficients))
+
+    def channel(self, energy, iterations=8):
+        '''
+        Fractional channels of energies [keV], by Newton iteration from the linear part of the calibration.
+        '''
+
+        energy = np.asarray(energy, dtype=float)
+        c = self.coefficients
+        channel = (energy - c[0]) / (c[1] if c.size > 1 else 1.0)
+        for _ in range(iterations if c.size > 2 else 0):
+            channel = channel - (self(channel) - energy) / self.slope(channel)
+        return channel
+
+
+def fit_calibration(channels, energies, degree=1, errors=None):
+    '''
+    Least squares polynomial calibration through peak centroids [channels] of known energies [keV], weighted by the
+    centroid errors [channels] if given. Returns a Calibration with the residuals [keV] of the calibration points.
+    '''
+
+    channels = np.asarray(channels, dtype=float)
+    energies = np.asarray(energies, dtype=float)
+    if channels.size <= degree:
+        raise ValueError('a degree %d calibration needs at least %d points' % (degree, degree + 1))
+
+    weights = None if errors is None else 1 / np.maximum(np.asarray(errors, dtype=float), 1e-12)
+    coefficients = np.polynomial.polynomial.polyfit(channels, energies, degree, w=weights)
+    calibration = Calibration(coefficients)
+    calibration.residuals = energies - calibration(channels)
+    return calibration
+
+
+class LineLibrary:
+    '''
+    Gamma lines sorted by energy [keV], with their emission probabilities [%] and the nuclide or reaction they come
+    from.
+    '''
+
+    def __init__(self, energy, intensity, source):
+        order = np.argsort(energy, kind='stable')
+        self.energy = np.asarray(energy, dtype=float)[order]
+        self.intensity = np.asarray(intensity, dtype=float)[order]
+        self.source = np.asarray(source, dtype=str)[order]
+
+    def __len__(self):
+        return self.energy.size
+
+    def __repr__(self):
+        return 'LineLibrary(%d lines, %.1f-%.1f keV)' % (len(self), self.energy[0], self.energy[-1])
+
+    def lines(self, source):
+        '''
+        Energies [keV] of the lines of one nuclide or reaction.
+        '''
+
+        return self.energy[self.source == source]
+
+    def matches(self, energies, tolerance):
+        '''
+        Every library line within tolerance [keV] of every peak energy [keV], as a table with the fields of
+        match_dtype ordered by peak and line energy. tolerance is a number or one per peak, e.g. a multiple of the
+        peak FWHM in keV.
+        '''
+
+        energies = np.asarray(energies, dtype=float).ravel()
+        tolerance = np.broadcast_to(np.asarray(tolerance, dtype=float), energies.shape)
+        lo = np.searchsorted(self.energy, energies - tolerance, side='left')
+        hi = np.searchsorted(self.energy, energies + tolerance, side='right')
+
+        # Expand the [lo, hi) ranges into flat (peak, line) pairs.
+        counts = hi - lo
+        peak = np.repeat(np.arange(energies.size), counts)
+        line = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + np.repeat(lo, counts)
+
+        result = np.empty(peak.size, dtype=match_dtype)
+        result['peak'] = peak
+        result['line'] = line
+        result['energy'] = self.energy[line]
+        result['delta'] = energies[peak] - self.energy[line]
+        result['intensity'] = self.intensity[line]
+        return result
+
+    def identify(self, energies, tolerance):
+        '''
+        The nearest library line to every peak energy [keV], or -1 where no line lies within tolerance [keV]. Returns
+        the line positions and the names of their sources ('' for unmatched peaks).
+        '''
+
+        energies = np.asarray(energies, dtype=float)
+        i = np.searchsorted(self.energy, energies).clip(1, len(self) - 1)
+        below, above = self.energy[i - 1], self.energy[i]
+        nearest = np.where(np.abs(energies - below) <= np.abs(above - energies), i - 1, i)
+        line = np.where(np.abs(energies - self.energy[nearest]) <= tolerance, nearest, -1)
+        return line, np.where(line >= 0, self.source[line], '')
+
+
+def load_lines(path=DEFAULT_LINES):
+    '''
+    Read a line library from a comma separated file with energy [keV], intensity [%] and source columns. Lines
+    starting with # are comments; an empty intensity is read as nan.
+    '''
+
+    with open(path, newline='') as f:
+        rows = list(csv.reader(line for line in f if line.strip() and not line.startswith('#')))[1:]
+    return LineLibrary([float(row[0]) for row in rows], [float(row[1]) if row[1] else np.nan for row in rows],
+                       [row[2] for row in rows])
+
+
+_default_lines = None
+
+
+def default_lines():
+    '''
+    The line library shipped in the data directory, loaded on first use.
+    '''
+
+    global _default_lines
+    if _default_lines is None:
+        _default_lines = load_lines()
+    return _default_lines
@@ -0,0 +1,156 @@
+'''
+Command line interface, installed as nedc-rpc (or python -m nedc_rpc).
+
+    nedc-rpc boron                          print the B-10 lifetime numbers
+    nedc-rpc gamma --save gamma.png         ... and write the plots without a display
+    nedc-rpc neutron --show                 ... or show them in a window
+    nedc-rpc peaks out.npz spectra/*.csv    batch peak search, see batch_pipeline
+    nedc-rpc sweep gamma thickness=0:5:51   cached parameter sweep, see sweep
+    nedc-rpc render figures --format svg    every model plot, rendered headless in parallel
+    nedc-rpc garment body.obj --source 0 -100 120    dose over a garment mesh, see garment
+    nedc-rpc optimize / transport / bench
+
+Every subcommand imports only the modules it needs, and matplotlib only when a plot is asked for.
+'''
+
+import argparse
+import importlib
+import os
+import sys
+
+# Subcommands that print a model's report and optionally plot it: name -> (module, description).
+MODELS = {
+    'boron': ('boron_lifetime', 'B-10 lifetime in a natural boron sheet'),
+    'cadmium': ('cadmium_economy', 'Cd-113 capture economy in natural cadmium'),
+    'gamma': ('gamma_current', 'Li-7 secondary gamma current and its attenuation'),
+    'neutron': ('neutron_absorption', 'thermal neutron attenuation of the composite'),
+}
+
+# Subcommands handing their arguments on to the main function of another module: name -> (module, description).
+PASSTHROUGH = {
+    'peaks': ('batch_pipeline', 'batch peak search over spectrum files'),
+    'bench': ('benchmarks', 'benchmark suite'),
+    'sweep': ('sweep', 'parameter sweep of a model with cached results'),
+    'garment': ('garment', 'neutron and secondary gamma dose over a garment mesh'),
+    'laminate': ('laminate', 'lightest layer stack meeting neutron and gamma dose limits'),
+    'uncertainty': ('uncertainty', 'Monte Carlo uncertainty bands and sensitivities of the models'),
+    'endf': ('endf', 'ENDF-6 cross sections in a memory-mapped store'),
+}
+
+# Figures of the render subcommand: file name -> 'module:function' of a plot function taking ax.
+FIGURES = {
+    'boron_lifetime': 'boron_lifetime:plot',
+    'cadmium_economy': 'cadmium_economy:plot',
+    'gamma_current': 'gamma_current:plot_current',
+    'gamma_attenuation': 'gamma_current:plot_attenuation',
+    'neutron_absorption': 'neutron_absorption:plot',
+}
+
+
+def _module(name):
+    return importlib.import_module('.' + name, __package__)
+
+
+def _save_figures(path):
+    '''
+    Save every open figure: to path itself if there is one, else to path with the figure number before the extension.
+    '''
+
+    import matplotlib.pyplot as plt
+
+    numbers = plt.get_fignums()
+    root, ext = os.path.splitext(path)
+    for number in numbers:
+        target = path if len(numbers) == 1 else '%s_%d%s' % (root, number, ext or '.png')
+        plt.figure(number).savefig(target)
+        print('wrote', target)
+
+
+def run_model(name, args):
+    module = _module(MODELS[name][0])
+    module.report()
+    if args.save or args.show:
+        import matplotlib
+        if not args.show:
+            matplotlib.use('Agg')
+        module.plot()
+        if args.save:
+            _save_figures(args.save)
+        if args.show:
+            import matplotlib.pyplot as plt
+            plt.show()
+    return 0
+
+
+def run_optimize(args):
+    from .composite_optimizer import format_front, optimize
+    front = optimize(n_samples=args.samples, seed=args.seed, workers=args.workers)
+    print(format_front(front, args.rows))
+    return 0
+
+
+def run_transport(args):
+    from .neutron_transport import simulate
+    fracs = [float(f) for f in args.composition.split(',')]
+    print(simulate([(fracs, args.thickness)], histories=args.histories, workers=args.workers, seed=args.seed,
+                   isotropic=args.isotropic))
+    return 0
+
+
+def run_render(args):
+    from .plotting import render_all
+    jobs = [(plotter, os.path.join(args.directory, '%s.%s' % (name, ext)), {'dpi': args.dpi})
+            for name, plotter in FIGURES.items() for ext in args.format]
+    for path in render_all(jobs, workers=args.workers):
+        print('wrote', path)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='nedc-rpc', description='NEDC radiation protection clothing models.')
+    commands = parser.add_subparsers(dest='command', metavar='command')
+    commands.required = True
+
+    for name, (_, description) in MODELS.items():
+        sub = commands.add_parser(name, help=description, description=description)
+        sub.add_argument('--save', metavar='FILE', help='write the plots to FILE (headless, Agg backend)')
+        sub.add_argument('--show', action='store_true', help='show the plots in a window')
+
+    for name, (_, description) in PASSTHROUGH.items():
+        sub = commands.add_parser(name, help=description, add_help=False)
+        sub.add_argument('rest', nargs=argparse.REMAINDER)
+
+    sub = commands.add_parser('optimize', help='Pareto front of composite designs')
+    sub.add_argument('--samples', type=int, default=10**6)
+    sub.add_argument('--workers', type=int, default=None)
+    sub.add_argument('--seed', type=int, default=0)
+    sub.add_argument('--rows', type=int, default=20, help='number of designs to print')
+
+    sub = commands.add_parser('transport', help='Monte Carlo neutron transport through one composite layer')
+    sub.add_argument('--composition', default='0.333,0.333,0.206,0.128',
+                     help='mass fractions: boric acid,steel,resin,hardener')
+    sub.add_argument('--thickness', type=float, default=0.5, help='[cm]')
+    sub.add_argument('--histories', type=int, default=10**6)
+    sub.add_argument('--workers', type=int, default=None)
+    sub.add_argument('--seed', type=int, default=0)
+    sub.add_argument('--isotropic', action='store_true', help='cosine distributed incidence instead of a beam')
+
+    sub = commands.add_parser('render', help='render every model plot to files without a display')
+    sub.add_argument('directory')
+    sub.add_argument('--format', nargs='+', default=['png'], help='file formats, e.g. png svg pdf')
+    sub.add_argument('--dpi', type=int, default=100)
+    sub.add_argument('--workers', type=int, default=None)
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+
+    # Hand everything after a passthrough subcommand to its module untouched, --help included.
+    if argv and argv[0] in PASSTHROUGH:
+        return _module(PASSTHROUGH[argv[0]][0]).main(argv[1:]) or 0
+
+    args = build_parser().parse_args(argv)
+    if args.command in MODELS:
+        return run_model(args.command, args)
+    return {'optimize': run_optimize, 'transport': run_transport, 'render': run_render}[args.command](args)
@@ -0,0 +1,171 @@
+'''
+Search of the boric acid / steel / epoxy resin / epoxy hardener composition space for the garment material.
+
+Compositions are sampled uniformly over the four-component mass-fraction simplex in chunks, each chunk is evaluated
+with the vectorized composite model of neutron_attenuation.py in a process pool, and the result is the Pareto front of
+neutron attenuation (higher is better) against areal mass and thickness (lower is better).
+
+The narrow-beam attenuation only depends on the optical depth N_B10 * sigma * x, so at any thickness a composition is
+beaten by one that is both lighter and richer in B-10. Every chunk is therefore reduced to its (density, B-10 density)
+front before it leaves the worker, and only that front is crossed with the thickness grid at the end.
+'''
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .neutron_attenuation import B_10_number_density, composite_density, neut_atten_percent, spectrum_atten_percent
+
+# Fields of the table of Pareto optimal designs returned by optimize.
+front_dtype = np.dtype([('boric_acid', 'f8'), ('steel', 'f8'), ('resin', 'f8'), ('hardener', 'f8'),
+                        ('thickness', 'f8'),        # [cm]
+                        ('density', 'f8'),          # [g/cm^3]
+                        ('B_10_density', 'f8'),     # [# B-10 nuclei/cm^3]
+                        ('areal_mass', 'f8'),       # [g/cm^2]
+                        ('attenuation', 'f8')])     # [%]
+
+
+def sample_simplex(n, rng, dim=4):
+    '''
+    n points drawn uniformly from the simplex of dim mass fractions that add up to one, shape (n, dim).
+    '''
+
+    # Normalized exponential variates are uniform on the simplex (a flat Dirichlet distribution).
+    e = rng.standard_exponential((n, dim))
+    return e / e.sum(axis=1, keepdims=True)
+
+
+def pareto_2d(cost, gain):
+    '''
+    Mask of the points that are not dominated when cost is minimized and gain is maximized. O(n log n).
+    '''
+
+    cost = np.asarray(cost, dtype=float)
+    gain = np.asarray(gain, dtype=float)
+
+    # Sort by increasing cost, best gain first among equal costs; a point survives if it beats every cheaper point.
+    order = np.lexsort((-gain, cost))
+    sorted_gain = gain[order]
+    best_before = np.concatenate([[-np.inf], np.maximum.accumulate(sorted_gain)[:-1]])
+
+    mask = np.zeros(cost.size, dtype=bool)
+    mask[order] = sorted_gain > best_before
+    return mask
+
+
+def _front_of_chunk(args):
+    '''
+    Sample one chunk of compositions and return the compositions on its (density, B-10 density) front.
+    '''
+
+    seed, n = args
+    mass_fracs = sample_simplex(n, np.random.default_rng(seed))
+    rho = composite_density(mass_fracs)
+    N = B_10_number_density(mass_fracs)
+    return mass_fracs[pareto_2d(rho, N)]
+
+
+def composition_front(n_samples, chunk_size=10**6, workers=None, seed=None):
+    '''
+    Compositions (m, 4) on the front of lowest density and highest B-10 number density among n_samples uniform
+    samples of the simplex. Chunks are spread over a process pool, each with an independent random stream spawned from
+    seed; workers=1 runs in the calling process.
+    '''
+
+    sizes = [min(chunk_size, n_samples - start) for start in range(0, n_samples, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = list(zip(seeds, sizes))
+
+    if workers == 1 or len(tasks) == 1:
+        fronts = [_front_of_chunk(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            fronts = list(pool.map(_front_of_chunk, tasks))
+
+    mass_fracs = np.concatenate(fronts)
+    return mass_fracs[pareto_2d(composite_density(mass_fracs), B_10_number_density(mass_fracs))]
+
+
+def optimize(n_samples=10**7, thickness=np.arange(0.05, 1.4, 0.05), chunk_size=10**6, workers=None, seed=None,
+             energy=None, flux=None):
+    '''
+    Pareto front of attenuation vs. areal mass vs. thickness over n_samples random compositions and a grid of
+    thicknesses (cm).
+
+    The attenuation is the narrow-beam thermal attenuation of neut_atten_percent, or the spectrum-averaged one of
+    spectrum_atten_percent when a spectrum (energy in eV, flux per unit energy) is given. Returns a structured array
+    with the fields of front_dtype, sorted by thickness and areal mass.
+    '''
+
+    mass_fracs = composition_front(n_samples, chunk_size, workers, seed)
+    thickness = np.unique(np.asarray(thickness, dtype=float))
+
+    rho = composite_density(mass_fracs)
+    N = B_10_number_density(mass_fracs)
+
+    # Every front composition at every thickness, flattened thickness-major.
+    x = np.repeat(thickness, mass_fracs.shape[0])
+    c = np.tile(np.arange(mass_fracs.shape[0]), thickness.size)
+    areal_mass = rho[c] * x
+    depth = N[c] * x
+
+    # Walk the thickness grid upwards. A design survives if it is on the (areal mass, optical depth) front of its own
+    # thickness and no thinner design that is at least as light reaches the same optical depth.
+    keep = np.zeros(x.size, dtype=bool)
+    prior_mass = np.empty(0)
+    prior_depth = np.empty(0)
+    per_level = mass_fracs.shape[0]
+    for level in range(thickness.size):
+        rows = slice(level * per_level, (level + 1) * per_level)
+        m, d = areal_mass[rows], depth[rows]
+        mask = pareto_2d(m, d)
+
+        if prior_mass.size:
+            best = np.maximum.accumulate(prior_depth)
+            i = np.searchsorted(prior_mass, m, side='right') - 1
+            mask &= ~((i >= 0) & (best[np.maximum(i, 0)] >= d))
+
+        keep[rows] = mask
+
+        # Fold this level's survivors into the sorted record of thinner designs.
+        merged_mass = np.concatenate([prior_mass, m[mask]])
+        merged_depth = np.concatenate([prior_depth, d[mask]])
+        order = np.argsort(merged_mass, kind='stable')
+        prior_mass, prior_depth = merged_mass[order], merged_depth[order]
+
+    c, x = c[keep], x[keep]
+    front = np.empty(c.size, dtype=front_dtype)
+    front['boric_acid'], front['steel'], front['resin'], front['hardener'] = mass_fracs[c].T
+    front['thickness'] = x
+    front['density'] = rho[c]
+    front['B_10_density'] = N[c]
+    front['areal_mass'] = areal_mass[keep]
+
+    if energy is None:
+        front['attenuation'] = neut_atten_percent(x, *mass_fracs[c].T)
+    else:
+        # Spectrum averaging is done per composition over the whole thickness grid, then picked out per design.
+        grid = spectrum_atten_percent(thickness, mass_fracs[np.unique(c)], energy, flux)
+        row = np.searchsorted(np.unique(c), c)
+        front['attenuation'] = grid[row, np.searchsorted(thickness, x)]
+
+    return np.sort(front, order=['thickness', 'areal_mass'])
+
+
+def format_front(front, rows=20):
+    '''
+    Text table of about rows designs spread evenly over a front, with a header line and the number of designs.
+    '''
+
+    lines = ['%d Pareto optimal designs' % front.size,
+             'thickness [cm]  areal mass [g/cm^2]  attenuation [%]  boric acid  steel  resin  hardener']
+    for design in front[::max(1, front.size // rows)]:
+        lines.append('%14.2f  %19.3f  %15.2f  %10.3f  %5.3f  %5.3f  %8.3f' % (
+            design['thickness'], design['areal_mass'], design['attenuation'], design['boric_acid'], design['steel'],
+            design['resin'], design['hardener']))
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    print(format_front(optimize(seed=0, workers=os.cpu_count())))
@@ -0,0 +1,115 @@
+'''
+Tabulated energy-dependent neutron cross sections.
+
+Tables are plain two column text files of energy [eV] and cross section [b], as exported from the ENDF retrieval pages
+(http://www.nndc.bnl.gov/exfor/endf00.jsp). The first time a table is read it is converted into a binary .npy file next
+to it; every later load memory-maps that file instead of parsing the text again. Whole ENDF-6 evaluations are read by
+endf.py, whose tables can be used wherever these are.
+'''
+
+import os
+
+import numpy as np
+
+from .depletion import barn
+
+'''
+Definitions                         Units, Brief Descriptor.
+'''
+
+thermal_energy = 0.0253             # [eV], energy of the thermal neutron peak (2200 m/s)
+
+
+class CrossSectionTable:
+    '''
+    Pointwise cross section of one reaction.
+
+    energy          [eV], increasing energy grid
+    sigma           [b], cross section on the energy grid
+    name            label of the reaction, e.g. 'B-10(n,total absorption)'
+    '''
+
+    def __init__(self, energy, sigma, name=''):
+        self.energy = energy
+        self.sigma = sigma
+        self.name = name
+
+        # Log-log interpolation index, computed once. A zero cross section (below a threshold) has no logarithm, so
+        # intervals touching one are interpolated lin-lin instead.
+        self.log_energy = np.log(energy)
+        self.positive = np.asarray(sigma) > 0
+        with np.errstate(divide='ignore'):
+            self.log_sigma = np.where(self.positive, np.log(np.maximum(sigma, 1e-300)), 0.0)
+
+    def __repr__(self):
+        return 'CrossSectionTable(%r, %d points)' % (self.name, self.energy.size)
+
+    def __call__(self, energy):
+        '''
+        [cm^2], cross section at an array of energies (eV), interpolated log-log and held constant past the table ends.
+        '''
+
+        energy = np.asarray(energy, dtype=float)
+        log_e = np.log(energy)
+        i = np.clip(np.searchsorted(self.log_energy, log_e, side='right') - 1, 0, self.log_energy.size - 2)
+        w = np.clip((log_e - self.log_energy[i]) / (self.log_energy[i + 1] - self.log_energy[i]), 0, 1)
+        log_log = np.exp(self.log_sigma[i] * (1 - w) + self.log_sigma[i + 1] * w)
+
+        e0, e1 = self.energy[i], self.energy[i + 1]
+        t = np.clip((energy - e0) / (e1 - e0), 0, 1)
+        lin_lin = self.sigma[i] * (1 - t) + self.sigma[i + 1] * t
+        return np.where(self.positive[i] & self.positive[i + 1], log_log, lin_lin) * barn
+
+
+def one_over_v(sigma_thermal, energy_min=1e-5, energy_max=2e7, points=1201, name='1/v'):
+    '''
+    Table of a 1/v absorber, sigma(E) = sigma_thermal * sqrt(0.0253 eV / E), with sigma_thermal in cm^2.
+    B-10(n,a) follows this law to within a few percent up to about 100 keV. The default grid reaches 20 MeV, past the
+    top of the spectra of the models, so no energy in them falls off the end of the table.
+    '''
+
+    energy = np.logspace(np.log10(energy_min), np.log10(energy_max), points)
+    return CrossSectionTable(energy, sigma_thermal / barn * np.sqrt(thermal_energy / energy), name)
+
+
+def read_table(path):
+    '''
+    Parse a two column text table of energy [eV] and cross section [b]. Columns may be separated by whitespace or
+    commas, lines starting with # are comments. Points are sorted by energy.
+    '''
+
+    with open(path) as f:
+        rows = [line.replace(',', ' ') for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+    data = np.loadtxt(rows, ndmin=2)
+    data = data[np.argsort(data[:, 0], kind='stable')]
+    return data[:, 0], data[:, 1]
+
+
+def _cache_path(path, cache_dir):
+    if cache_dir is None:
+        return path + '.npy'
+    return os.path.join(cache_dir, os.path.basename(path) + '.npy')
+
+
+def load_table(path, name=None, cache_dir=None):
+    '''
+    Load a cross section table, going through its binary cache.
+
+    The cache is a float64 .npy array of shape (2, n) holding the energy and cross section rows. It is rebuilt only
+    when it is missing or older than the text table, and is otherwise memory-mapped read-only.
+    '''
+
+    cache = _cache_path(path, cache_dir)
+
+    if not os.path.exists(cache) or os.path.getmtime(cache) < os.path.getmtime(path):
+        energy, sigma = read_table(path)
+
+        # Write to a temporary file first so a concurrent reader never sees a half written cache.
+        tmp = cache + '.%d.tmp' % os.getpid()
+        with open(tmp, 'wb') as f:
+            np.save(f, np.vstack([energy, sigma]))
+        os.replace(tmp, cache)
+
+    data = np.load(cache, mmap_mode='r')
+    return CrossSectionTable(data[0], data[1], os.path.basename(path) if name is None else name)
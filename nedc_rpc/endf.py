@@ -0,0 +1,442 @@
+'''
+Pointwise neutron cross sections from ENDF-6 files, kept in a binary, memory-mapped store.
+
+The constants of the models were copied by hand from the ENDF retrieval pages. This module reads the evaluated files
+themselves (the ENDF-6 tapes of the NNDC or IAEA, one or more materials per file) and takes the File 3 sections, the
+cross section of every reaction MT as a TAB1 record: energies [eV] and cross sections [b] with ENDF interpolation laws.
+
+Parsing a file is slow, so the first time a file is added its sections are written to the store: one raw float64 file
+per source file, holding the energies and cross sections of all of its sections back to back, and an index.json with
+the offset, length and interpolation ranges of every section and the size and modification time of the source. Opening
+the store reads the index and memory-maps the data files, so a later run finds its tables in milliseconds, and a file
+is parsed again only when it changed.
+
+    store = Store()
+    store.add('n-005_B_010.endf')
+    store.table('B-10', 'n,alpha')(energy)              # [cm^2]
+    store.thermal('Cd-113', 'capture')
+
+Tables have the interface of cross_sections.CrossSectionTable, so they can be passed wherever a table is taken, e.g.
+spectrum_atten_percent(..., table=store.table('B-10', 'absorption')). File 3 of an evaluation with resonance parameters
+(Cd-113, Gd-157...) holds only the background in the resonance range; use a pointwise file reconstructed by NJOY RECONR
+or PREPRO RECENT for those, which has the same format.
+'''
+
+import argparse
+import hashlib
+import json
+import os
+import re
+
+import numpy as np
+
+from .cross_sections import thermal_energy
+from .depletion import barn
+
+DEFAULT_STORE = os.path.join(os.path.expanduser('~'), '.cache', 'nedc_rpc', 'endf')
+
+# Bump when the layout of the store changes, so old stores are rebuilt instead of misread.
+store_version = 1
+
+_symbols = ('n H He Li Be B C N O F Ne Na Mg Al Si P S Cl Ar K Ca Sc Ti V Cr Mn Fe Co Ni Cu Zn Ga Ge As Se Br Kr Rb '
+            'Sr Y Zr Nb Mo Tc Ru Rh Pd Ag Cd In Sn Sb Te I Xe Cs Ba La Ce Pr Nd Pm Sm Eu Gd Tb Dy Ho Er Tm Yb Lu Hf '
+            'Ta W Re Os Ir Pt Au Hg Tl Pb Bi Po At Rn Fr Ra Ac Th Pa U Np Pu Am Cm Bk Cf Es Fm Md No Lr').split()
+
+# Reaction names for the MT numbers of File 3.
+REACTIONS = {'total': 1, 'elastic': 2, 'nonelastic': 3, 'inelastic': 4, 'n,2n': 16, 'fission': 18, 'absorption': 101,
+             'capture': 102, 'n,p': 103, 'n,d': 104, 'n,t': 105, 'n,He3': 106, 'n,alpha': 107}
+
+# Reactions that evaluations often leave out, as sums of the ones they give: MT -> [(MT, sign)]. Absorption (101) is
+# the sum of whatever is present of 102-117; nonelastic (3) needs both total and elastic.
+DERIVED = {101: [(mt, 1) for mt in range(102, 118)], 3: [(1, 1), (2, -1)]}
+
+
+def material_name(za, liso=0):
+    '''
+    Name of a material from its ENDF ZA = 1000 Z + A, e.g. 5010 -> 'B-10', with m for a metastable target.
+    '''
+
+    z, a = divmod(int(round(za)), 1000)
+    symbol = _symbols[z] if z < len(_symbols) else str(z)
+    name = '%s-%d' % (symbol, a) if a else '%s-nat' % symbol
+    return name + ('m' * int(liso) if liso else '')
+
+
+def reaction_number(reaction):
+    '''
+    MT number of a reaction given by name or number.
+    '''
+
+    if isinstance(reaction, str):
+        if reaction in REACTIONS:
+            return REACTIONS[reaction]
+        if reaction.isdigit():
+            return int(reaction)
+        raise ValueError('unknown reaction %r, expected an MT number or one of %s' % (reaction, ', '.join(REACTIONS)))
+    return int(reaction)
+
+
+'''
+Parsing. An ENDF-6 line is six 11 character fields followed by MAT, MF and MT in columns 67-75; floats are written
+without the E, as 1.234567+5.
+'''
+
+_exponent = re.compile(r'(?<=[0-9.])([+-])(?=[0-9])')
+
+
+def _floats(lines, count):
+    '''
+    The first count numbers of the data fields of lines.
+    '''
+
+    body = ''.join(line[:66].ljust(66) for line in lines)
+    text = ' '.join(body[i:i + 11] for i in range(0, 11 * count, 11))
+    return np.array(_exponent.sub(r'e\1', text).replace('D', 'e').split(), dtype=float)
+
+
+def _ints(line):
+    '''
+    The six fields of a line as integers, blank fields 0.
+    '''
+
+    return [int(float(_exponent.sub(r'e\1', line[i:i + 11]))) if line[i:i + 11].strip() else 0
+            for i in range(0, 66, 11)]
+
+
+def _tab1(lines):
+    '''
+    A TAB1 record starting at lines[0]: C1, C2, the interpolation ranges (NBT, INT) and the x and y arrays.
+    '''
+
+    c1, c2 = _floats(lines[:1], 2)
+    _, _, _, _, nr, np_ = _ints(lines[0])
+    rows = (nr + 2) // 3
+    ranges = _floats(lines[1:1 + rows], 2 * nr).astype(int).reshape(nr, 2)
+    xy = _floats(lines[1 + rows:1 + rows + (np_ + 2) // 3], 2 * np_).reshape(np_, 2)
+    return c1, c2, ranges[:, 0], ranges[:, 1], xy[:, 0], xy[:, 1]
+
+
+def parse(path):
+    '''
+    The File 3 sections of an ENDF-6 file: a list of dicts with the material name, MAT, MT, ZA, AWR, QM and QI [eV],
+    the interpolation ranges nbt and int, and the energy [eV] and sigma [b] arrays.
+    '''
+
+    with open(path, 'rb') as f:
+        lines = f.read().decode('latin-1').splitlines()
+
+    # Lines by (MAT, MF, MT) section, in the order of the file; SEND, FEND and MEND lines have MT = 0.
+    sections = {}
+    for line in lines:
+        if len(line) < 75:
+            continue
+        try:
+            mat, mf, mt = int(line[66:70]), int(line[70:72]), int(line[72:75])
+        except ValueError:
+            continue
+        if mt and mf in (1, 3):
+            sections.setdefault((mat, mf, mt), []).append(line)
+
+    result = []
+    for (mat, mf, mt), body in sections.items():
+        if mf != 3:
+            continue
+        # LISO, the isomeric state of the target, is on the second line of the 451 section of File 1.
+        info = sections.get((mat, 1, 451))
+        liso = _ints(info[1])[3] if info and len(info) > 1 else 0
+        za, awr = _floats(body[:1], 2)
+        qm, qi, nbt, law, energy, sigma = _tab1(body[1:])
+        result.append({'material': material_name(za, liso), 'mat': mat, 'mt': mt, 'za': float(za), 'awr': float(awr),
+                       'qm': float(qm), 'qi': float(qi), 'nbt': nbt.tolist(), 'int': law.tolist(),
+                       'energy': energy, 'sigma': sigma})
+    return result
+
+
+'''
+Tables and the store.
+'''
+
+class EndfTable:
+    '''
+    Pointwise cross section of one reaction with the ENDF interpolation laws, with the interface of CrossSectionTable.
+
+    energy          [eV], non-decreasing energy grid; a repeated energy is a step
+    sigma           [b], cross section on the energy grid
+    nbt, law        interpolation ranges: law[j] (1 histogram, 2 lin-lin, 3 lin-log, 4 log-lin, 5 log-log) holds up
+                    to point nbt[j], counting from 1
+    name            label of the reaction, e.g. 'B-10 MT 107'
+    '''
+
+    def __init__(self, energy, sigma, nbt=None, law=None, name=''):
+        self.energy = energy
+        self.sigma = sigma
+        self.name = name
+        nbt = [len(energy)] if nbt is None else nbt
+        law = [2] if law is None else law
+        # Law of every interval between neighbouring points.
+        self.law = np.repeat(np.asarray(law, dtype=np.int8), np.diff(np.r_[1, np.asarray(nbt)]))[:len(energy) - 1]
+
+    def __repr__(self):
+        return 'EndfTable(%r, %d points)' % (self.name, len(self.energy))
+
+    def barns(self, energy):
+        '''
+        [b], cross section at an array of energies (eV); 0 outside the table, as in ENDF.
+        '''
+
+        x = np.asarray(energy, dtype=float)
+        e, s = self.energy, self.sigma
+        i = np.clip(np.searchsorted(e, x, side='right') - 1, 0, len(e) - 2)
+        x0, x1, y0, y1 = e[i], e[i + 1], s[i], s[i + 1]
+        law = self.law[i]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = np.where(x1 > x0, (x - x0) / (x1 - x0), 0)
+            tlog = np.where(x1 > x0, np.log(x / x0) / np.log(x1 / x0), 0)
+            lin = y0 + (y1 - y0) * np.where((law == 3) | (law == 5), tlog, t)
+            log = y0 * (y1 / y0) ** np.where(law == 5, tlog, t)
+            y = np.where(law == 1, y0, np.where((law >= 4) & (y0 > 0) & (y1 > 0), log, lin))
+        return np.where((x >= e[0]) & (x <= e[-1]), y, 0.0)
+
+    def __call__(self, energy):
+        '''
+        [cm^2], cross section at an array of energies (eV).
+        '''
+
+        return self.barns(energy) * barn
+
+
+def _data_name(path):
+    base = os.path.splitext(os.path.basename(path))[0]
+    return '%s-%s.f8' % (base, hashlib.sha1(path.encode()).hexdigest()[:12])
+
+
+class Store:
+    '''
+    Binary store of File 3 sections under a directory. Files are added with add, which parses them only when they are
+    new or changed; tables are served from memory-mapped data.
+    '''
+
+    def __init__(self, directory=DEFAULT_STORE):
+        self.directory = directory
+        self.index = self._read_index()
+        self._maps = {}
+        self._lookup()
+
+    def _read_index(self):
+        path = os.path.join(self.directory, 'index.json')
+        if os.path.exists(path):
+            with open(path) as f:
+                index = json.load(f)
+            if index.get('version') == store_version:
+                return index
+        return {'version': store_version, 'files': {}}
+
+    def _lookup(self):
+        # (material, MT) -> (data file, section); a later file overrides an earlier one.
+        self.sections = {}
+        for entry in self.index['files'].values():
+            for section in entry['sections']:
+                self.sections[section['material'], section['mt']] = (entry['data'], section)
+
+    def _map(self, data):
+        if data not in self._maps:
+            self._maps[data] = np.memmap(os.path.join(self.directory, data), dtype='<f8', mode='r')
+        return self._maps[data]
+
+    def _write_index(self, path, entry):
+        '''
+        Add the entry of one source file to the index on disk. The index is read again just before it is replaced, so
+        files other processes added since this store was opened are kept.
+        '''
+
+        index = self._read_index()
+        index['files'].pop(path, None)
+        index['files'][path] = entry
+        target = os.path.join(self.directory, 'index.json')
+        tmp = target + '.%d.tmp' % os.getpid()
+        with open(tmp, 'w') as f:
+            json.dump(index, f, indent=1)
+        os.replace(tmp, target)
+        self.index = index
+
+    def current(self, path):
+        '''
+        Whether the store holds the sections of the file as it is now.
+        '''
+
+        entry = self.index['files'].get(os.path.abspath(path))
+        stat = os.stat(path)
+        return entry is not None and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime
+
+    def add(self, path, force=False):
+        '''
+        Add the File 3 sections of an ENDF-6 file, parsing it only if the store doesn't hold it as it is now (or with
+        force). Returns the (material, MT) keys of its sections.
+        '''
+
+        path = os.path.abspath(path)
+        if force or not self.current(path):
+            stat = os.stat(path)
+            sections = parse(path)
+            data = _data_name(path)
+
+            # Energies and cross sections of every section back to back, written to a temporary file and renamed so
+            # readers of the old version keep a consistent map.
+            offset, entries = 0, []
+            os.makedirs(self.directory, exist_ok=True)
+            target = os.path.join(self.directory, data)
+            tmp = target + '.%d.tmp' % os.getpid()
+            with open(tmp, 'wb') as f:
+                for section in sections:
+                    points = len(section['energy'])
+                    np.concatenate([section['energy'], section['sigma']]).astype('<f8').tofile(f)
+                    entry = {key: value for key, value in section.items() if key not in ('energy', 'sigma')}
+                    entry.update(offset=offset, points=points)
+                    entries.append(entry)
+                    offset += 2 * points
+            os.replace(tmp, target)
+
+            self._maps.pop(data, None)
+            self._write_index(path, {'size': stat.st_size, 'mtime': stat.st_mtime, 'data': data, 'sections': entries})
+            self._lookup()
+        return [(section['material'], section['mt']) for section in self.index['files'][path]['sections']]
+
+    def keys(self):
+        '''
+        Sorted (material, MT) keys of all the sections in the store.
+        '''
+
+        return sorted(self.sections)
+
+    def __contains__(self, key):
+        material, reaction = key
+        mt = reaction_number(reaction)
+        if (material, mt) in self.sections:
+            return True
+        return mt in DERIVED and self._parts(material, mt) is not None
+
+    def _parts(self, material, mt):
+        '''
+        The (MT, sign) terms a derived reaction is made of in the store, or None if it can't be made.
+        '''
+
+        if mt == 101:
+            parts = [(m, sign) for m, sign in DERIVED[mt] if (material, m) in self.sections]
+            return parts or None
+        if all((material, m) in self.sections for m, _ in DERIVED[mt]):
+            return DERIVED[mt]
+        return None
+
+    def table(self, material, reaction):
+        '''
+        EndfTable of a reaction (name or MT) of a material, e.g. ('B-10', 'n,alpha'). Absorption and nonelastic are
+        summed from their parts when the file doesn't give them, on the union of the energy grids.
+        '''
+
+        mt = reaction_number(reaction)
+        if (material, mt) in self.sections:
+            data, section = self.sections[material, mt]
+            values = self._map(data)
+            start, points = section['offset'], section['points']
+            return EndfTable(values[start:start + points], values[start + points:start + 2 * points], section['nbt'],
+                             section['int'], '%s MT %d' % (material, mt))
+
+        parts = self._parts(material, mt) if mt in DERIVED else None
+        if parts is None:
+            raise KeyError('no MT %d of %s in the store %s' % (mt, material, self.directory))
+        tables = [(self.table(material, m), sign) for m, sign in parts]
+        energy = np.unique(np.concatenate([table.energy for table, _ in tables]))
+        sigma = sum(sign * table.barns(energy) for table, sign in tables)
+        return EndfTable(energy, sigma, name='%s MT %d' % (material, mt))
+
+    def cross_section(self, material, reaction, energy):
+        '''
+        [cm^2], cross section of a reaction of a material at an array of energies (eV).
+        '''
+
+        return self.table(material, reaction)(energy)
+
+    def thermal(self, material, reaction):
+        '''
+        [cm^2], cross section at the thermal energy, 0.0253 eV.
+        '''
+
+        return float(self.cross_section(material, reaction, thermal_energy))
+
+
+'''
+The hand copied constants of the models, to check against the evaluated data.
+'''
+
+def constants():
+    '''
+    (material, reaction, [cm^2] value, where it is used) of the thermal cross sections the models use.
+    '''
+
+    from . import gamma_current, neutron_attenuation
+    from .depletion import ABSORBERS
+
+    rows = [('B-10', 'nonelastic', neutron_attenuation.sigma, 'neutron_attenuation.sigma'),
+            ('B-10', 'n,alpha', gamma_current.sigma, 'gamma_current.sigma')]
+    for element, absorber in ABSORBERS.items():
+        for isotope, sigma in zip(absorber.isotopes, absorber.sigma):
+            rows.append((isotope, 'absorption', float(sigma), "ABSORBERS['%s'] %s" % (element, isotope)))
+    return rows
+
+
+def check(store):
+    '''
+    Compare the constants of the models with the thermal cross sections of the store. Returns a structured array with
+    one row per constant the store has data for.
+    '''
+
+    rows = [(material, reaction, value, store.thermal(material, reaction), where)
+            for material, reaction, value, where in constants() if (material, reaction) in store]
+    return np.array(rows, dtype=[('material', 'U12'), ('reaction', 'U12'), ('constant', 'f8'), ('endf', 'f8'),
+                                 ('source', 'U40')])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='ENDF-6 cross sections in a binary, memory-mapped store.')
+    parser.add_argument('--store', default=DEFAULT_STORE, help='directory of the store')
+    commands = parser.add_subparsers(dest='command', metavar='command')
+    commands.required = True
+    sub = commands.add_parser('add', help='parse ENDF-6 files into the store')
+    sub.add_argument('files', nargs='+')
+    sub.add_argument('--force', action='store_true', help='parse again even if the store is up to date')
+    commands.add_parser('list', help='list the sections in the store')
+    commands.add_parser('check', help='compare the constants of the models with the store')
+    sub = commands.add_parser('lookup', help='cross section of a reaction at energies')
+    sub.add_argument('material', help='e.g. B-10')
+    sub.add_argument('reaction', help='MT number or one of %s' % ', '.join(REACTIONS))
+    sub.add_argument('energy', type=float, nargs='*', default=[thermal_energy], help='[eV]')
+    args = parser.parse_args(argv)
+
+    store = Store(args.store)
+    if args.command == 'add':
+        for path in args.files:
+            if not os.path.isfile(path):
+                parser.error('no such file: %s' % path)
+            fresh = args.force or not store.current(path)
+            keys = store.add(path, args.force)
+            print('%s: %d sections%s' % (path, len(keys), '' if fresh else ', up to date'))
+    elif args.command == 'list':
+        for material, mt in store.keys():
+            energy = store.table(material, mt).energy
+            print('%-10s MT %3d  %7d points  %10.4g - %10.4g eV' % (material, mt, len(energy), energy[0], energy[-1]))
+    elif args.command == 'check':
+        for row in check(store):
+            print('%-8s %-11s constant %11.5g  ENDF %11.5g  ratio %7.4f  %s' % (
+                row['material'], row['reaction'], row['constant'] / barn, row['endf'] / barn,
+                row['constant'] / row['endf'], row['source']))
+    else:
+        try:
+            sigma = store.cross_section(args.material, args.reaction, args.energy)
+        except (KeyError, ValueError) as error:
+            parser.error(str(error))
+        for energy, value in zip(args.energy, sigma):
+            print('%12.5g eV  %12.6g b' % (energy, value / barn))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+'''
+Secondary gamma source term of a boron slab under neutron irradiation.
+
+Every B-10(n,a)Li-7 reaction leaves Li-7 in an excited state with a 42 femtosecond half-life, so the 478 keV gamma
+is emitted as soon as the reaction happens and the gamma current density follows the reaction rate. All units are
+in the CGS unit system.
+'''
+
+import numpy as np
+
+from .depletion import Na, point_source_flux
+
+'''
+Definitions                         Units, Brief Descriptor. All units are in the CGS unit system.
+'''
+
+# Info given by Dr. Lee Bernstein.
+I = 10e9                            # [# neutrons from source per second], approx. top neutron current (HFNG)
+r = 1                               # [cm], assumed distance from target boron slab given general size of HFNG assembly
+
+# Obtained using WolframAlpha.com
+rho = 2.46                          # [g/cm^3], density of natural boron
+x = 0.198                           # [mass B-10/mass natural boron], mass fraction of B-10 in natural boron
+M = 10.012936992                    # [g/mol], molar mass of B-10
+
+# Obtained using ENDF website: http://www.nndc.bnl.gov/exfor/endf00.jsp
+sigma = 3.60069e-21                 # [cm^2], cross-section for B-10(n,a)Li-7 at the thermal energy peak (0.0253 eV)
+
+
+class GammaSource:
+    '''
+    Gamma current density produced per unit volume of a boron slab.
+
+    The initial B-10 number density (rho_knot) and the neutron flux at the slab (omega_knot) are computed once when
+    the source is created. I and r may be arrays, in which case omega_knot has their broadcast shape and every
+    evaluation broadcasts the time against it.
+    '''
+
+    def __init__(self, I=I, r=r, rho=rho, x=x, M=M, sigma=sigma):
+
+        # [# B-10 nuclei/mol B-10] * [mass nat. boron/volume] * [mass B-10/mass nat. boron] / [mass B-10/mol B-10]
+        # = [# B-10 nuclei/volume]. Assume the slab is entirely natural, elemental boron.
+        self.rho_knot = Na * rho * x / M
+
+        # The fluence rate is the source current spread over a sphere with a radius equal to the separation.
+        self.omega_knot = point_source_flux(I, r)
+
+        self.sigma = sigma
+
+        # Reaction rate per B-10 nucleus and the initial gamma current density, both used on every evaluation.
+        self.rate = self.sigma * self.omega_knot
+        self.initial = self.rho_knot * self.rate
+
+    def current_density(self, t):
+        '''
+        Gammas produced per unit time per unit volume of the slab at time t (s).
+
+        From R = rho * omega * sigma and R = -dN/dt, the B-10 density decays as exp(-sigma * omega * t) and the
+        gamma current density is rho_knot * sigma * omega_knot * exp(-sigma * omega_knot * t).
+        '''
+
+        return self.initial * np.exp(-self.rate * np.asarray(t, dtype=float))
+
+    def attenuated(self, atten_coeff, dens, thickness):
+        '''
+        Gamma current density at the start of the irradiation removed by a gamma absorbing slab of the given mass
+        attenuation coefficient (cm^2/g), density (g/cm^3) and thickness (cm) placed directly against the boron.
+        Formula from http://physics.nist.gov/PhysRefData/XrayMassCoef/chap2.html
+        '''
+
+        mu = np.asarray(atten_coeff, dtype=float) * np.asarray(dens, dtype=float)
+        return self.initial * -np.expm1(-mu * np.asarray(thickness, dtype=float))
+
+    def atten_percent(self, atten_coeff, dens, thickness, t):
+        '''
+        Percentage of the gamma current density attenuated by the slab, relative to the current density at time t.
+        '''
+
+        return 100 * self.attenuated(atten_coeff, dens, thickness) / self.current_density(t)
+
+
+class Material:
+    '''
+    A gamma absorbing material.
+
+    name            label used in plots and tables
+    atten_coeff     [cm^2/g], mass attenuation coefficient for the secondary gammas
+    density         [g/cm^3], density of the material
+    '''
+
+    def __init__(self, name, atten_coeff, density):
+        self.name = name
+        self.atten_coeff = atten_coeff
+        self.density = density
+
+    def __repr__(self):
+        return 'Material(%r, %r, %r)' % (self.name, self.atten_coeff, self.density)
+
+    @property
+    def linear_atten_coeff(self):
+        '''
+        [1/cm], linear attenuation coefficient of the material.
+        '''
+
+        return self.atten_coeff * self.density
+
+
+def attenuation_tensor(materials, thickness, times, source=None, dtype=np.float64):
+    '''
+    Percentage of the gamma current density attenuated for every material, thickness (cm) and time (s).
+
+    Returns an array of shape (len(materials), len(thickness), len(times)), the same numbers gammaAttenPercent
+    gives one point at a time. The attenuated fraction and the time dependence of the source separate, so the
+    tensor is one outer product of a (material, thickness) matrix with a time vector. dtype=np.float32 halves the
+    memory of very large grids; the factors are computed in double precision and only the output is rounded.
+    '''
+
+    if source is None:
+        source = GammaSource()
+
+    mu = np.array([material.linear_atten_coeff for material in materials], dtype=float)
+    thickness = np.asarray(thickness, dtype=float)
+    times = np.asarray(times, dtype=float)
+
+    # 100 * initial * (1 - exp(-mu x)) / (initial * exp(-rate t)) = 100 * (1 - exp(-mu x)) * exp(rate t)
+    attenuated = -100 * np.expm1(-np.multiply.outer(mu, thickness))
+    growth = np.exp(source.rate * times)
+
+    return np.multiply.outer(attenuated.astype(dtype), growth.astype(dtype))
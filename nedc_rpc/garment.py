@@ -0,0 +1,383 @@
+'''
+Neutron and secondary gamma dose over the surface of a garment.
+
+The scripts evaluate the point-source flux I / (4 pi r^2) at a single distance. Here it is evaluated at every vertex
+of a triangulated body or garment mesh (Wavefront .obj), together with
+
+    occlusion       whether the straight line from the source to the vertex is blocked by another part of the mesh
+    obliquity       the path length through a garment of the given thickness, thickness / |cos| of the angle between
+                    the beam and the surface normal
+    transmission    the thermal neutron flux left behind the composite (the narrow-beam physics of neut_atten_percent)
+                    and the 478 keV gamma current from the B-10(n,a)Li-7 captures in it
+    dose            effective dose rates from the fluence to dose coefficients of ICRP 74 (AP geometry)
+
+Occlusion is looked up in a shadow map: the mesh is projected onto an image plane in front of the source, every
+triangle is rasterized into the pixels its bounding box covers with a Moller-Trumbore ray test through the pixel
+centres, and every pixel keeps the distance to the nearest hit. The map is the spatial index: a vertex only meets the
+triangles in front of it in its own pixel, so the cost is linear in the number of vertices and the covered pixels, and
+faces outside the view of the source are never tested. Everything is vectorized over vertices and faces.
+
+Units are CGS, dose rates are in uSv/h.
+'''
+
+import argparse
+
+import numpy as np
+
+from .depletion import point_source_flux
+from .materials import default_table, li7_gamma_energy
+from .neutron_attenuation import composite_density, neut_atten_percent
+
+# ICRP Publication 74, effective dose per fluence in AP geometry: thermal neutrons (0.0253 eV) and photons at 0.5 MeV,
+# the tabulated energy nearest to the 478 keV Li-7 line.
+neutron_dose_coeff = 7.60           # [pSv cm^2]
+gamma_dose_coeff = 2.93             # [pSv cm^2]
+
+li7_gamma_yield = 0.94              # [gammas/capture], B-10(n,a)Li-7 captures leaving the Li-7 in its excited state
+
+# Garment components in the order of the mass fractions of neutron_attenuation.
+components = ['Boric acid', 'Stainless steel', 'Epoxy resin', 'Epoxy hardener']
+default_composition = (0.333, 0.333, 0.206, 0.128)
+default_thickness = 0.5             # [cm]
+
+# [pSv/s] -> [uSv/h]
+_per_hour = 3600 * 1e-6
+
+dose_dtype = [('distance', 'f8'), ('cos_incidence', 'f8'), ('occluded', '?'), ('incident', 'f8'), ('path', 'f8'),
+              ('neutron_flux', 'f8'), ('gamma_current', 'f8'), ('neutron_dose', 'f8'), ('gamma_dose', 'f8'),
+              ('dose', 'f8')]
+
+
+'''
+Meshes.
+'''
+
+def load_obj(path):
+    '''
+    Vertices (n, 3) and triangles (m, 3) of a Wavefront .obj file. Polygons are split into triangle fans, texture and
+    normal indices are ignored, and negative (relative) indices count back from the last vertex of the file.
+    '''
+
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    # Only the vertex index of every v, v/vt, v//vn or v/vt/vn corner is kept. The corner format of the first face
+    # line decides how many numbers each corner is once the slashes are blanked out, which no other v or f line has.
+    start = data.find(b'\nf ') + 1
+    corner = data[start:data.find(b'\n', start)].split()[1:2] or [b'']
+    per_corner = corner[0].count(b'/') + 1 - corner[0].count(b'//')
+    lines = data.replace(b'//', b'/').replace(b'/', b' ').splitlines()
+    vertex_lines = [line[2:] for line in lines if line[:2] in (b'v ', b'v\t')]
+    face_lines = [line[2:] for line in lines if line[:2] in (b'f ', b'f\t')]
+    del lines
+    if not vertex_lines or not face_lines:
+        raise ValueError('%s: no vertices or faces' % path)
+
+    try:
+        vertices = np.loadtxt(vertex_lines, ndmin=2).reshape(len(vertex_lines), -1)[:, :3]
+    except ValueError:
+        # Some exporters append colours to some of the coordinates.
+        vertices = np.array([line.split()[:3] for line in vertex_lines], dtype=float)
+    vertices = vertices.reshape(-1, 3)
+
+    # Triangles all in one corner format, the usual case, parse as one table; anything else line by line.
+    try:
+        table = np.loadtxt(face_lines, dtype=np.intp, ndmin=2).reshape(len(face_lines), -1)
+        if table.shape[1] != 3 * per_corner:
+            raise ValueError('not triangles')
+        indices = table[:, ::per_corner].ravel()
+        counts = np.full(len(face_lines), 3, dtype=np.intp)
+    except ValueError:
+        corners = [line[2:].split() for line in data.splitlines() if line[:2] in (b'f ', b'f\t')]
+        indices = np.array([c.split(b'/', 1)[0] for line in corners for c in line], dtype=np.intp)
+        counts = np.fromiter(map(len, corners), dtype=np.intp, count=len(corners))
+    indices = np.where(indices < 0, indices + len(vertices), indices - 1)
+    if np.any((indices < 0) | (indices >= len(vertices))):
+        raise ValueError('%s: face index out of range' % path)
+
+    # Fan triangulation: polygon p with k corners starting at offset o gives (o, o + j, o + j + 1) for j = 1 .. k - 2.
+    offsets = np.cumsum(counts) - counts
+    fans = np.maximum(counts - 2, 0)
+    first = np.repeat(offsets, fans)
+    j = np.arange(fans.sum()) - np.repeat(np.cumsum(fans) - fans, fans) + 1
+    faces = np.stack([indices[first], indices[first + j], indices[first + j + 1]], axis=-1)
+    return vertices, faces
+
+
+def face_normals(vertices, faces):
+    '''
+    Normals of the triangles, of length twice their area, (m, 3).
+    '''
+
+    a, b, c = (vertices[faces[:, i]] for i in range(3))
+    return np.cross(b - a, c - a)
+
+
+def vertex_normals(vertices, faces):
+    '''
+    Unit normals of the vertices, the area weighted average of the normals of the triangles around them, (n, 3).
+    Vertices on no triangle get a zero normal.
+    '''
+
+    n = face_normals(vertices, faces)
+    normals = np.stack([np.bincount(faces.ravel(), np.repeat(n[:, k], 3), minlength=len(vertices))
+                        for k in range(3)], axis=-1)
+    length = np.linalg.norm(normals, axis=-1, keepdims=True)
+    return np.divide(normals, length, out=np.zeros_like(normals), where=length > 0)
+
+
+'''
+Occlusion.
+'''
+
+def _frame(vertices, source):
+    '''
+    Orthonormal frame (w, u, v) looking from the source at the bounding sphere of the mesh, and the tangent of the half
+    angle of view that just contains the sphere.
+    '''
+
+    centre = (vertices.min(axis=0) + vertices.max(axis=0)) / 2
+    radius = np.sqrt(np.max(np.sum((vertices - centre) ** 2, axis=-1)))
+    axis = centre - source
+    d = np.linalg.norm(axis)
+    if d <= radius * (1 + 1e-9):
+        raise ValueError('the source is inside the bounding sphere of the mesh; occlusion needs it outside')
+    w = axis / d
+    u = np.cross(w, [1.0, 0, 0] if abs(w[0]) < 0.9 else [0, 1.0, 0])
+    u /= np.linalg.norm(u)
+    v = np.cross(w, u)
+    tan_half = radius / np.sqrt(d * d - radius * radius) * (1 + 1e-6)
+    return w, u, v, tan_half
+
+
+def _project(q, frame, resolution):
+    '''
+    Pixel coordinates (continuous) of points q relative to the source.
+    '''
+
+    w, u, v, tan_half = frame
+    z = q @ w
+    scale = resolution / 2 / tan_half
+    return (q @ u / z + tan_half) * scale, (q @ v / z + tan_half) * scale
+
+
+def map_resolution(vertices, faces, source, pixels_per_face=2.0, limits=(64, 8192)):
+    '''
+    Side of a shadow map whose pixels are about as fine as the mesh: the bounding box of the median triangle covers
+    pixels_per_face pixels, which is about the number of ray tests it costs.
+    '''
+
+    px, py = _project(vertices - np.asarray(source, dtype=float), _frame(vertices, source), 1)
+    fx, fy = px[faces], py[faces]
+    box = (fx.max(axis=1) - fx.min(axis=1)) * (fy.max(axis=1) - fy.min(axis=1))
+    median = np.median(box[box > 0]) if np.any(box > 0) else 1.0
+    return int(np.clip(np.sqrt(pixels_per_face / median), *limits))
+
+
+def shadow_map(vertices, faces, source, resolution=None, max_pairs=2**21):
+    '''
+    Distance from the source to the nearest triangle through the centre of every pixel, (resolution, resolution),
+    inf where the ray misses the mesh, and the frame of the map. The resolution follows the mesh unless it is given.
+    '''
+
+    source = np.asarray(source, dtype=float)
+    if resolution is None:
+        resolution = map_resolution(vertices, faces, source)
+    frame = _frame(vertices, source)
+    w, u, v, tan_half = frame
+    px, py = _project(vertices - source, frame, resolution)
+
+    # Pixels whose centres fall in the bounding box of every triangle; tiny triangles between centres get none.
+    fx, fy = px[faces], py[faces]
+    x0 = np.maximum(np.ceil(fx.min(axis=1) - 0.5), 0).astype(np.intp)
+    x1 = np.minimum(np.floor(fx.max(axis=1) - 0.5), resolution - 1).astype(np.intp)
+    y0 = np.maximum(np.ceil(fy.min(axis=1) - 0.5), 0).astype(np.intp)
+    y1 = np.minimum(np.floor(fy.max(axis=1) - 0.5), resolution - 1).astype(np.intp)
+    nx = np.maximum(x1 - x0 + 1, 0)
+    pairs = nx * np.maximum(y1 - y0 + 1, 0)
+
+    # Triangles as components: corner a relative to the source and the edges e1, e2.
+    a = (vertices[faces[:, 0]] - source).T
+    e1 = (vertices[faces[:, 1]] - vertices[faces[:, 0]]).T
+    e2 = (vertices[faces[:, 2]] - vertices[faces[:, 0]]).T
+
+    depth = np.full(resolution * resolution, np.inf)
+    step = 2 * tan_half / resolution
+    ends = np.cumsum(pairs)
+    start = 0
+    while start < len(faces):
+        # As many whole triangles as fit in max_pairs (pixel, triangle) tests, at least one.
+        stop = max(int(np.searchsorted(ends, ends[start] - pairs[start] + max_pairs, side='right')), start + 1)
+        count = pairs[start:stop]
+        tri = np.repeat(np.arange(start, stop), count)
+        k = np.arange(tri.size) - np.repeat(np.cumsum(count) - count, count)
+        ix = x0[tri] + k % nx[tri]
+        iy = y0[tri] + k // nx[tri]
+        start = stop
+        if not tri.size:
+            continue
+
+        # Moller-Trumbore: the ray from the source through the pixel centre, direction d of unit length, against
+        # triangle tri.
+        cu, cv = (ix + 0.5) * step - tan_half, (iy + 0.5) * step - tan_half
+        d = w[:, None] + cu * u[:, None] + cv * v[:, None]
+        d /= np.sqrt(d[0] ** 2 + d[1] ** 2 + d[2] ** 2)
+        E1, E2, s = e1[:, tri], e2[:, tri], -a[:, tri]
+        p = np.cross(d, E2, axis=0)
+        q = np.cross(s, E1, axis=0)
+        det = np.sum(E1 * p, axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            inv = 1 / det
+            b1 = np.sum(s * p, axis=0) * inv
+            b2 = np.sum(d * q, axis=0) * inv
+            t = np.sum(E2 * q, axis=0) * inv
+        hit = (b1 >= -1e-9) & (b2 >= -1e-9) & (b1 + b2 <= 1 + 1e-9) & (t > 0) & np.isfinite(t)
+        np.minimum.at(depth, iy[hit] * resolution + ix[hit], t[hit])
+
+    return depth.reshape(resolution, resolution), frame
+
+
+def occluded(vertices, faces, source, normals=None, resolution=None, bias=1.5):
+    '''
+    Whether the line from the source to every vertex is blocked by the mesh. When the vertex normals are given, a
+    vertex facing away from the source (cos of the incidence <= 0) is shadowed by its own surface; the rest count as
+    lit if they are no further than the nearest hit in their pixel plus bias pixel footprints, stretched by 1 / cos,
+    which keeps the triangles around the vertex itself from shadowing it. The bias is only applied after the facing
+    test, since at grazing incidence it is wide enough to light vertices just behind the silhouette.
+    '''
+
+    source = np.asarray(source, dtype=float)
+    depth, frame = shadow_map(vertices, faces, source, resolution)
+    resolution = len(depth)
+    q = vertices - source
+    px, py = _project(q, frame, resolution)
+    ix = np.clip(px.astype(np.intp), 0, resolution - 1)
+    iy = np.clip(py.astype(np.intp), 0, resolution - 1)
+    distance = np.linalg.norm(q, axis=-1)
+    footprint = distance * 2 * frame[3] / resolution
+    if normals is None:
+        return distance > depth[iy, ix] + bias * footprint
+    cos = -np.einsum('ij,ij->i', normals, q) / np.maximum(distance, 1e-300)
+    footprint = footprint / np.maximum(cos, 0.05)
+    return (cos <= 0) | (distance > depth[iy, ix] + bias * footprint)
+
+
+'''
+Flux and dose.
+'''
+
+def composite_attenuation(mass_fracs=default_composition, energy=li7_gamma_energy):
+    '''
+    [1/cm], linear gamma attenuation coefficient of the composite at an energy (MeV): the mass attenuation
+    coefficients of the components averaged by mass fraction, times the density of the composite.
+    '''
+
+    mass_fracs = np.asarray(mass_fracs, dtype=float)
+    mu_rho = default_table().mass_atten_coeff(components, energy)
+    return np.tensordot(mass_fracs, mu_rho, axes=([-1], [0])) * composite_density(mass_fracs)
+
+
+def dose_map(vertices, faces, source=(0.0, 0.0, 0.0), I=10**9, thickness=default_thickness,
+             mass_fracs=default_composition, normals=None, occlusion=True, resolution=None, min_cos=0.05):
+    '''
+    Flux and dose at every vertex of a garment mesh [cm] around an isotropic point source of I thermal neutrons per
+    second, as a table with dose_dtype rows:
+
+    distance        [cm], from the source
+    cos_incidence   cosine between the beam and the vertex normal, negative when the vertex faces away from the source
+    occluded        the beam is blocked by another part of the mesh, or the vertex faces away; flux and dose are 0.
+                    With occlusion False the shadow map is skipped and only the vertices facing away are occluded.
+    incident        [neutrons/(cm^2 s)], point-source flux at the vertex
+    path            [cm], path of the beam through the garment, thickness / |cos|, at most thickness / min_cos
+    neutron_flux    [neutrons/(cm^2 s)], transmitted thermal neutron flux
+    gamma_current   [gammas/(cm^2 s)], 478 keV gammas from captures in the garment reaching its inner face
+    neutron_dose    [uSv/h]
+    gamma_dose      [uSv/h]
+    dose            [uSv/h], total
+
+    Half of the capture gammas head inward; they come from the layer the neutrons are absorbed in, and are attenuated
+    on their way out by the average self-shielding of a slab, (1 - exp(-mu t)) / (mu t).
+    '''
+
+    vertices = np.asarray(vertices, dtype=float)
+    faces = np.asarray(faces, dtype=np.intp)
+    source = np.asarray(source, dtype=float)
+    if normals is None:
+        normals = vertex_normals(vertices, faces)
+
+    table = np.zeros(len(vertices), dtype=dose_dtype)
+    q = source - vertices
+    distance = np.linalg.norm(q, axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cos = np.einsum('ij,ij->i', normals, q) / distance
+    cos = np.nan_to_num(cos)
+    table['distance'] = distance
+    table['cos_incidence'] = cos
+    if occlusion:
+        table['occluded'] = occluded(vertices, faces, source, normals, resolution)
+    else:
+        table['occluded'] = cos <= 0
+    lit = ~table['occluded']
+
+    incident = np.where(lit, point_source_flux(I, distance), 0.0)
+    path = thickness / np.maximum(np.abs(cos), min_cos)
+    absorbed = neut_atten_percent(path, *mass_fracs) / 100
+    table['incident'] = incident
+    table['path'] = path
+    table['neutron_flux'] = incident * (1 - absorbed)
+
+    # Captures per unit garment area, half of their gammas inward, self-shielded across the thickness.
+    mu_t = composite_attenuation(mass_fracs) * thickness
+    captures = incident * np.maximum(np.abs(cos), min_cos) * absorbed
+    table['gamma_current'] = 0.5 * li7_gamma_yield * captures * -np.expm1(-mu_t) / mu_t
+
+    table['neutron_dose'] = table['neutron_flux'] * neutron_dose_coeff * _per_hour
+    table['gamma_dose'] = table['gamma_current'] * gamma_dose_coeff * _per_hour
+    table['dose'] = table['neutron_dose'] + table['gamma_dose']
+    return table
+
+
+def dose_map_file(path, **kwargs):
+    '''
+    dose_map of the mesh in an .obj file; returns the vertices, the faces and the table.
+    '''
+
+    vertices, faces = load_obj(path)
+    return vertices, faces, dose_map(vertices, faces, **kwargs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Neutron and secondary gamma dose over a garment mesh.')
+    parser.add_argument('mesh', help='.obj file, coordinates in cm')
+    parser.add_argument('--output', help='.npz file to write the vertices, faces and per-vertex table to')
+    parser.add_argument('--source', type=float, nargs=3, default=[0.0, 0.0, 0.0], metavar=('X', 'Y', 'Z'),
+                        help='[cm], position of the point source')
+    parser.add_argument('--intensity', type=float, default=10**9, help='[neutrons/s], source strength')
+    parser.add_argument('--thickness', type=float, default=default_thickness, help='[cm], garment thickness')
+    parser.add_argument('--composition', default=','.join(map(str, default_composition)),
+                        help='mass fractions: boric acid,steel,resin,hardener')
+    parser.add_argument('--no-occlusion', action='store_true',
+                        help='skip the shadow map; only vertices facing away from the source are dark')
+    parser.add_argument('--resolution', type=int, default=None, help='side of the shadow map in pixels')
+    args = parser.parse_args(argv)
+
+    fracs = [float(f) for f in args.composition.split(',')]
+    try:
+        vertices, faces, table = dose_map_file(args.mesh, source=args.source, I=args.intensity,
+                                               thickness=args.thickness, mass_fracs=fracs,
+                                               occlusion=not args.no_occlusion, resolution=args.resolution)
+    except ValueError as error:
+        parser.error(str(error))
+    lit = ~table['occluded']
+    print('%d vertices, %d faces, %d in view of the source' % (len(vertices), len(faces), lit.sum()))
+    if lit.any():
+        for name in ('neutron_dose', 'gamma_dose', 'dose'):
+            print('%-13s max %10.4g  mean over lit vertices %10.4g  [uSv/h]' % (
+                name, table[name].max(), table[name][lit].mean()))
+    if args.output:
+        np.savez(args.output, vertices=vertices, faces=faces, **{name: table[name] for name in table.dtype.names})
+        print('wrote', args.output)
+
+
+if __name__ == '__main__':
+    main()
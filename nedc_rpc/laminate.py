@@ -0,0 +1,276 @@
+'''
+Laminates: ordered stacks of composite and shielding layers, with the 478 keV gammas of the B-10 captures attenuated by
+the layers between them and the body.
+
+A thermal neutron beam enters the outermost layer. Layer i of thickness t_i, with B-10 macroscopic cross-section S_i,
+linear gamma attenuation coefficient m_i and gamma yield y_i per capture, sees the flux left by the layers in front of
+it and captures along exp(-S_i z). Half of the capture gammas head inward; the ones born at depth z cross t_i - z of
+their own layer, which integrates in closed form to
+
+    0.5 y_i phi_i S_i (exp(-S_i t_i) - exp(-m_i t_i)) / (m_i - S_i)
+
+per unit incident flux phi_i, and are then attenuated by every layer behind it (narrow beam, as neut_atten_percent and
+gammaAtten). A stack is described by two numbers per unit incident neutron flux, its neutron transmission and the gamma
+current leaving its inner face, which is all that adding more layers in front of the body needs to know.
+
+optimize looks for the lightest stack meeting a neutron and a gamma dose limit by branch and bound. Stacks are grown
+one layer at a time from the outside in, depth first over chunks of partial stacks, with all the (stack, material,
+thickness) children of a chunk evaluated as arrays. Children that meet both limits update the best stack and are not
+grown further, since more layers only add mass. The others are pruned when their mass plus a lower bound on the mass
+still needed is no lighter than the best stack. The bound is the least mass of any mix of the materials reaching the
+missing neutron and gamma optical depths, a two-constraint linear program solved once through the corners of its dual;
+it ignores the gammas the new layers make, so it never prunes a stack that could win.
+
+Units are CGS, doses are in uSv/h.
+'''
+
+import argparse
+
+import numpy as np
+
+from .garment import composite_attenuation, gamma_dose_coeff, li7_gamma_yield, neutron_dose_coeff
+from .materials import default_table, li7_gamma_energy
+from .neutron_absorption import compositions
+from .neutron_attenuation import B_10_number_density, composite_density, sigma
+
+layer_dtype = [('name', 'U40'),
+               ('density', 'f8'),           # [g/cm^3]
+               ('sigma_n', 'f8'),           # [1/cm], thermal neutron macroscopic absorption cross-section
+               ('mu', 'f8'),                # [1/cm], linear attenuation coefficient at 478 keV
+               ('gamma_yield', 'f8')]       # [gammas/absorbed neutron]
+
+stack_dtype = [('layer', 'U40'), ('thickness', 'f8')]
+
+default_thickness = np.arange(0.05, 1.05, 0.05)     # [cm]
+
+# [pSv/s] -> [uSv/h]
+_per_hour = 3600 * 1e-6
+
+
+def composite_layers(mass_fracs=compositions, names=None):
+    '''
+    Layers of boric acid / steel / epoxy composite for an array of compositions (m, 4).
+    '''
+
+    mass_fracs = np.atleast_2d(np.asarray(mass_fracs, dtype=float))
+    layers = np.empty(len(mass_fracs), dtype=layer_dtype)
+    layers['name'] = names if names is not None else ['composite %.3f/%.3f/%.3f/%.3f' % tuple(f) for f in mass_fracs]
+    layers['density'] = composite_density(mass_fracs)
+    layers['sigma_n'] = sigma * B_10_number_density(mass_fracs)
+    layers['mu'] = composite_attenuation(mass_fracs)
+    layers['gamma_yield'] = li7_gamma_yield
+    return layers
+
+
+def shield_layers(names=('Lead', 'Stainless steel', 'Polyethylene'), energy=li7_gamma_energy):
+    '''
+    Gamma shielding layers of the compounds of materials.py. Their thermal neutron absorption is neglected.
+    '''
+
+    table = default_table()
+    layers = np.zeros(len(names), dtype=layer_dtype)
+    layers['name'] = names
+    layers['density'] = [table.compounds[name][0] for name in names]
+    layers['mu'] = [table.linear_atten_coeff(name, energy) for name in names]
+    return layers
+
+
+def default_layers():
+    return np.concatenate([composite_layers(), shield_layers()])
+
+
+def _source(S, m, t):
+    '''
+    Gammas per unit incident neutron flux reaching the inner face of a layer from its own captures, before the yield
+    and the factor 1/2: S (exp(-S t) - exp(-m t)) / (m - S), which is S t exp(-S t) when m = S.
+    '''
+
+    d = (m - S) * t
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ratio = np.where(np.abs(d) > 1e-12, -np.expm1(-d) / d, 1 - d / 2)
+    return S * t * np.exp(-S * t) * ratio
+
+
+def add_layer(transmission, gamma, layers, thickness):
+    '''
+    Neutron transmission and inner-face gamma current (per unit incident neutron flux) of stacks after one more layer
+    is put behind them. All arguments broadcast against each other; layers is an array of layer_dtype.
+    '''
+
+    S, m, y = layers['sigma_n'], layers['mu'], layers['gamma_yield']
+    return (transmission * np.exp(-S * thickness),
+            gamma * np.exp(-m * thickness) + 0.5 * y * transmission * _source(S, m, thickness))
+
+
+def _dual_vertices(per_gram_n, per_gram_g):
+    '''
+    Corners (y_n, y_g) of {y >= 0: y_n a_j + y_g b_j <= 1 for every material j}, the dual of the smallest mass of
+    material reaching optical depths D_n and D_g when material j gives a_j = S_j / rho_j and b_j = m_j / rho_j of them
+    per gram. The smallest mass is at least y_n D_n + y_g D_g for every corner, and equal to the largest of them. A
+    direction left unbounded, when no material removes neutrons or gammas at all, gets an infinite corner.
+    '''
+
+    a = np.append(per_gram_n, [1.0, 0.0])
+    b = np.append(per_gram_g, [0.0, 1.0])
+    c = np.append(np.ones(len(per_gram_n)), [0.0, 0.0])
+    i, j = np.triu_indices(len(a), 1)
+    det = a[i] * b[j] - a[j] * b[i]
+    ok = np.abs(det) > 1e-300
+    with np.errstate(divide='ignore', invalid='ignore'):
+        y = np.stack([(c[i] * b[j] - c[j] * b[i]) / det, (a[i] * c[j] - a[j] * c[i]) / det], axis=-1)[ok]
+    y = y[np.all(y >= -1e-12, axis=1) & np.all(y @ np.stack([per_gram_n, per_gram_g]) <= 1 + 1e-9, axis=1)]
+    y = np.maximum(y, 0)
+    if not np.any(per_gram_n > 0):
+        y = np.vstack([y, [np.inf, 0]])
+    if not np.any(per_gram_g > 0):
+        y = np.vstack([y, [0, np.inf]])
+    return y
+
+
+def evaluate(layers, order, thickness, flux=1.0, gamma_ratio=0.0):
+    '''
+    Areal mass [g/cm^2], neutron dose and gamma dose [uSv/h] behind stacks of layers, from the outside in.
+
+    order (..., k) indexes layers, with -1 for no layer; thickness (..., k) [cm]. flux [neutrons/(cm^2 s)] is the
+    incident thermal neutron flux and gamma_ratio the incident 478 keV gamma current per unit neutron flux.
+    '''
+
+    order = np.asarray(order)
+    thickness = np.where(order >= 0, np.asarray(thickness, dtype=float), 0.0)
+    chosen = layers[np.maximum(order, 0)]
+    transmission = np.ones(order.shape[:-1])
+    gamma = np.full(order.shape[:-1], float(gamma_ratio))
+    for i in range(order.shape[-1]):
+        transmission, gamma = add_layer(transmission, gamma, chosen[..., i], thickness[..., i])
+    mass = np.sum(chosen['density'] * thickness, axis=-1)
+    return (mass, flux * transmission * neutron_dose_coeff * _per_hour,
+            flux * gamma * gamma_dose_coeff * _per_hour)
+
+
+def optimize(neutron_limit, gamma_limit, flux=10**9 / (4 * np.pi), layers=None, thickness=default_thickness,
+             max_layers=3, gamma_ratio=0.0, chunk_size=2**20):
+    '''
+    Lightest stack of at most max_layers layers, each from layers (default_layers() by default) with a thickness from
+    the grid, whose neutron and gamma doses [uSv/h] behind it are within the limits. Neighbouring layers differ.
+
+    Returns the stack as an array of stack_dtype from the outside in, and a dict with its areal_mass, neutron_dose and
+    gamma_dose, the number of stacks evaluated and the number there are; the stack is None if no stack meets the
+    limits.
+    '''
+
+    layers = default_layers() if layers is None else np.asarray(layers, dtype=layer_dtype)
+    thickness = np.unique(np.asarray(thickness, dtype=float))
+    n_layers, n_thick = len(layers), len(thickness)
+
+    # The limits as transmission and gamma current per unit incident neutron flux.
+    max_transmission = neutron_limit / (flux * neutron_dose_coeff * _per_hour)
+    max_gamma = gamma_limit / (flux * gamma_dose_coeff * _per_hour)
+
+    # For the bounds: the least mass of any material mix that reaches given optical depths, and the most a single
+    # layer can reach. More layers never lower the gamma current of the stack by more than their own attenuation.
+    corners = _dual_vertices(layers['sigma_n'] / layers['density'], layers['mu'] / layers['density'])
+    per_layer_n = np.max(layers['sigma_n']) * thickness[-1]
+    per_layer_g = np.max(layers['mu']) * thickness[-1]
+
+    def bound(m, T, G, remaining):
+        '''
+        Least mass of any stack completing the partial stacks, inf where the remaining layers can't meet the limits.
+        '''
+
+        with np.errstate(divide='ignore'):
+            need_n = np.maximum(np.log(T / max_transmission), 0)
+            need_g = np.maximum(np.log(G / max_gamma), 0)
+        with np.errstate(invalid='ignore'):
+            least = np.max(np.nan_to_num(corners[:, :1] * need_n + corners[:, 1:] * need_g, nan=0.0), axis=0)
+        reachable = (need_n <= remaining * per_layer_n) & (need_g <= remaining * per_layer_g)
+        return np.where(reachable, m + least, np.inf)
+
+    # Every (material, thickness) choice for one layer.
+    choice_layer = np.repeat(np.arange(n_layers), n_thick)
+    choice_thick = np.tile(np.arange(n_thick), n_layers)
+    choice_mass = layers['density'][choice_layer] * thickness[choice_thick]
+    per_chunk = max(chunk_size // choice_layer.size, 1)
+
+    # Depth first over chunks of partial stacks of equal depth: mass, transmission, gamma and the choices so far.
+    # Going deep first finds a stack meeting the limits early, and its mass prunes everything after it.
+    pending = [(np.zeros(1), np.ones(1), np.full(1, float(gamma_ratio)), np.zeros((1, 0), dtype=np.intp))]
+    best_mass, best = np.inf, None
+    evaluated = 0
+    while pending:
+        mass, transmission, gamma, history = pending.pop()
+        level = history.shape[1]
+        if level:
+            keep = bound(mass, transmission, gamma, max_layers - level) < best_mass
+            mass, transmission, gamma, history = mass[keep], transmission[keep], gamma[keep], history[keep]
+        if len(mass) > per_chunk:
+            pending.append((mass[per_chunk:], transmission[per_chunk:], gamma[per_chunk:], history[per_chunk:]))
+            mass, transmission, gamma, history = (mass[:per_chunk], transmission[:per_chunk], gamma[:per_chunk],
+                                                  history[:per_chunk])
+        if not len(mass):
+            continue
+
+        parent = np.repeat(np.arange(len(mass)), choice_layer.size)
+        choice = np.tile(np.arange(choice_layer.size), len(mass))
+        # Neighbouring layers of the same material are one thicker layer.
+        if level:
+            same = choice_layer[choice] == choice_layer[history[parent, -1]]
+            parent, choice = parent[~same], choice[~same]
+        evaluated += parent.size
+
+        m = mass[parent] + choice_mass[choice]
+        T, G = add_layer(transmission[parent], gamma[parent], layers[choice_layer[choice]],
+                         thickness[choice_thick[choice]])
+
+        feasible = (T <= max_transmission) & (G <= max_gamma)
+        if np.any(feasible & (m < best_mass)):
+            i = np.flatnonzero(feasible)[np.argmin(np.where(feasible, m, np.inf)[feasible])]
+            best_mass = m[i]
+            best = (np.append(history[parent[i]], choice[i]), m[i], T[i], G[i])
+
+        # Stacks meeting the limits only get heavier with more layers, the rest go on if they still can win;
+        # the most promising are pushed last so they are taken up first.
+        if level + 1 < max_layers:
+            b = np.where(feasible, np.inf, bound(m, T, G, max_layers - level - 1))
+            keep = np.flatnonzero(b < best_mass)
+            keep = keep[np.argsort(-b[keep], kind='stable')]
+            pending.append((m[keep], T[keep], G[keep], np.concatenate([history[parent[keep]], choice[keep, None]],
+                                                                      axis=1)))
+
+    total = sum(int(n_layers * n_thick * ((n_layers - 1) * n_thick) ** k) for k in range(max_layers))
+    summary = {'evaluated': evaluated, 'stacks': total}
+    if best is None:
+        summary.update(areal_mass=np.nan, neutron_dose=np.nan, gamma_dose=np.nan)
+        return None, summary
+
+    choices, m, T, G = best
+    stack = np.empty(len(choices), dtype=stack_dtype)
+    stack['layer'] = layers['name'][choice_layer[choices]]
+    stack['thickness'] = thickness[choice_thick[choices]]
+    summary.update(areal_mass=m, neutron_dose=flux * T * neutron_dose_coeff * _per_hour,
+                   gamma_dose=flux * G * gamma_dose_coeff * _per_hour)
+    return stack, summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Lightest laminate meeting neutron and secondary gamma dose limits.')
+    parser.add_argument('neutron_limit', type=float, help='[uSv/h], neutron dose behind the laminate')
+    parser.add_argument('gamma_limit', type=float, help='[uSv/h], gamma dose behind the laminate')
+    parser.add_argument('--intensity', type=float, default=10**9, help='[neutrons/s], source strength')
+    parser.add_argument('--distance', type=float, default=1.0, help='[cm], distance from the source')
+    parser.add_argument('--max-layers', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    flux = args.intensity / (4 * np.pi * args.distance**2)
+    stack, summary = optimize(args.neutron_limit, args.gamma_limit, flux=flux, max_layers=args.max_layers)
+    print('%d of %d stacks evaluated' % (summary['evaluated'], summary['stacks']))
+    if stack is None:
+        print('no stack of at most %d layers meets the limits' % args.max_layers)
+        return
+    for layer in stack:
+        print('%-40s %6.2f cm' % (layer['layer'], layer['thickness']))
+    print('areal mass %.4g g/cm^2, neutron dose %.4g uSv/h, gamma dose %.4g uSv/h' % (
+        summary['areal_mass'], summary['neutron_dose'], summary['gamma_dose']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+'''
+Energy-dependent gamma attenuation data for elements, compounds and mixtures.
+
+Elemental mass attenuation coefficients are read from a tabulated mu/rho vs. energy file (data/mass_attenuation.csv by
+default) and interpolated log-log, the way NIST recommends for its tables. A compound or mixture is resolved once into
+its own mu/rho table from its weight fractions and memoized, so every later lookup is a binary search into a sorted
+energy grid and works on whole arrays of energies at once. Energies are in MeV, all other units are CGS.
+'''
+
+import os
+
+import numpy as np
+
+from .gamma_attenuation import Material
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+DEFAULT_TABLE = os.path.join(DATA_DIR, 'mass_attenuation.csv')
+
+'''
+Definitions                         Units, Brief Descriptor. All units are in the CGS unit system.
+'''
+
+# Energy of the secondary gamma from the de-excitation of Li-7 after B-10(n,a)Li-7.
+li7_gamma_energy = 0.4776          # [MeV]
+
+# Compounds and mixtures of interest: density [g/cm^3] and weight fractions of the elements.
+# Densities obtained using WolframAlpha.com and item descriptions. Weight fractions derived from molar and atomic masses
+# by taking the atomic masses of each individual element, multiplying by the number of atoms of that element in a molecule
+# of that compound, and dividing by the molar mass of the compound.
+COMPOUNDS = {
+    'Iron': (7.874, {'Fe': 1.0}),
+    'Lead': (11.34, {'Pb': 1.0}),
+    'Boron': (2.46, {'B': 1.0}),
+    'Polyethylene': (0.95, {'H': 0.143716, 'C': 0.856284}),
+    'Ferric oxide': (5.26, {'Fe': 0.6994176, 'O': 0.3005711}),
+    'Ferrous oxide': (5.7, {'Fe': 0.7773092, 'O': 0.2226964}),
+    'Limestone': (2.93, {'Ca': 0.4004196, 'C': 0.119999, 'O': 0.4795504}),
+    # Stainless steel assumed as 89.5% iron, 10.5% chromium, and an insignificant amount of carbon ( <1% ).
+    'Stainless steel': (7.9, {'Fe': 0.895, 'Cr': 0.105}),
+    # Composite components of the garment material.
+    'Boric acid': (1.435, {'H': 0.048903, 'B': 0.174842, 'O': 0.776255}),
+    # Epoxy resin assumed to be bisphenol-A diglycidyl ether, C21H24O4.
+    'Epoxy resin': (1.1628, {'H': 0.071063, 'C': 0.740930, 'O': 0.188007}),
+    # Epoxy hardener assumed to be triethylenetetramine, C6H18N4.
+    'Epoxy hardener': (0.922, {'H': 0.124060, 'C': 0.492774, 'N': 0.383166}),
+}
+
+
+class AttenuationTable:
+    '''
+    Tabulated mass attenuation coefficients on a common energy grid.
+
+    energies        [MeV], increasing energy grid of the table
+    coefficients    dictionary of element symbol -> mu/rho [cm^2/g] on the energy grid
+    compounds       dictionary of name -> (density, {element: weight fraction}), COMPOUNDS by default
+    '''
+
+    def __init__(self, energies, coefficients, compounds=None):
+        energies = np.asarray(energies, dtype=float)
+        order = np.argsort(energies)
+
+        # The interpolation index: log energies and log coefficients, computed once.
+        self.energies = energies[order]
+        self.log_energy = np.log(self.energies)
+        self._log_mu = {element: np.log(np.asarray(mu, dtype=float)[order]) for element, mu in coefficients.items()}
+
+        self.elements = list(coefficients)
+        self.compounds = COMPOUNDS if compounds is None else compounds
+
+    def log_mu(self, name):
+        '''
+        Log of mu/rho on the energy grid for an element, a compound in the compound list, or a mixture given as a
+        dictionary of {element: weight fraction}. Compounds are resolved the first time they are asked for and the
+        result is memoized.
+        '''
+
+        if isinstance(name, dict):
+            return np.log(sum(w * np.exp(self.log_mu(element)) for element, w in name.items()))
+
+        if name not in self._log_mu:
+            if name not in self.compounds:
+                raise KeyError('no attenuation data for %r' % name)
+
+            # Mass attenuation coefficients of a mixture are the weight-fraction weighted sum of its components.
+            # Formula obtained from http://physics.nist.gov/PhysRefData/XrayMassCoef/chap2.html
+            self._log_mu[name] = self.log_mu(self.compounds[name][1])
+
+        return self._log_mu[name]
+
+    def _index(self, energy):
+        '''
+        Lower grid index and log-log interpolation weight for an array of energies.
+        '''
+
+        log_e = np.log(np.asarray(energy, dtype=float))
+        if np.any(log_e < self.log_energy[0] - 1e-12) or np.any(log_e > self.log_energy[-1] + 1e-12):
+            raise ValueError('energy outside of the table range %g-%g MeV' % (self.energies[0], self.energies[-1]))
+
+        i = np.clip(np.searchsorted(self.log_energy, log_e, side='right') - 1, 0, self.log_energy.size - 2)
+        w = (log_e - self.log_energy[i]) / (self.log_energy[i + 1] - self.log_energy[i])
+        return i, w
+
+    def mass_atten_coeff(self, name, energy):
+        '''
+        [cm^2/g], mass attenuation coefficient of an element, compound or mixture at an array of energies (MeV).
+        name may also be a list of names, in which case the result gets a leading axis over the names.
+        '''
+
+        i, w = self._index(energy)
+
+        if isinstance(name, (list, tuple)):
+            log_mu = np.stack([self.log_mu(n) for n in name])
+            return np.exp(log_mu[:, i] * (1 - w) + log_mu[:, i + 1] * w)
+
+        log_mu = self.log_mu(name)
+        return np.exp(log_mu[i] * (1 - w) + log_mu[i + 1] * w)
+
+    def linear_atten_coeff(self, name, energy, density=None):
+        '''
+        [1/cm], linear attenuation coefficient of a compound at an array of energies (MeV). The density is taken from
+        the compound list unless it is given.
+        '''
+
+        if density is None:
+            density = self.compounds[name][0]
+        return self.mass_atten_coeff(name, energy) * density
+
+    def material(self, name, energy=li7_gamma_energy, density=None):
+        '''
+        Material object for the gamma attenuation module at a single energy (MeV), 478 keV by default.
+        '''
+
+        if density is None:
+            density = self.compounds[name][0]
+        return Material(name, float(self.mass_atten_coeff(name, energy)), density)
+
+    def spectrum_transmission(self, name, thickness, energies, intensities, density=None):
+        '''
+        Fraction of the gamma intensity of a line spectrum (energies in MeV, relative intensities) transmitted through
+        a slab of the given thickness (cm) in narrow-beam geometry. thickness may be an array; the result has its shape.
+        '''
+
+        mu = self.linear_atten_coeff(name, energies, density)
+        intensities = np.asarray(intensities, dtype=float)
+        thickness = np.asarray(thickness, dtype=float)
+
+        transmitted = np.exp(-np.multiply.outer(thickness, mu)) @ intensities
+        return transmitted / intensities.sum()
+
+
+def load_table(path=DEFAULT_TABLE, compounds=None):
+    '''
+    Read a comma separated mu/rho table with an energy column in MeV followed by one column per element. Lines
+    starting with # are comments.
+    '''
+
+    with open(path) as f:
+        lines = [line for line in f if line.strip() and not line.startswith('#')]
+
+    header = [column.strip() for column in lines[0].split(',')]
+    data = np.loadtxt(lines[1:], delimiter=',', ndmin=2)
+    return AttenuationTable(data[:, 0], dict(zip(header[1:], data[:, 1:].T)), compounds)
+
+
+_default_table = None
+
+
+def default_table():
+    '''
+    The table shipped in the data directory, loaded on first use.
+    '''
+
+    global _default_table
+    if _default_table is None:
+        _default_table = load_table()
+    return _default_table
+
+
+def mass_atten_coeff(name, energy=li7_gamma_energy):
+    '''
+    [cm^2/g], mass attenuation coefficient of an element, compound or mixture from the default table.
+    '''
+
+    return default_table().mass_atten_coeff(name, energy)
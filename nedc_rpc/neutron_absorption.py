@@ -0,0 +1,75 @@
+'''
+Percentage of thermal neutrons absorbed by the boric acid / steel / epoxy composite for different thicknesses and
+compositions, for a narrow thermal beam and averaged over a thermal spectrum with an epithermal tail.
+'''
+
+import numpy as np
+
+from .neutron_attenuation import neut_atten_percent, spectrum_atten_percent, thermal_epithermal
+
+# Compositions of interest, mass fractions [boric acid, steel, epoxy resin, epoxy hardener], with their plot styles
+# and labels.
+compositions = np.array([[0.500, 0, 0.306, 0.194],
+                         [0.333, 0.333, 0.206, 0.128],
+                         [0.250, 0, 0.458, 0.292],
+                         [0.170, 0.330, 0.306, 0.194],
+                         [0.200, 0, 0.489, 0.311],
+                         [0.200, 0.300, 0.306, 0.194],
+                         [0.333, 0.167, 0.306, 0.194]])
+styles = [('g+', "50.0% B, 0% S, 30.6% R, and 19.4% H"),
+          ('r--', "33.3% B, 33.3% S, 20.6% R, and 12.8% H"),
+          ('c^', "25.0% B, 0% S, 45.8% R, and 29.2% H"),
+          ('bx', "17.0% B, 33.0% S, 30.6% R, and 19.4% H"),
+          ('m.', "20.0% B, 0% S, 48.9% R, 31.1% H"),
+          ('y', "20.0% B, 30.0% S, 30.6% R, 19.4% H"),
+          ('k*', "33.3% B, 16.7% S, 30.6% R, 19.4% H")]
+
+# Order the curves are drawn in, so the legend keeps the order of the original plot.
+plot_order = [0, 1, 6, 5, 2, 3, 4]
+
+default_thickness = np.arange(0, 1.4, 0.05)     # [cm]
+
+# Energy grid of the spectrum average: 4000 groups from 0.1 meV to 10 MeV.
+default_energy = np.logspace(-4, 7, 4000)       # [eV]
+
+
+def thermal(thickness=default_thickness, mass_fracs=compositions):
+    '''
+    Percentage of thermal neutrons attenuated, shape (compositions, thicknesses).
+    '''
+
+    return neut_atten_percent(thickness, *np.asarray(mass_fracs).T[:, :, np.newaxis])
+
+
+def spectrum_averaged(thickness=default_thickness, mass_fracs=compositions, energy=default_energy):
+    '''
+    Percentage attenuated averaged over a thermal spectrum with a 5% epithermal tail, using the 1/v B-10 cross section,
+    shape (compositions, thicknesses).
+    '''
+
+    return spectrum_atten_percent(thickness, np.asarray(mass_fracs), energy, thermal_epithermal(energy))
+
+
+def report():
+    i = np.searchsorted(default_thickness, 0.5 - 1e-9)
+    print('Percentage of thermal neutrons attenuated at 0.5 cm for each composition:', thermal()[:, i])
+    print('Percentage of spectrum-averaged neutrons attenuated at 0.5 cm for each composition:',
+          spectrum_averaged()[:, i])
+
+
+def plot(thickness=default_thickness, ax=None):
+    '''
+    Thermal neutron attenuation against thickness for every composition. pyplot is imported only when no axes are given.
+    '''
+
+    if ax is None:
+        import matplotlib.pyplot as plt
+        ax = plt.figure().gca()
+    curves = thermal(thickness)
+    for i in plot_order:
+        ax.plot(thickness, curves[i], styles[i][0], label=styles[i][1])
+    ax.set_title('Thermal Neutron Fluence Attenuation', fontsize=24)
+    ax.set_xlabel('Thickness of material [cm]', fontsize=24)
+    ax.set_ylabel('Neutron fluence attenuated [%]', fontsize=24)
+    ax.legend(loc=(0.25, 0), fontsize=18)
+    return ax
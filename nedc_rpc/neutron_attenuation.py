@@ -0,0 +1,149 @@
+'''
+Neutron attenuation in the boric acid / steel / epoxy composite.
+
+The composite is described by the mass fractions of its four components, in the order
+[boric acid, steel, epoxy resin, epoxy hardener]. Every function takes arrays of compositions with that last axis and
+arrays of thicknesses, so many compositions and thicknesses are evaluated at once. All units are in the CGS unit system,
+neutron energies are in eV.
+'''
+
+import numpy as np
+
+from .cross_sections import one_over_v, thermal_energy
+from .depletion import Na
+
+'''
+Definitions                         Units, Brief Descriptor. All units are in the CGS unit system.
+'''
+
+# Obtained using WolframAlpha.com, Wikipedia.org, item description (for steel and epoxy components)
+iso_frac = 0.198                    # [mass B-10/mass boron]=[no 'real' units], mass fraction of B-10 in natural boron
+
+boron_molar_mass = 10.811           # [mass boron/mol boron]=[g/mol]=[u], molar mass of natural boron
+B_10_molar_mass = 10.012936992      # [mass B-10/mol B-10]=[g/mol]=[u], molar mass of B-10
+boric_acid_molar_mass = 61.833      # [mass boric acid/mol boric acid]=[g/mol]=[u], molar mass of boric acid
+
+boric_acid_density = 1.435          # [mass boric acid/volume boric acid]=[g/cm^3], density of boric acid
+steel_density = 7.9                 # [mass steel/volume steel]=[g/cm^3], density of steel
+resin_density = 1.1628              # [mass epoxy resin/volume epoxy resin]=[g/cm^3], density of epoxy resin
+hardener_density = 0.922            # [mass epoxy hardener/volume epoxy hardener]=[g/cm^3], density of epoxy hardener
+
+component_densities = np.array([boric_acid_density, steel_density, resin_density, hardener_density])
+
+# Obtained using ENDF website: http://www.nndc.bnl.gov/exfor/endf00.jsp
+sigma = 3.8468e-21                  # [cm^2], cross-section for B-10 nonelastic neutron absorption at 0.0253 eV.
+
+# B-10 absorption follows 1/v from the thermal value, which is the default table for spectrum averaging.
+B_10_table = one_over_v(sigma, name='B-10 (n,absorption), 1/v')
+
+
+def composite_density(mass_fracs, densities=component_densities):
+    '''
+    [g/cm^3], density of the composite for an array of compositions (..., 4). The component densities (..., 4) may
+    vary too and broadcast against the compositions.
+    '''
+
+    return 1 / (np.asarray(mass_fracs, dtype=float) / np.asarray(densities, dtype=float)).sum(axis=-1)
+
+
+def B_10_number_density(mass_fracs, densities=component_densities):
+    '''
+    [# B-10 nuclei/cm^3], number density of B-10 nuclei for an array of compositions (..., 4).
+    '''
+
+    mass_fracs = np.asarray(mass_fracs, dtype=float)
+    return (Na * iso_frac * mass_fracs[..., 0] * composite_density(mass_fracs, densities)
+            * boron_molar_mass / B_10_molar_mass / boric_acid_molar_mass)
+
+
+def neut_atten_percent(x, boric_acid_frac, steel_frac, resin_frac, hardener_frac):
+    '''
+    Percentage of thermal neutrons attenuated by a thickness x (cm) of composite, assuming a narrow beam and that only
+    the B-10 nonelastic neutron absorption is a significant contributer to reduction of the neutron fluence.
+    All arguments may be arrays and are broadcast against each other.
+    '''
+
+    mass_fracs = np.stack(np.broadcast_arrays(boric_acid_frac, steel_frac, resin_frac, hardener_frac), axis=-1)
+    N = B_10_number_density(mass_fracs)
+    return -100 * np.expm1(-N * sigma * np.asarray(x, dtype=float))
+
+
+'''
+Spectrum averaging. A neutron spectrum is given on an energy grid and the attenuation of every energy group is weighted
+by the fraction of the neutrons in that group.
+'''
+
+def maxwellian(energy, kT=thermal_energy):
+    '''
+    Maxwell-Boltzmann flux spectrum per unit energy, E / kT^2 * exp(-E / kT), normalized to unit integral.
+    '''
+
+    energy = np.asarray(energy, dtype=float)
+    return energy / kT**2 * np.exp(-energy / kT)
+
+
+def thermal_epithermal(energy, epithermal_fraction=0.05, kT=thermal_energy, cutoff=5 * thermal_energy):
+    '''
+    Maxwellian thermal peak joined to a 1/E epithermal tail, the usual shape of a moderated spectrum such as the
+    thermalized HFNG beam. epithermal_fraction is the fraction of the flux in the tail. The tail is switched on smoothly
+    above cutoff (eV) with the Westcott joining function and is normalized over the range 0.1 eV - 10 MeV.
+    '''
+
+    energy = np.asarray(energy, dtype=float)
+    joining = 1 / (1 + (cutoff / energy)**7)
+    tail = joining / energy / np.log(1e8)
+    return (1 - epithermal_fraction) * maxwellian(energy, kT) + epithermal_fraction * tail
+
+
+def quadrature_weights(energy, flux):
+    '''
+    Normalized trapezoid quadrature weights of a flux per unit energy tabulated on an energy grid, so that the spectrum
+    average of any f is (f * weights).sum(axis=-1).
+    '''
+
+    energy = np.asarray(energy, dtype=float)
+    widths = np.zeros_like(energy)
+    widths[:-1] += 0.5 * np.diff(energy)
+    widths[1:] += 0.5 * np.diff(energy)
+
+    weights = widths * np.asarray(flux, dtype=float)
+    return weights / weights.sum(axis=-1, keepdims=True)
+
+
+def spectrum_transmission(macro_sigma, x, weights, max_bytes=2**26):
+    '''
+    Spectrum-weighted fraction of neutrons transmitted through thicknesses x (cm).
+
+    macro_sigma has shape (..., groups) and holds the macroscopic cross section (1/cm) of every energy group, weights
+    has shape (groups,). Returns an array of shape macro_sigma.shape[:-1] + x.shape. The groups are integrated with a
+    matrix product, in chunks of at most max_bytes of intermediate exponentials.
+    '''
+
+    macro_sigma = np.asarray(macro_sigma, dtype=float)
+    x = np.asarray(x, dtype=float)
+    weights = np.asarray(weights, dtype=float)
+
+    lead = macro_sigma.shape[:-1]
+    groups = macro_sigma.shape[-1]
+    flat_sigma = macro_sigma.reshape(-1, groups)
+    flat_x = x.ravel()
+
+    out = np.empty((flat_sigma.shape[0], flat_x.size))
+    rows = max(1, max_bytes // (8 * groups * max(flat_x.size, 1)))
+    for start in range(0, flat_sigma.shape[0], rows):
+        stop = start + rows
+        out[start:stop] = np.exp(-flat_sigma[start:stop, np.newaxis, :] * flat_x[:, np.newaxis]) @ weights
+
+    return out.reshape(lead + x.shape)
+
+
+def spectrum_atten_percent(x, mass_fracs, energy, flux, table=B_10_table):
+    '''
+    Spectrum-averaged percentage of neutrons attenuated by thicknesses x (cm) of composite for an array of
+    compositions (..., 4), with the B-10 cross section taken from a CrossSectionTable at every energy of the spectrum.
+    Returns an array of shape mass_fracs.shape[:-1] + x.shape.
+    '''
+
+    N = B_10_number_density(mass_fracs)
+    macro_sigma = np.multiply.outer(N, table(energy))
+    return 100 * (1 - spectrum_transmission(macro_sigma, x, quadrature_weights(energy, flux)))
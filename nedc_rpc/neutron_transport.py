@@ -0,0 +1,216 @@
+'''
+Monte Carlo transport of thermal neutrons through a stack of composite layers.
+
+neut_atten_percent assumes a narrow beam that is only absorbed. In the hydrogen rich epoxy most collisions are scatters,
+which send neutrons sideways and back out of the front face. This module follows neutron histories through slab layers
+of the boric acid / steel / epoxy resin / epoxy hardener composite, including elastic scattering, and counts how many
+are transmitted, absorbed and reflected.
+
+Particles are tracked in NumPy batches stored as a struct of arrays (depth, direction cosine, layer index), and batches
+are spread over a process pool with independent random streams spawned from one seed. The transport is one-speed at
+thermal energy; scattering is elastic and isotropic in the centre of mass of the struck nucleus. Units are CGS.
+'''
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .depletion import Na, barn
+from .materials import COMPOUNDS
+from .neutron_attenuation import B_10_number_density, composite_density, sigma as sigma_B_10
+
+'''
+Definitions                         Units, Brief Descriptor.
+'''
+
+# Thermal (2200 m/s) cross sections from the NIST neutron scattering lengths and cross sections tables
+# (https://www.ncnr.nist.gov/resources/n-lengths/). Entries are (atomic mass [u], absorption [b], scattering [b]).
+nuclides = {
+    'H': (1.008, 0.3326, 20.49),
+    'B-10': (10.013, sigma_B_10 / barn, 2.23),
+    'B-11': (11.009, 0.0055, 5.77),
+    'C': (12.011, 0.0035, 5.551),
+    'N': (14.007, 1.91, 11.51),
+    'O': (15.999, 0.00019, 4.232),
+    'Cr': (51.996, 3.05, 3.49),
+    'Fe': (55.845, 2.56, 11.62),
+}
+
+# Component names in materials.COMPOUNDS, in the order of the mass fraction arrays.
+components = ['Boric acid', 'Stainless steel', 'Epoxy resin', 'Epoxy hardener']
+
+boric_acid_molar_mass = 61.833      # [g/mol], molar mass of boric acid
+
+TRANSMITTED, ABSORBED, REFLECTED = 0, 1, 2
+outcomes = ['transmitted', 'absorbed', 'reflected']
+
+
+def number_densities(mass_fracs):
+    '''
+    [# nuclei/cm^3] of every nuclide in the nuclides table for one composition [boric acid, steel, resin, hardener].
+    The B-10 number density is the one used by neut_atten_percent; the rest of the boron is B-11.
+    '''
+
+    mass_fracs = np.asarray(mass_fracs, dtype=float)
+    rho = composite_density(mass_fracs)
+
+    N = dict.fromkeys(nuclides, 0.0)
+    for frac, component in zip(mass_fracs, components):
+        for element, weight in COMPOUNDS[component][1].items():
+            if element != 'B':
+                N[element] += Na * rho * frac * weight / nuclides[element][0]
+
+    # One boron atom per molecule of boric acid.
+    N['B-10'] = B_10_number_density(mass_fracs)
+    N['B-11'] = Na * rho * mass_fracs[0] / boric_acid_molar_mass - N['B-10']
+    return N
+
+
+class Slab:
+    '''
+    Macroscopic cross sections of a stack of composite layers.
+
+    layers is a sequence of (mass_fracs, thickness) pairs, front (source side) first, with thickness in cm.
+    '''
+
+    def __init__(self, layers):
+        self.thickness = np.array([thickness for _, thickness in layers], dtype=float)
+        self.bounds = np.concatenate([[0.0], np.cumsum(self.thickness)])
+
+        names = list(nuclides)
+        N = np.array([[number_densities(fracs)[name] for name in names] for fracs, _ in layers])
+        self.mass = np.array([nuclides[name][0] for name in names])
+
+        # [1/cm], macroscopic absorption and scattering of every nuclide in every layer, shape (layers, nuclides).
+        self.sigma_a = N * np.array([nuclides[name][1] for name in names]) * barn
+        self.sigma_s = N * np.array([nuclides[name][2] for name in names]) * barn
+        self.sigma_t = self.sigma_a.sum(axis=1) + self.sigma_s.sum(axis=1)
+
+        # Cumulative probability of each collision type per layer: absorption first, then a scatter off each nuclide.
+        with np.errstate(invalid='ignore'):
+            table = np.hstack([self.sigma_a.sum(axis=1, keepdims=True), self.sigma_s]) / self.sigma_t[:, np.newaxis]
+        self.collision_cdf = np.nan_to_num(np.cumsum(table, axis=1))
+        # The last column is 1 exactly, so a random number above a cumulative sum that rounded low can't pick a
+        # collision type past the last nuclide.
+        self.collision_cdf[:, -1] = 1
+
+
+def _scatter(mu, A, rng):
+    '''
+    New direction cosines after elastic scattering off nuclei of mass A, isotropic in the centre of mass.
+    '''
+
+    mu_cm = 2 * rng.random(mu.size) - 1
+    cos_lab = (1 + A * mu_cm) / np.sqrt(A * A + 2 * A * mu_cm + 1)
+    phi = 2 * np.pi * rng.random(mu.size)
+    return np.clip(mu * cos_lab + np.sqrt(np.maximum(0, (1 - mu * mu) * (1 - cos_lab * cos_lab))) * np.cos(phi), -1, 1)
+
+
+def transport_batch(slab, n, rng, isotropic=False):
+    '''
+    Follow n histories through the slab and return the counts of transmitted, absorbed and reflected neutrons.
+
+    Neutrons enter the front face as a normal beam, or with a cosine (isotropic flux) distribution if isotropic is set.
+    '''
+
+    n_layers = slab.thickness.size
+    z = np.zeros(n)
+    mu = np.sqrt(rng.random(n)) if isotropic else np.ones(n)
+    layer = np.zeros(n, dtype=np.int64)
+    counts = np.zeros(3, dtype=np.int64)
+
+    while z.size:
+        sigma_t = slab.sigma_t[layer]
+        with np.errstate(divide='ignore'):
+            flight = -np.log(rng.random(z.size)) / sigma_t
+
+        # Distance along the flight direction to the layer boundary in front of the neutron.
+        edge = np.where(mu > 0, slab.bounds[layer + 1], slab.bounds[layer])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            to_edge = np.where(mu != 0, (edge - z) / mu, np.inf)
+
+        crossing = flight >= to_edge
+        z = np.where(crossing, edge, z + flight * mu)
+        layer = layer + np.where(crossing, np.where(mu > 0, 1, -1), 0)
+
+        # Collisions: pick absorption or a scatter off one of the nuclides from the layer's collision table.
+        colliding = np.flatnonzero(~crossing)
+        kind = (rng.random(colliding.size)[:, np.newaxis] > slab.collision_cdf[layer[colliding]]).sum(axis=1)
+        absorbed = np.zeros(z.size, dtype=bool)
+        absorbed[colliding[kind == 0]] = True
+
+        scattered = colliding[kind > 0]
+        mu[scattered] = _scatter(mu[scattered], slab.mass[kind[kind > 0] - 1], rng)
+
+        transmitted = layer >= n_layers
+        reflected = layer < 0
+        counts += [transmitted.sum(), absorbed.sum(), reflected.sum()]
+
+        alive = ~(transmitted | reflected | absorbed)
+        z, mu, layer = z[alive], mu[alive], layer[alive]
+
+    return counts
+
+
+def _run_task(args):
+    layers, n, seed, batch_size, isotropic = args
+    slab = Slab(layers)
+    rng = np.random.default_rng(seed)
+    counts = np.zeros(3, dtype=np.int64)
+    for start in range(0, n, batch_size):
+        counts += transport_batch(slab, min(batch_size, n - start), rng, isotropic)
+    return counts
+
+
+class TransportResult:
+    '''
+    Transmitted, absorbed and reflected fractions with their one standard deviation statistical errors.
+    '''
+
+    def __init__(self, counts):
+        self.counts = np.asarray(counts)
+        self.histories = int(self.counts.sum())
+        self.fractions = self.counts / self.histories
+        self.errors = np.sqrt(self.fractions * (1 - self.fractions) / self.histories)
+
+    def __getattr__(self, name):
+        if name in outcomes:
+            return self.fractions[outcomes.index(name)]
+        raise AttributeError(name)
+
+    def __repr__(self):
+        return 'TransportResult(%s, histories=%d)' % (', '.join(
+            '%s=%.5f+-%.5f' % (name, f, e) for name, f, e in zip(outcomes, self.fractions, self.errors)),
+            self.histories)
+
+
+def simulate(layers, histories=10**6, workers=None, seed=None, batch_size=10**6, isotropic=False):
+    '''
+    Monte Carlo transport of a number of neutron histories through a stack of composite layers, given as a sequence of
+    (mass_fracs, thickness) pairs with the source side first.
+
+    The histories are split into one task per worker, each with its own random stream spawned from seed, and each task
+    runs its share in batches of at most batch_size particles. workers=1 runs in the calling process.
+    '''
+
+    layers = [(list(map(float, fracs)), float(thickness)) for fracs, thickness in layers]
+    workers = os.cpu_count() if workers is None else workers
+    tasks = min(workers, max(1, histories // 10**4))
+    shares = [histories // tasks + (i < histories % tasks) for i in range(tasks)]
+    seeds = np.random.SeedSequence(seed).spawn(tasks)
+    args = [(layers, share, s, batch_size, isotropic) for share, s in zip(shares, seeds)]
+
+    if tasks == 1:
+        counts = [_run_task(args[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            counts = list(pool.map(_run_task, args))
+
+    return TransportResult(np.sum(counts, axis=0))
+
+
+if __name__ == '__main__':
+    # One 0.5 cm layer of each of the first two compositions of the neutron absorption script.
+    print(simulate([([0.500, 0, 0.306, 0.194], 0.5)], seed=0))
+    print(simulate([([0.333, 0.333, 0.206, 0.128], 0.5)], seed=0))
@@ -0,0 +1,202 @@
+'''
+Vectorized peak detection for gamma spectra.
+
+A peak is a local maximum of the spectrum, where a flat top counts as one maximum in the middle of the plateau. Every
+maximum gets a prominence (how far it stands above the higher of the two lowest points separating it from a higher
+part of the spectrum), a width at half prominence and a significance over the background, and peaks can be filtered
+on all three. The definitions follow scipy.signal.find_peaks.
+
+All the searches to the left and right of the candidates are done at once, by pointer jumping between the candidates
+and binary search over a sparse table of running minima, so there is no Python loop over channels.
+
+This does not meet the target of well under a millisecond for a 16k-channel spectrum. A 16384-channel Poisson spectrum
+with 5355 local maxima takes about 3.5 ms on a single core here, or 2.5 ms with a prominence cut. The cost is in the
+prominence and width searches of the noise maxima. A live acquisition loop should use streaming_peaks, which only
+searches the stretches of the spectrum that a batch of events changed.
+'''
+
+import numpy as np
+
+# Fields of the peak table returned by find_peaks.
+peak_dtype = np.dtype([('index', 'i8'),             # channel of the peak (middle of a flat top)
+                       ('height', 'f8'),            # counts in the peak channel, net of the background if given
+                       ('prominence', 'f8'),        # counts above the higher of the two bases
+                       ('width', 'f8'),             # [channels], full width at half prominence
+                       ('left', 'f8'),              # interpolated left edge of the width
+                       ('right', 'f8'),             # interpolated right edge of the width
+                       ('significance', 'f8')])     # net counts over the square root of the background
+
+
+def local_maxima(y):
+    '''
+    Channels of the local maxima of y. A run of equal values is a maximum if both neighbouring runs are lower; its
+    middle channel is reported. Maxima at the ends of the spectrum are not counted.
+    '''
+
+    y = np.asarray(y)
+    if y.size < 3:
+        return np.empty(0, dtype=np.int64)
+
+    # Compress the spectrum into runs of equal values.
+    starts = np.concatenate([[0], np.flatnonzero(y[1:] != y[:-1]) + 1])
+    ends = np.concatenate([starts[1:] - 1, [y.size - 1]])
+    values = y[starts]
+
+    is_max = np.zeros(starts.size, dtype=bool)
+    is_max[1:-1] = (values[1:-1] > values[:-2]) & (values[1:-1] > values[2:])
+    return (starts[is_max] + ends[is_max]) // 2
+
+
+def _sparse_table(y, reduce, fill):
+    '''
+    table[k, i] = reduce(y[i:i + 2**k]), padded with fill past the end of the spectrum.
+    '''
+
+    levels = max(1, y.size).bit_length()
+    table = np.empty((levels, y.size))
+    table[0] = y
+    for k in range(1, levels):
+        half = 1 << (k - 1)
+        reduce(table[k - 1, :y.size - half], table[k - 1, half:], out=table[k, :y.size - half])
+        table[k, y.size - half:] = fill
+    return table
+
+
+def _range_reduce(table, reduce, start, stop):
+    '''
+    reduce(y[start:stop]) for arrays of non-empty ranges, from a sparse table.
+    '''
+
+    k = np.log2(stop - start).astype(np.int64)
+    return reduce(table[k, start], table[k, stop - (1 << k)])
+
+
+def _extend(table, peaks, limit, keep, direction):
+    '''
+    Walk away from every peak for as long as the reduction of y over the walked channels satisfies keep(value, limit),
+    by galloping and then binary search over the sparse table. Returns the last channel reached (inclusive) in the
+    given direction (-1 or +1). Each peak costs O(log d) steps, where d is the distance it walks.
+    '''
+
+    n = table.shape[1]
+    pos = peaks.copy()
+
+    def jump(which, k):
+        step = 1 << k
+        p = pos[which]
+        if direction < 0:
+            ok = p >= step
+            value = table[k, np.maximum(p - step, 0)]
+        else:
+            ok = p + step < n
+            value = table[k, np.minimum(p + 1, n - 1)]
+        move = ok & keep(value, limit[which])
+        pos[which[move]] += direction * step
+        return move
+
+    # Gallop: double the step until it fails. level holds the first step size (as a power of two) that failed.
+    level = np.zeros(pos.size, dtype=np.int64)
+    active = np.arange(pos.size)
+    for k in range(table.shape[0]):
+        move = jump(active, k)
+        level[active[~move]] = k
+        active = active[move]
+        if not active.size:
+            break
+
+    # The distance left is below 2**level, so a binary search over the smaller steps finishes the walk.
+    order = np.argsort(level, kind='stable')
+    sorted_level = level[order]
+    for k in range(int(level.max(initial=0)) - 1, -1, -1):
+        jump(order[np.searchsorted(sorted_level, k, side='right'):], k)
+    return pos
+
+
+def _previous_higher(heights):
+    '''
+    For every entry of heights the index of the nearest earlier entry that is strictly higher, or -1.
+
+    Every entry starts out pointing at its left neighbour and keeps jumping to the pointer of the entry it points at
+    while that entry is not higher. All entries jump at once, and the pointers of the entries they jump over are valid
+    shortcuts because everything those skip is lower still.
+    '''
+
+    previous = np.arange(-1, heights.size - 1)
+    active = np.arange(heights.size)
+    while active.size:
+        j = previous[active]
+        active, j = active[j >= 0], j[j >= 0]
+        jump = heights[j] <= heights[active]
+        active = active[jump]
+        previous[active] = previous[j[jump]]
+    return previous
+
+
+def find_peaks(y, min_height=None, min_prominence=None, min_width=None, min_significance=None, background=None,
+               rel_height=0.5):
+    '''
+    Peaks of a 1-D spectrum as a structured array with the fields of peak_dtype, in channel order.
+
+    min_height, min_prominence, min_width (channels) and min_significance are lower limits a peak has to pass.
+    background is an optional background estimate with the shape of y (see background.py). It is subtracted before the
+    search, so heights are net counts, and the significance of a peak is its net height over sqrt(background). Without
+    it the background under a peak is taken to be its base level, height - prominence. The width is measured at
+    rel_height of the prominence below the peak.
+    '''
+
+    y = np.asarray(y, dtype=float)
+    if background is not None:
+        background = np.asarray(background, dtype=float)
+        y = y - background
+    peaks = local_maxima(y)
+    if min_height is not None:
+        peaks = peaks[y[peaks] >= min_height]
+
+    heights = y[peaks]
+    min_table = _sparse_table(y, np.minimum, np.inf)
+
+    # Prominence: the lowest point on each side before the spectrum rises above the peak height. Climbing from the
+    # first higher channel always ends on a higher local maximum (or the end of the spectrum) without dipping below
+    # the peak, so it is enough to search the other maxima for the nearest higher one.
+    before = _previous_higher(heights)
+    after = heights.size - 1 - _previous_higher(heights[::-1])[::-1]
+    left = np.where(before >= 0, peaks[np.maximum(before, 0)], 0)
+    right = np.where(after < heights.size, peaks[np.minimum(after, heights.size - 1)], y.size - 1)
+    left_min = _range_reduce(min_table, np.minimum, left, peaks + 1)
+    right_min = _range_reduce(min_table, np.minimum, peaks, right + 1)
+    prominences = heights - np.maximum(left_min, right_min)
+
+    if background is None:
+        significance = prominences / np.sqrt(np.maximum(heights - prominences, 1))
+    else:
+        significance = heights / np.sqrt(np.maximum(background[peaks], 1))
+
+    # Apply the cheap cuts before measuring widths, so only the survivors pay for it.
+    keep = np.ones(peaks.size, dtype=bool)
+    if min_prominence is not None:
+        keep &= prominences >= min_prominence
+    if min_significance is not None:
+        keep &= significance >= min_significance
+    peaks, heights, prominences, significance = peaks[keep], heights[keep], prominences[keep], significance[keep]
+
+    # Width: interpolated crossings of the reference height on both sides.
+    reference = heights - prominences * rel_height
+    left_in = _extend(min_table, peaks, reference, np.greater, -1)
+    right_in = _extend(min_table, peaks, reference, np.greater, 1)
+    i, j = np.maximum(left_in - 1, 0), np.minimum(right_in + 1, y.size - 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        left_ip = np.where(left_in > 0, i + np.nan_to_num((reference - y[i]) / (y[i + 1] - y[i])), 0.0)
+        right_ip = np.where(right_in < y.size - 1, j - np.nan_to_num((reference - y[j]) / (y[j - 1] - y[j])), y.size - 1.0)
+
+    result = np.empty(peaks.size, dtype=peak_dtype)
+    result['index'] = peaks
+    result['height'] = heights
+    result['prominence'] = prominences
+    result['left'] = left_ip
+    result['right'] = right_ip
+    result['width'] = right_ip - left_ip
+    result['significance'] = significance
+
+    if min_width is not None:
+        result = result[result['width'] >= min_width]
+    return result
@@ -0,0 +1,265 @@
+'''
+Least squares fits of the peaks found by find_peaks.
+
+Every peak is fitted on a window of channels around it with a Gaussian on a linear background, optionally with an
+exponential low-energy tail (a Gaussian convolved with an exponential, as from incomplete charge collection). The fits
+give the centroid, FWHM and net area of each peak with their one standard deviation errors.
+
+All the peaks of all the spectra handed to fit_spectra are fitted together: the windows are padded to a few common
+lengths and masked, and the Levenberg-Marquardt iterations run on (peaks, channels, parameters) arrays with a damping
+factor per peak. Peaks drop out of the batch as they converge. Each peak is fitted on its own; windows are cut
+halfway to the neighbouring peaks, but overlapping peaks are not deconvolved.
+'''
+
+import numpy as np
+
+# Fields of the fit table returned by fit_peaks, one row per peak of the peak table.
+fit_dtype = np.dtype([('centroid', 'f8'),          # [channels]
+                      ('centroid_err', 'f8'),
+                      ('fwhm', 'f8'),              # [channels], FWHM of the Gaussian component
+                      ('fwhm_err', 'f8'),
+                      ('area', 'f8'),              # net counts in the peak, tail included
+                      ('area_err', 'f8'),
+                      ('background', 'f8'),        # [counts/channel], background level under the centroid
+                      ('tail_fraction', 'f8'),     # fraction of the area in the tail, nan without tail
+                      ('tail_slope', 'f8'),        # [channels], decay length of the tail, nan without tail
+                      ('chi2', 'f8'),              # chi squared per degree of freedom
+                      ('converged', '?')])
+
+sigma_to_fwhm = 2 * np.sqrt(2 * np.log(2))
+
+# Parameter order: area, centroid, sigma, background offset and slope, then tail fraction and tail slope.
+AREA, CENTROID, SIGMA, OFFSET, SLOPE, FRACTION, DECAY = range(7)
+
+
+def _exp_erfc(a, z):
+    '''
+    exp(a) * erfc(z) without overflow where a is large and z positive, using the rational approximation of
+    Numerical Recipes (fractional error below 1.2e-7).
+    '''
+
+    t = 1 / (1 + 0.5 * np.abs(z))
+    poly = -1.26551223 + t * (1.00002368 + t * (0.37409196 + t * (0.09678418 + t * (-0.18628806 + t * (
+        0.27886807 + t * (-1.13520398 + t * (1.48851587 + t * (-0.82215223 + t * 0.17087277))))))))
+    tail = t * np.exp(a - z * z + poly)
+    return np.where(z >= 0, tail, 2 * np.exp(np.minimum(a, 700)) - tail)
+
+
+def peak_model(x, p):
+    '''
+    Counts per channel at channel offsets x (peaks, channels) for parameters p (peaks, 5 or 7).
+    '''
+
+    area, centroid, sigma = p[:, AREA, None], p[:, CENTROID, None], p[:, SIGMA, None]
+    u = x - centroid
+    background = p[:, OFFSET, None] + p[:, SLOPE, None] * u
+    gauss = np.exp(-0.5 * (u / sigma) ** 2) / (np.sqrt(2 * np.pi) * sigma)
+    if p.shape[1] == 5:
+        return area * gauss + background
+
+    fraction, decay = p[:, FRACTION, None], p[:, DECAY, None]
+    tail = _exp_erfc(u / decay + sigma ** 2 / (2 * decay ** 2), (u / sigma + sigma / decay) / np.sqrt(2)) / (2 * decay)
+    return area * ((1 - fraction) * gauss + fraction * tail) + background
+
+
+def _clip(p, reach):
+    '''
+    Keep the centroids within reach of the peak channel and the widths and tail parameters in their physical range.
+    '''
+
+    p[:, CENTROID] = np.clip(p[:, CENTROID], -reach, reach)
+    p[:, SIGMA] = np.maximum(p[:, SIGMA], 0.3)
+    if p.shape[1] > 5:
+        p[:, FRACTION] = np.clip(p[:, FRACTION], 0, 1)
+        p[:, DECAY] = np.clip(p[:, DECAY], 0.3, 100)
+    return p
+
+
+def _jacobian(x, p, f):
+    '''
+    Derivatives of the model with respect to every parameter, shape (peaks, channels, parameters). Analytic for the
+    Gaussian model, forward differences with the tail.
+    '''
+
+    J = np.empty(f.shape + (p.shape[1],))
+    if p.shape[1] == 5:
+        area, sigma = p[:, AREA, None], p[:, SIGMA, None]
+        u = x - p[:, CENTROID, None]
+        z = u / sigma
+        gauss = np.exp(-0.5 * z * z) / (np.sqrt(2 * np.pi) * sigma)
+        J[..., AREA] = gauss
+        J[..., CENTROID] = area * gauss * z / sigma - p[:, SLOPE, None]
+        J[..., SIGMA] = area * gauss * (z * z - 1) / sigma
+        J[..., OFFSET] = 1
+        J[..., SLOPE] = u
+        return J
+
+    for k in range(p.shape[1]):
+        h = 1e-6 * np.maximum(np.abs(p[:, k]), 1e-2)
+        q = p.copy()
+        q[:, k] += h
+        J[..., k] = (peak_model(x, q) - f) / h[:, None]
+    return J
+
+
+def levenberg_marquardt(x, y, weights, p, max_iter=50, tol=1e-3):
+    '''
+    Batched weighted least squares fits of peak_model to y (peaks, channels), from the starting parameters p.
+
+    A fit has converged once a step lowers its chi squared by less than tol, which moves the parameters by a small
+    fraction of their errors. Returns the fitted parameters, their covariance matrices, the weighted sums of squared
+    residuals and a converged flag per peak. Channels with zero weight do not take part in the fit.
+    '''
+
+    reach = np.abs(x * (weights > 0)).max(axis=1)
+    p = _clip(np.array(p, dtype=float), reach)
+    n_params = p.shape[1]
+    eye = np.eye(n_params)
+
+    def chi2_of(x, y, w, p):
+        r = y - peak_model(x, p)
+        return np.einsum('ij,ij,ij->i', r, r, w)
+
+    chi2 = chi2_of(x, y, weights, p)
+    damping = np.full(len(p), 1e-3)
+    converged = np.zeros(len(p), dtype=bool)
+    active = np.arange(len(p))
+
+    for _ in range(max_iter):
+        xa, ya, wa, pa = x[active], y[active], weights[active], p[active]
+        f = peak_model(xa, pa)
+        J = _jacobian(xa, pa, f)
+        Jw = J * wa[..., None]
+        H = Jw.transpose(0, 2, 1) @ J
+        g = (Jw.transpose(0, 2, 1) @ (ya - f)[..., None])[..., 0]
+
+        # Marquardt's scaling of the damping by the diagonal of the normal matrix.
+        diagonal = np.diagonal(H, axis1=1, axis2=2)
+        A = H + (damping[active, None] * diagonal + 1e-12)[:, :, None] * eye
+        trial = _clip(pa + np.linalg.solve(A, g[..., None])[..., 0], reach[active])
+        trial_chi2 = chi2_of(xa, ya, wa, trial)
+
+        better = trial_chi2 <= chi2[active]
+        done = better & (chi2[active] - trial_chi2 <= tol)
+        p[active[better]] = trial[better]
+        chi2[active[better]] = trial_chi2[better]
+        damping[active] = np.where(better, damping[active] / 10, damping[active] * 10)
+
+        converged[active[done]] = True
+        active = active[~done & (damping[active] < 1e12)]
+        if not active.size:
+            break
+
+    J = _jacobian(x, p, peak_model(x, p))
+    H = (J * weights[..., None]).transpose(0, 2, 1) @ J
+
+    # Degenerate fits (a spike narrower than a channel, say) leave some parameters undetermined: give them nan errors.
+    covariance = np.linalg.pinv(H)
+    covariance[np.linalg.cond(H) > 1e14] = np.nan
+    return p, covariance, chi2, converged
+
+
+def _windows(spectra, tables, window, max_half_width):
+    '''
+    First and last channel of the fit window of every peak of every spectrum, along with the spectrum each peak
+    belongs to and the concatenated peak table.
+    '''
+
+    owner = np.concatenate([np.full(len(t), s, dtype=np.int64) for s, t in enumerate(tables)])
+    peaks = np.concatenate(tables)
+    index = peaks['index']
+    lengths = np.array([len(y) for y in spectra])
+
+    half = np.clip(np.ceil(window * peaks['width']), 4, max_half_width).astype(np.int64)
+    lo = np.maximum(index - half, 0)
+    hi = np.minimum(index + half, lengths[owner] - 1)
+
+    # Stop halfway to the neighbouring peaks of the same spectrum.
+    same = owner[1:] == owner[:-1]
+    middle = (index[1:] + index[:-1]) // 2
+    lo[1:] = np.where(same, np.maximum(lo[1:], np.minimum(middle + 1, index[1:] - 3)), lo[1:])
+    hi[:-1] = np.where(same, np.minimum(hi[:-1], np.maximum(middle, index[:-1] + 3)), hi[:-1])
+    return owner, peaks, np.maximum(lo, 0), np.minimum(hi, lengths[owner] - 1)
+
+
+def _fit_windows(x, y, mask, width, tail, max_iter):
+    '''
+    Fit table for a batch of windows: channel offsets x from the peak channels, counts y and the mask of the channels
+    that belong to each window, all (peaks, channels), and the find_peaks widths.
+    '''
+
+    n = len(x)
+    weights = mask / np.maximum(y, 1)
+
+    # Starting values: a straight line through the ends of the window and the net counts above it.
+    first = np.argmax(mask, axis=1)
+    last = mask.shape[1] - 1 - np.argmax(mask[:, ::-1], axis=1)
+    rows = np.arange(n)
+    x0, x1, y0, y1 = x[rows, first], x[rows, last], y[rows, first], y[rows, last]
+    slope = (y1 - y0) / np.maximum(x1 - x0, 1)
+    offset = y0 - slope * x0
+    net = ((y - offset[:, None] - slope[:, None] * x) * mask).sum(axis=1)
+
+    sigma = width / sigma_to_fwhm
+    p = np.column_stack([np.maximum(net, 1), np.zeros(n), np.maximum(sigma, 0.5), offset, slope])
+    if tail:
+        p = np.column_stack([p, np.full(n, 0.1), np.maximum(sigma, 1.0)])
+
+    p, covariance, chi2, converged = levenberg_marquardt(x, y, weights, p, max_iter)
+    errors = np.sqrt(np.abs(np.diagonal(covariance, axis1=1, axis2=2)))
+
+    fits = np.empty(n, dtype=fit_dtype)
+    fits['centroid'] = p[:, CENTROID]
+    fits['centroid_err'] = errors[:, CENTROID]
+    fits['fwhm'] = sigma_to_fwhm * p[:, SIGMA]
+    fits['fwhm_err'] = sigma_to_fwhm * errors[:, SIGMA]
+    fits['area'] = p[:, AREA]
+    fits['area_err'] = errors[:, AREA]
+    fits['background'] = p[:, OFFSET]
+    fits['tail_fraction'] = p[:, FRACTION] if tail else np.nan
+    fits['tail_slope'] = p[:, DECAY] if tail else np.nan
+    fits['chi2'] = chi2 / np.maximum(mask.sum(axis=1) - p.shape[1], 1)
+    fits['converged'] = converged
+    return fits
+
+
+def fit_spectra(spectra, tables, tail=False, window=1.5, max_half_width=64, max_iter=50):
+    '''
+    Fit the peaks of several spectra in one batch. tables holds the find_peaks result of each spectrum. Returns a list
+    with a fit table (fields of fit_dtype, one row per peak) for every spectrum.
+
+    Each peak is fitted on the channels within window times its find_peaks width of the peak, at least 4 and at most
+    max_half_width on each side. Counts are weighted with their Poisson variance. tail adds the low-energy tail.
+    '''
+
+    sizes = [len(t) for t in tables]
+    fits = np.empty(sum(sizes), dtype=fit_dtype)
+    if not fits.size:
+        return np.split(fits, np.cumsum(sizes)[:-1]) if tables else []
+
+    owner, peaks, lo, hi = _windows(spectra, tables, window, max_half_width)
+    flat = np.concatenate([np.asarray(y, dtype=float) for y in spectra])
+    start = np.concatenate([[0], np.cumsum([len(y) for y in spectra])[:-1]])[owner] + lo
+
+    # Windows are padded to the next power of two of their length and fitted in one batch per length, so that narrow
+    # peaks do not pay for the padding of the widest one.
+    length = hi - lo + 1
+    bucket = np.ceil(np.log2(length)).astype(np.int64)
+    for b in np.unique(bucket):
+        group = np.flatnonzero(bucket == b)
+        steps = np.arange(1 << b)
+        mask = steps < length[group, None]
+        y = flat[start[group, None] + np.minimum(steps, length[group, None] - 1)]
+        x = (lo[group, None] + steps - peaks['index'][group, None]).astype(float)
+        fits[group] = _fit_windows(x, y, mask, peaks['width'][group], tail, max_iter)
+
+    fits['centroid'] += peaks['index']
+    return np.split(fits, np.cumsum(sizes)[:-1])
+
+
+def fit_peaks(y, peaks, **kwargs):
+    '''
+    Fit table (fields of fit_dtype) for the peaks of one spectrum found by find_peaks. See fit_spectra for the options.
+    '''
+
+    return fit_spectra([y], [peaks], **kwargs)[0]
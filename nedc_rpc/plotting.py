@@ -0,0 +1,193 @@
+'''
+Plotting of long series at screen resolution, and headless rendering of figures to files.
+
+A line plot cannot show more than a few points per pixel column, so series are reduced before they reach matplotlib.
+Two shape-preserving reductions are available, both bucketing the points by pixel column in the scale of the axes
+(in log space for log axes):
+
+    minmax      the lowest and the highest point of every bucket, so spikes and the envelope survive exactly
+    lttb        largest triangle three buckets, one point per bucket chosen to keep the visual shape
+
+Figures are rendered with matplotlib.figure.Figure and the Agg canvas, never through pyplot, so rendering needs no
+display, keeps no global figure state and can run in worker processes. matplotlib is imported only when a figure is
+made or plotted on; the reductions are NumPy only.
+'''
+
+import importlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Number of pixel columns to reduce to when the axes can't tell.
+default_pixels = 2000
+
+
+def _transform(values, scale):
+    '''
+    Values in the space of an axis scale, with the points a log axis can't show made nan.
+    '''
+
+    values = np.asarray(values, dtype=float)
+    if scale != 'log':
+        return values
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(values > 0, np.log10(values), np.nan)
+
+
+def _buckets(u, n):
+    '''
+    Pixel column of every point for n columns spanning the finite range of u, or -1 for points that can't be drawn.
+    '''
+
+    finite = np.isfinite(u)
+    bucket = np.full(u.shape, -1, dtype=np.intp)
+    if not finite.any():
+        return bucket
+    lo, hi = u[finite].min(), u[finite].max()
+    scale = n / (hi - lo) if hi > lo else 0.0
+    bucket[finite] = np.minimum(((u[finite] - lo) * scale).astype(np.intp), n - 1)
+    return bucket
+
+
+def minmax_indices(x, y, n=default_pixels, xscale='linear', yscale='linear'):
+    '''
+    Indices of the points to keep: the first, the last, and the minimum and maximum of y in every one of n pixel
+    columns of x, in increasing order. x must be sorted.
+    '''
+
+    u, v = _transform(x, xscale), _transform(y, yscale)
+    bucket = _buckets(u, n)
+    drawn = np.flatnonzero((bucket >= 0) & np.isfinite(v))
+    if drawn.size <= 2 * n + 2:
+        return drawn
+
+    # x is sorted, so every bucket is a contiguous run of the drawn points.
+    v, b = v[drawn], bucket[drawn]
+    starts = np.flatnonzero(np.r_[True, b[1:] != b[:-1]])
+    counts = np.diff(np.r_[starts, b.size])
+    keep = [drawn[[0, -1]]]
+    for extreme in (np.minimum, np.maximum):
+        hits = np.flatnonzero(v == np.repeat(extreme.reduceat(v, starts), counts))
+        keep.append(drawn[hits[np.r_[True, b[hits][1:] != b[hits][:-1]]]])
+    return np.unique(np.concatenate(keep))
+
+
+def lttb_indices(x, y, n=default_pixels, xscale='linear', yscale='linear'):
+    '''
+    Indices of the points kept by largest triangle three buckets, in increasing order: the first and the last point,
+    and in every other non-empty pixel column of x the point forming the largest triangle with the point kept in the
+    column before and the average of the column after. x must be sorted.
+    '''
+
+    u, v = _transform(x, xscale), _transform(y, yscale)
+    bucket = _buckets(u, n)
+    drawn = np.flatnonzero((bucket >= 0) & np.isfinite(v))
+    if drawn.size <= n + 2:
+        return drawn
+
+    u, v, b = u[drawn], v[drawn], bucket[drawn]
+    edges = np.flatnonzero(np.r_[True, b[1:] != b[:-1], True])
+    # The first and the last point get buckets of their own.
+    edges = np.unique(np.r_[0, 1, edges[1:-1], u.size - 1, u.size])
+    counts = np.diff(edges)
+    mean_u = np.add.reduceat(u, edges[:-1]) / counts
+    mean_v = np.add.reduceat(v, edges[:-1]) / counts
+
+    keep = np.empty(edges.size - 1, dtype=np.intp)
+    keep[0], keep[-1] = 0, u.size - 1
+    a = 0
+    for i in range(1, edges.size - 2):
+        lo, hi = edges[i], edges[i + 1]
+        cu, cv = mean_u[i + 1], mean_v[i + 1]
+        area = np.abs((u[a] - cu) * (v[lo:hi] - v[a]) - (u[a] - u[lo:hi]) * (cv - v[a]))
+        a = lo + np.argmax(area)
+        keep[i] = a
+    return drawn[keep]
+
+
+reductions = {'minmax': minmax_indices, 'lttb': lttb_indices}
+
+
+def downsample(x, y, n=default_pixels, method='minmax', xscale='linear', yscale='linear'):
+    '''
+    x and y reduced to n pixel columns with one of the reductions. Points a log axis can't show are dropped.
+    '''
+
+    x, y = np.asarray(x), np.asarray(y)
+    i = reductions[method](x, y, n, xscale, yscale)
+    return x[i], y[i]
+
+
+def _pixels(ax):
+    try:
+        return max(int(ax.get_window_extent().width), 1)
+    except Exception:
+        return default_pixels
+
+
+def plot(ax, x, y, *args, method='minmax', xscale=None, yscale=None, pixels=None, **kwargs):
+    '''
+    ax.plot(x, y, *args, **kwargs) with x and y reduced to the width of the axes in pixels first. The scales are set
+    on the axes before the reduction, so log axes are bucketed in log space.
+    '''
+
+    if xscale is not None:
+        ax.set_xscale(xscale)
+    if yscale is not None:
+        ax.set_yscale(yscale)
+    x, y = downsample(x, y, pixels or _pixels(ax), method, ax.get_xscale(), ax.get_yscale())
+    return ax.plot(x, y, *args, **kwargs)
+
+
+def figure(figsize=(8, 6), dpi=100, **kwargs):
+    '''
+    A figure on the Agg canvas, made without pyplot: no display is needed and pyplot never keeps it alive.
+    '''
+
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=figsize, dpi=dpi, **kwargs)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def render(plotter, path, figsize=(8, 6), dpi=100, **kwargs):
+    '''
+    Call plotter(ax=ax, **kwargs) on the axes of a new headless figure and save it to path; the format follows the
+    extension (.png, .svg, .pdf). plotter may also be given as 'module:function' with module relative to this
+    package, which is how jobs are passed to worker processes.
+    '''
+
+    if isinstance(plotter, str):
+        module, _, name = plotter.partition(':')
+        plotter = getattr(importlib.import_module('.' + module, __package__), name)
+
+    fig = figure(figsize, dpi)
+    plotter(ax=fig.add_subplot(), **kwargs)
+    fig.savefig(path)
+    return path
+
+
+def _render_job(job):
+    plotter, path, kwargs = job
+    return render(plotter, path, **kwargs)
+
+
+def render_all(jobs, workers=None):
+    '''
+    Render many figures in parallel. jobs is a list of (plotter, path) or (plotter, path, kwargs), with the plotters
+    given as 'module:function' strings or other picklable callables; workers=1 renders in the calling process.
+    Returns the paths written.
+    '''
+
+    jobs = [tuple(job) + ({},) * (3 - len(job)) for job in jobs]
+    for _, path, _ in jobs:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+    if workers == 1 or len(jobs) <= 1:
+        return [_render_job(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_render_job, jobs))
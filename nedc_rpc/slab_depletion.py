@@ -0,0 +1,173 @@
+'''
+Depletion of the B-10 through the depth of an absorbing slab, with self-shielding.
+
+The point models of depletion.py let every B-10 nucleus see the flux at the surface. In a slab the front layers shield
+the back: the thermal flux falls off as exp(-sigma N x) through the depth, the same narrow-beam physics as
+neut_atten_percent, and as the front burns out the depletion front moves inward. Here the slab is cut into cells of
+uniform B-10 density, the flux in every cell is the exact cell average of the attenuated beam, and
+
+    dN/dt = -sigma phi(z, t) N
+
+is integrated on the whole mesh at once with an exponential midpoint rule. The time step is controlled by step
+doubling: every step is also taken as two half steps, their difference estimates the error, and the step grows or
+shrinks to keep it at rtol, so a few hundred steps cover many decades of time.
+
+Every function broadcasts over leading dimensions: N_0 of shape (..., cells) with flux of shape (...) depletes many
+slabs in one call. The defaults are the natural boron sheet of boron_lifetime; for the composite pass
+N_0=B_10_number_density(mass_fracs) and sigma from neutron_attenuation. Units are CGS.
+'''
+
+import numpy as np
+
+from .depletion import ABSORBERS, point_source_flux
+
+boron = ABSORBERS['B']
+sigma_10 = boron.sigma[boron.key_index]                 # [cm^2], B-10 absorption cross-section of the point models
+default_flux = point_source_flux(10**9, 1)              # [neutrons/(cm^2 s)], 10^9 n/s source 1 cm away
+
+
+def cell_flux(N, dz, flux=default_flux, sigma=sigma_10):
+    '''
+    [neutrons/(cm^2 s)], average flux in every cell of a slab with B-10 densities N (..., cells) [# nuclei/cm^3] and
+    cell width dz [cm], for a flux at the front face. A cell of optical thickness s = sigma N dz that receives the flux
+    phi passes phi exp(-s) on and has an average flux of phi (1 - exp(-s)) / s.
+    '''
+
+    s = sigma * np.asarray(N, dtype=float) * dz
+    tau = np.cumsum(s, axis=-1) - s                     # optical depth of the front face of every cell
+    with np.errstate(invalid='ignore', divide='ignore'):
+        average = np.where(s > 1e-12, -np.expm1(-s) / s, 1 - s / 2)
+    return np.asarray(flux, dtype=float)[..., np.newaxis] * np.exp(-tau) * average
+
+
+def transmitted(N, dz, flux=default_flux, sigma=sigma_10):
+    '''
+    [neutrons/(cm^2 s)], flux leaving the back face of the slab.
+    '''
+
+    return np.asarray(flux, dtype=float) * np.exp(-sigma * dz * np.sum(N, axis=-1))
+
+
+def _step(N, rate, h, dz, flux, sigma):
+    '''
+    One exponential midpoint step of length h, given the capture rate sigma phi at the start of the step.
+    '''
+
+    half = N * np.exp(-rate * (h / 2))
+    return N * np.exp(-sigma * cell_flux(half, dz, flux, sigma) * h)
+
+
+def deplete_slab(N_0, thickness, times, flux=default_flux, sigma=sigma_10, cells=1000, rtol=1e-4, atol=1e-8,
+                 max_steps=10**5):
+    '''
+    [# nuclei/cm^3], B-10 density in every cell of a slab of the given thickness [cm] at the output times [s], shape
+    (..., len(times), cells).
+
+    N_0 is the initial density, either a number for a uniform slab of the given number of cells or a profile of shape
+    (..., cells) from the front face to the back. The error of every step is kept below rtol times the density of a
+    cell plus atol times the largest initial density.
+    '''
+
+    N_0 = np.asarray(N_0, dtype=float)
+    if N_0.ndim == 0:
+        N_0 = np.full(cells, float(N_0))
+    times = np.asarray(times, dtype=float)
+    if np.any(np.diff(times) < 0) or np.any(times < 0):
+        raise ValueError('times must be increasing and not negative')
+
+    flux = np.asarray(flux, dtype=float)
+    shape = np.broadcast_shapes(N_0.shape[:-1], flux.shape)
+    N = np.array(np.broadcast_to(N_0, shape + N_0.shape[-1:]))
+    flux = np.broadcast_to(flux, shape)
+    dz = thickness / N.shape[-1]
+    scale = atol * N.max()
+
+    out = np.empty(times.shape + N.shape)
+    t = 0.0
+    # Start with a step that burns at most 0.1% of the front cell.
+    h = 1e-3 / max(sigma * flux.max(), 1e-300)
+    steps = 0
+    for k, target in enumerate(times):
+        while t < target:
+            if steps >= max_steps:
+                raise RuntimeError('no convergence in %d steps at t = %g s' % (max_steps, t))
+            steps += 1
+
+            h = min(h, target - t)
+            rate = sigma * cell_flux(N, dz, flux, sigma)
+            big = _step(N, rate, h, dz, flux, sigma)
+            small = _step(N, rate, h / 2, dz, flux, sigma)
+            small = _step(small, sigma * cell_flux(small, dz, flux, sigma), h / 2, dz, flux, sigma)
+
+            error = np.max(np.abs(small - big) / (rtol * np.abs(small) + scale))
+            if error <= 1:
+                # Second order: the two half steps are 4 times more accurate, so extrapolate.
+                N = np.maximum(small + (small - big) / 3, 0)
+                t += h
+            h *= min(5.0, max(0.2, 0.9 * max(error, 1e-10) ** (-1 / 3)))
+        out[k] = N
+
+    return np.moveaxis(out, 0, -2)
+
+
+def front_depth(N, N_0, thickness, level=0.5):
+    '''
+    [cm], depth of the depletion front: where the B-10 density first reaches the given fraction of its initial value,
+    interpolated between cell centres. N is (..., cells), N_0 broadcasts against it; 0 before any cell is depleted to
+    the level and the thickness once all are.
+    '''
+
+    ratio = np.asarray(N, dtype=float) / np.asarray(N_0, dtype=float)
+    cells = ratio.shape[-1]
+    dz = thickness / cells
+    k = np.sum(ratio < level, axis=-1)                  # number of cells behind the front
+    inside = (k > 0) & (k < cells)
+    lo = np.take_along_axis(ratio, np.clip(k - 1, 0, cells - 1)[..., np.newaxis], axis=-1)[..., 0]
+    hi = np.take_along_axis(ratio, np.clip(k, 0, cells - 1)[..., np.newaxis], axis=-1)[..., 0]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        frac = np.where(inside, (level - lo) / (hi - lo), 0)
+    return np.where(k == 0, 0.0, np.where(k == cells, thickness, (k - 0.5 + frac) * dz))
+
+
+def inventory_fraction(N, N_0):
+    '''
+    Fraction of the B-10 of the slab that is left.
+    '''
+
+    return np.sum(N, axis=-1) / np.sum(np.broadcast_to(N_0, np.shape(N)), axis=-1)
+
+
+'''
+Closed forms for a uniform slab. With s = sigma phi_0 t the burnup and tau(z) = sigma N_0 z the initial optical depth,
+
+    N(z, t) = N_0 exp(tau) / (exp(tau) - 1 + exp(s))
+
+solves the coupled equations exactly. They are the reference the solver is checked against.
+'''
+
+def exact_uniform(z, t, N_0, flux=default_flux, sigma=sigma_10):
+    '''
+    [# nuclei/cm^3], B-10 density at depth z [cm] and time t [s] in a slab of uniform initial density N_0.
+    '''
+
+    tau = sigma * N_0 * np.asarray(z, dtype=float)
+    s = sigma * flux * np.asarray(t, dtype=float)
+    # N_0 / (1 + (exp(s) - 1) exp(-tau)), with the exponent taken as a whole so large s and tau don't overflow.
+    with np.errstate(divide='ignore', over='ignore'):
+        return N_0 / (1 + np.exp(s + np.log(-np.expm1(-s)) - tau))
+
+
+def uniform_lifetime(fraction, thickness, N_0, flux=default_flux, sigma=sigma_10):
+    '''
+    [s], time until the given fraction of the B-10 of a uniform slab is left, self-shielding included. The inventory
+    fraction is log(1 + (exp(T) - 1) exp(-s)) / T for a slab of optical thickness T, which inverts in closed form.
+    '''
+
+    T = sigma * N_0 * np.asarray(thickness, dtype=float)
+    fraction = np.asarray(fraction, dtype=float)
+    if np.any((fraction <= 0) | (fraction > 1)):
+        raise ValueError('fraction must be in the interval (0, 1]')
+    # s = log((exp(T) - 1) / (exp(f T) - 1)), rearranged so exp(T) never overflows.
+    s = T * (1 - fraction) + np.log(-np.expm1(-T)) - np.log(-np.expm1(-fraction * T))
+    return s / (sigma * flux)
+
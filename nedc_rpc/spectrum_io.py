@@ -0,0 +1,130 @@
+'''
+Readers for gamma spectrum files.
+
+Supported formats, chosen by file extension:
+
+    .csv, .txt      one count per line, or several columns of which the last one holds the counts
+    .mca            Amptek MCA text files, counts between the <<DATA>> and <<END>> tags
+    .spe            ORTEC Maestro ASCII spectra, counts following the $DATA: block header
+    .chn            ORTEC binary CHN spectra, 32 byte header followed by 32-bit counts
+    .npy            NumPy arrays
+
+Text spectra are parsed by np.loadtxt straight from the file, without first reading the file into a Python string; a
+memory map is only used to find where their counts start and stop. Binary spectra come back as read-only views of a
+memory map, so processes reading the same file share its pages through the operating system's cache.
+'''
+
+import mmap
+import os
+
+import numpy as np
+
+
+def _map(path):
+    '''
+    Read-only memory map of a whole file.
+    '''
+
+    with open(path, 'rb') as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _count_lines(m, start, stop):
+    '''
+    Number of line breaks between two offsets of a memory-mapped file.
+    '''
+
+    return int(np.count_nonzero(np.frombuffer(m, dtype=np.uint8, count=stop - start, offset=start) == ord('\n')))
+
+
+def read_csv(path):
+    '''
+    Counts from a comma or whitespace separated text file. Leading header lines that do not start with a number are
+    skipped; with several columns the last one is the counts.
+    '''
+
+    with _map(path) as m:
+
+        # Skip header lines until the first line that starts with a digit, sign or decimal point.
+        start, skip, line = 0, 0, b''
+        while start < len(m):
+            end = m.find(b'\n', start)
+            end = len(m) if end < 0 else end
+            line = m[start:end].strip()
+            if line and (line[:1].isdigit() or line[:1] in b'+-.'):
+                break
+            start, skip = end + 1, skip + 1
+        if start >= len(m):
+            return np.empty(0)
+
+    return np.loadtxt(path, delimiter=',' if b',' in line else None, skiprows=skip, usecols=-1, ndmin=1)
+
+
+def read_mca(path):
+    '''
+    Counts from an Amptek .mca file, one per line between the <<DATA>> and <<END>> lines.
+    '''
+
+    with _map(path) as m:
+        start = m.find(b'<<DATA>>')
+        stop = m.find(b'<<END>>', start)
+        if start < 0 or stop < 0:
+            raise ValueError('%s: no <<DATA>> section' % path)
+        skip = _count_lines(m, 0, start) + 1
+        rows = _count_lines(m, start, stop) - 1
+
+    return np.loadtxt(path, skiprows=skip, max_rows=rows, ndmin=1)
+
+
+def read_spe(path):
+    '''
+    Counts from an ORTEC Maestro .spe file. The line after $DATA: holds the first and last channel numbers, and the
+    counts follow one per line.
+    '''
+
+    with _map(path) as m:
+        start = m.find(b'$DATA:')
+        if start < 0:
+            raise ValueError('%s: no $DATA: section' % path)
+        header = m.find(b'\n', start) + 1
+        first, last = (int(v) for v in m[header:m.find(b'\n', header)].split()[:2])
+        skip = _count_lines(m, 0, header) + 1
+
+    return np.loadtxt(path, skiprows=skip, max_rows=last - first + 1, ndmin=1)
+
+
+def read_chn(path):
+    '''
+    Counts from an ORTEC binary .chn file, as a read-only view of the memory-mapped file.
+    '''
+
+    header = np.memmap(path, dtype='<i2', mode='r', shape=(16,))
+    if header[0] != -1:
+        raise ValueError('%s: not a CHN file' % path)
+    n_channels = int(np.uint16(header[15]))
+    return np.memmap(path, dtype='<u4', mode='r', offset=32, shape=(n_channels,))
+
+
+def read_npy(path):
+    return np.load(path, mmap_mode='r')
+
+
+readers = {
+    '.csv': read_csv,
+    '.txt': read_csv,
+    '.mca': read_mca,
+    '.spe': read_spe,
+    '.chn': read_chn,
+    '.npy': read_npy,
+}
+
+
+def read_spectrum(path):
+    '''
+    Counts per channel of a spectrum file, with the reader picked by the file extension.
+    '''
+
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in readers:
+        raise ValueError('%s: unknown spectrum format %r' % (path, ext))
+    return readers[ext](path)
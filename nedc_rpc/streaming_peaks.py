@@ -0,0 +1,141 @@
+'''
+Incremental peak detection for live MCA acquisition.
+
+StreamingPeakFinder keeps the running spectrum and its current peak table. Every batch of events (channel numbers)
+only touches a few stretches of the spectrum, so after adding the batch it runs find_peaks again on those stretches
+plus a halo of channels on each side, and compares the result with the peaks it had there before. The differences
+come out as appear / update / disappear events. The cost of a batch depends on the batch and the halo, not on the
+length of the spectrum or how long the count has been running.
+
+Prominences and widths of streamed peaks are measured within the re-examined window, so a peak sitting on the shoulder
+of a much larger one can come out more prominent than a full find_peaks over the whole spectrum would say.
+'''
+
+from collections import namedtuple
+
+import numpy as np
+
+from .peak_finder import find_peaks, peak_dtype
+
+# kind is 'appear', 'update' or 'disappear'; peak is a record with the fields of peak_dtype, the new one for appear
+# and update and the last known one for disappear.
+PeakEvent = namedtuple('PeakEvent', ['kind', 'peak'])
+
+
+class StreamingPeakFinder:
+    '''
+    Running spectrum of n_channels channels with an incrementally maintained peak table.
+
+    halo            [channels], context re-examined on each side of every touched channel
+    match_distance  [channels], how far a peak may move between updates and still count as the same peak
+    cuts            min_height, min_prominence, min_width, min_significance passed on to find_peaks
+    '''
+
+    def __init__(self, n_channels, halo=32, match_distance=2, **cuts):
+        self.counts = np.zeros(n_channels, dtype=np.int64)
+        self.peaks = np.empty(0, dtype=peak_dtype)
+        self.halo = halo
+        self.match_distance = match_distance
+        self.cuts = cuts
+
+    def _windows(self, touched):
+        '''
+        Merge the touched channels into disjoint [start, stop) stretches, each padded by the halo.
+        '''
+
+        touched = np.unique(touched)
+        breaks = np.flatnonzero(np.diff(touched) > 2 * self.halo)
+        first = touched[np.concatenate([[0], breaks + 1])]
+        last = touched[np.concatenate([breaks, [touched.size - 1]])]
+        return zip(first, last + 1)
+
+    def update(self, channels=None, counts=None):
+        '''
+        Add a batch of events and return the list of PeakEvents it caused.
+
+        channels is an array of the channel numbers of individual events. counts is an alternative (or additional)
+        array of (channel, number of counts) rows for histogrammed updates.
+        '''
+
+        touched = []
+        if channels is not None:
+            channels = np.asarray(channels, dtype=np.int64)
+            np.add.at(self.counts, channels, 1)
+            touched.append(channels)
+        if counts is not None:
+            counts = np.asarray(counts, dtype=np.int64).reshape(-1, 2)
+            np.add.at(self.counts, counts[:, 0], counts[:, 1])
+            touched.append(counts[:, 0])
+
+        touched = np.concatenate(touched) if touched else np.empty(0, dtype=np.int64)
+        if not touched.size:
+            return []
+
+        events = []
+        n = self.counts.size
+        for first, stop in self._windows(touched):
+
+            # Peaks within one halo of a change are redone; the second halo gives them their context.
+            core = (max(first - self.halo, 0), min(stop + self.halo, n))
+            window = (max(first - 2 * self.halo, 0), min(stop + 2 * self.halo, n))
+
+            found = find_peaks(self.counts[window[0]:window[1]], **self.cuts)
+            for field in ('index', 'left', 'right'):
+                found[field] += window[0]
+            found = found[(found['index'] >= core[0]) & (found['index'] < core[1])]
+
+            lo, hi = np.searchsorted(self.peaks['index'], core)
+            events.extend(self._diff(self.peaks[lo:hi], found))
+            self.peaks = np.concatenate([self.peaks[:lo], found, self.peaks[hi:]])
+
+        return events
+
+    def _diff(self, old, new):
+        '''
+        Events turning the peak list old into new, matching each new peak with the nearest old one within
+        match_distance channels.
+        '''
+
+        events = []
+        matched = np.zeros(old.size, dtype=bool)
+        if old.size:
+            i = np.clip(np.searchsorted(old['index'], new['index']), 1, max(old.size - 1, 1))
+            candidates = np.stack([i - 1, np.minimum(i, old.size - 1)])
+            distance = np.abs(old['index'][candidates] - new['index'])
+            nearest = candidates[np.argmin(distance, axis=0), np.arange(new.size)]
+            close = distance.min(axis=0, initial=np.iinfo(np.int64).max) <= self.match_distance
+        else:
+            nearest = np.zeros(new.size, dtype=np.int64)
+            close = np.zeros(new.size, dtype=bool)
+
+        for peak, j, is_close in zip(new, nearest, close):
+            if is_close and not matched[j]:
+                matched[j] = True
+                if peak.tobytes() != old[j].tobytes():
+                    events.append(PeakEvent('update', peak))
+            else:
+                events.append(PeakEvent('appear', peak))
+
+        events.extend(PeakEvent('disappear', peak) for peak in old[~matched])
+        return events
+
+
+def stream_peaks(batches, n_channels, **kwargs):
+    '''
+    Generator of PeakEvents for an iterable of event batches (arrays of channel numbers).
+    '''
+
+    finder = StreamingPeakFinder(n_channels, **kwargs)
+    for batch in batches:
+        yield from finder.update(batch)
+
+
+async def astream_peaks(batches, n_channels, **kwargs):
+    '''
+    Async iterator of PeakEvents for an async iterable of event batches, for acquisition loops running on asyncio.
+    '''
+
+    finder = StreamingPeakFinder(n_channels, **kwargs)
+    async for batch in batches:
+        for event in finder.update(batch):
+            yield event
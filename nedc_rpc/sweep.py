@@ -0,0 +1,300 @@
+'''
+Parameter sweeps over the models, run in parallel with an on-disk result cache.
+
+A sweep is a model name and a grid: a dict from parameter names to lists of values, whose cartesian product is the set
+of points to evaluate. Parameters left out keep the model's defaults. The models are vectorized, so the points are
+handed to a process pool as columns, chunk_size points per task.
+
+Every result is cached under cache_dir, in a directory named by a hash of the model name, its version and its parameter
+names, as .npz chunk files named by a hash of their contents. A point's key is the raw bytes of its float64 parameter
+values, so a point is found in the cache only if every parameter is bit-for-bit the same. Re-running an overlapping
+sweep computes only the points that are not cached yet; bumping a model's version starts a fresh cache for it. An
+index of the bounding box of every chunk lets a sweep read only the chunks that can hold its points.
+
+    sweep('gamma', {'I': np.logspace(8, 11, 31), 'r': [1, 2, 5, 10], 'thickness': np.linspace(0, 5, 51)})
+'''
+
+import argparse
+import glob
+import hashlib
+import itertools
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from . import gamma_attenuation
+from .depletion import ABSORBERS, capture_chain_matrix, point_source_flux, solve_depletion, time_to_fraction
+from .neutron_attenuation import neut_atten_percent
+
+DEFAULT_CACHE = os.path.join(os.path.expanduser('~'), '.cache', 'nedc_rpc', 'sweeps')
+
+
+'''
+Sweep models. Each takes its parameters as keyword arrays of equal length and returns a dict of output arrays of the
+same length. Change a model's version whenever its results change, so stale cache entries are not reused.
+'''
+
+def _gamma(I, r, rho, x, M, sigma, t, atten_coeff, density, thickness):
+    source = gamma_attenuation.GammaSource(I, r, rho, x, M, sigma)
+    return {'current_density': source.current_density(t),
+            'atten_percent': source.atten_percent(atten_coeff, density, thickness, t)}
+
+
+def _boron(I, r, sigma, fraction):
+    flux = point_source_flux(I, r)
+    return {'flux': flux, 'lifetime': time_to_fraction(fraction, flux, sigma)}
+
+
+def _cadmium(flux, t, sigma_112, sigma_113):
+    cadmium = ABSORBERS['Cd']
+    sigma = np.stack([sigma_112, sigma_113, np.full_like(sigma_112, cadmium.sigma[2])], axis=-1)
+    A = capture_chain_matrix(sigma, flux)
+    inventory = solve_depletion(A * t[:, None, None], cadmium.number_densities, [1.0])[:, 0]
+    return {'cd_112': inventory[:, 0], 'cd_113': inventory[:, 1], 'cd_114': inventory[:, 2]}
+
+
+def _neutron(boric_acid, steel, resin, hardener, x):
+    return {'atten_percent': neut_atten_percent(x, boric_acid, steel, resin, hardener)}
+
+
+_gs = gamma_attenuation
+_cd = ABSORBERS['Cd']
+
+# name: (function, version, default parameter values)
+MODELS = {
+    'gamma': (_gamma, 1, {'I': _gs.I, 'r': _gs.r, 'rho': _gs.rho, 'x': _gs.x, 'M': _gs.M, 'sigma': _gs.sigma,
+                          't': 0.0, 'atten_coeff': 0.1, 'density': 1.0, 'thickness': 0.5}),
+    'boron': (_boron, 1, {'I': 1e9, 'r': 1.0, 'sigma': ABSORBERS['B'].sigma[0], 'fraction': 0.1}),
+    'cadmium': (_cadmium, 1, {'flux': 1e9, 't': 1e8, 'sigma_112': _cd.sigma[0], 'sigma_113': _cd.sigma[1]}),
+    'neutron': (_neutron, 1, {'boric_acid': 0.333, 'steel': 0.333, 'resin': 0.206, 'hardener': 0.128, 'x': 0.5}),
+}
+
+
+def grid_points(model, grid):
+    '''
+    The cartesian product of a grid as a float64 array (points, parameters), with the parameter names in the model's
+    order. Parameters missing from the grid take the model's default.
+    '''
+
+    _, _, defaults = MODELS[model]
+    unknown = set(grid) - set(defaults)
+    if unknown:
+        raise ValueError('%s has no parameters %s' % (model, ', '.join(sorted(unknown))))
+
+    axes = [np.atleast_1d(np.asarray(grid.get(name, value), dtype=float)).ravel() for name, value in defaults.items()]
+    mesh = np.meshgrid(*axes, indexing='ij')
+    return np.stack([m.ravel() for m in mesh], axis=-1)
+
+
+def _keys(points):
+    '''
+    Cache keys of points: the bytes of each row of float64 values, with -0.0 made 0.0.
+    '''
+
+    points = np.ascontiguousarray(points + 0.0)
+    return points.view(np.dtype((np.void, points.shape[1] * 8))).ravel()
+
+
+def cache_directory(model, cache_dir=DEFAULT_CACHE):
+    _, version, defaults = MODELS[model]
+    tag = hashlib.sha1(repr((model, version, list(defaults))).encode()).hexdigest()[:16]
+    return os.path.join(cache_dir, '%s-%s' % (model, tag))
+
+
+def _index(directory):
+    '''
+    The chunk files of a cache directory with the bounding box of their points, from its index: one line per chunk,
+    the file name and the lowest and highest value of every parameter. Lines are appended whole, so a line that can't
+    be read is from a writer still at work and is skipped.
+    '''
+
+    boxes = {}
+    try:
+        with open(os.path.join(directory, 'index.txt')) as f:
+            for line in f:
+                name, *values = line.split()
+                try:
+                    values = np.array(values, dtype=float)
+                except ValueError:
+                    continue
+                if line.endswith('\n') and values.size % 2 == 0:
+                    boxes[name] = values.reshape(2, -1)
+    except FileNotFoundError:
+        pass
+    return boxes
+
+
+def _load_cache(directory, points):
+    '''
+    Cached keys and output columns of a model, concatenated over the chunk files that may hold some of the points:
+    the ones whose bounding box overlaps that of the points, and any the index doesn't know of.
+    '''
+
+    boxes = _index(directory)
+    lo, hi = points.min(axis=0), points.max(axis=0)
+    keys, outputs = [], {}
+    for path in sorted(glob.glob(os.path.join(directory, '*.npz'))):
+        box = boxes.get(os.path.basename(path))
+        if box is not None and (box.shape[1] != lo.size or np.any(box[0] > hi) or np.any(box[1] < lo)):
+            continue
+        with np.load(path) as data:
+            keys.append(data['keys'])
+            for name in data.files:
+                if name != 'keys':
+                    outputs.setdefault(name, []).append(data[name])
+    if not keys:
+        return None, {}
+    return np.concatenate(keys), {name: np.concatenate(columns) for name, columns in outputs.items()}
+
+
+def _save_chunk(directory, points, outputs):
+    '''
+    Write one chunk of results, named by the hash of its keys, and add it to the index. Written to a temporary file
+    the *.npz globs don't match and renamed, so readers never see a partial chunk.
+    '''
+
+    os.makedirs(directory, exist_ok=True)
+    keys = _keys(points)
+    name = hashlib.sha1(keys.tobytes()).hexdigest()[:20] + '.npz'
+    path = os.path.join(directory, name)
+    tmp = path + '.%d.tmp' % os.getpid()
+    with open(tmp, 'wb') as f:
+        np.savez(f, keys=keys, **outputs)
+    os.replace(tmp, path)
+
+    # One write per line in append mode, so lines of concurrent writers don't interleave.
+    line = ' '.join([name] + [repr(float(v)) for v in np.r_[points.min(axis=0), points.max(axis=0)]]) + '\n'
+    with open(os.path.join(directory, 'index.txt'), 'a') as f:
+        f.write(line)
+
+
+def _run_chunk(args):
+    model, points = args
+    function, _, defaults = MODELS[model]
+    outputs = function(**dict(zip(defaults, points.T)))
+    return {name: np.broadcast_to(np.asarray(value, dtype=float), (len(points),)) for name, value in outputs.items()}
+
+
+def sweep(model, grid, cache_dir=DEFAULT_CACHE, workers=None, chunk_size=10**5, use_cache=True):
+    '''
+    Evaluate a model on every point of a parameter grid and return a structured array with a field for every
+    parameter and every output, one row per point in grid order.
+
+    Points already in the cache are read from it; the rest are computed in chunks of chunk_size points on a process
+    pool of workers processes (workers=1 runs in the calling process) and added to the cache.
+    '''
+
+    _, _, defaults = MODELS[model]
+    points = grid_points(model, grid)
+    keys = _keys(points)
+    directory = cache_directory(model, cache_dir)
+
+    cached_keys, cached = _load_cache(directory, points) if use_cache else (None, {})
+    found = np.zeros(len(points), dtype=bool)
+    if cached_keys is not None:
+        order = np.argsort(cached_keys)
+        at = np.searchsorted(cached_keys, keys, sorter=order).clip(max=len(cached_keys) - 1)
+        found = cached_keys[order[at]] == keys
+        rows = order[at]
+
+    # Compute the missing points. Duplicates in the grid are computed once.
+    missing_keys, first = np.unique(keys[~found], return_index=True)
+    missing = points[~found][first]
+    tasks = [(model, missing[start:start + chunk_size]) for start in range(0, len(missing), chunk_size)]
+    if workers == 1 or len(tasks) <= 1:
+        results = map(_run_chunk, tasks)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        results = pool.map(_run_chunk, tasks)
+
+    computed = {}
+    try:
+        for (_, chunk), outputs in zip(tasks, results):
+            if use_cache:
+                _save_chunk(directory, chunk, outputs)
+            for name, column in outputs.items():
+                computed.setdefault(name, []).append(column)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    computed = {name: np.concatenate(columns) for name, columns in computed.items()}
+
+    names = list(computed or cached)
+    result = np.empty(len(points), dtype=[(name, 'f8') for name in itertools.chain(defaults, names)])
+    for i, name in enumerate(defaults):
+        result[name] = points[:, i]
+    for name in names:
+        if found.any():
+            result[name][found] = cached[name][rows[found]]
+        if (~found).any():
+            result[name][~found] = computed[name][np.searchsorted(missing_keys, keys[~found])]
+    return result
+
+
+def clear_cache(model=None, cache_dir=DEFAULT_CACHE):
+    '''
+    Delete the cached results of one model (all versions), or of every model, including temporary chunks left behind
+    by an interrupted sweep.
+    '''
+
+    for directory in glob.glob(os.path.join(cache_dir, '%s-*' % (model or '*'))):
+        shutil.rmtree(directory)
+
+
+def _values(text):
+    '''
+    Values of a command line parameter: a comma separated list, or start:stop:num for a linear and
+    log:start:stop:num for a logarithmic range, with start and stop given as the values (not their logarithms).
+    '''
+
+    parts = text.split(':')
+    if parts[0] == 'log' and len(parts) == 4:
+        start, stop, num = parts[1:]
+        return np.geomspace(float(start), float(stop), int(num))
+    if len(parts) == 3:
+        start, stop, num = parts
+        return np.linspace(float(start), float(stop), int(num))
+    return [float(value) for value in text.split(',')]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Parameter sweep of a model, with cached results.')
+    parser.add_argument('model', choices=sorted(MODELS))
+    parser.add_argument('params', nargs='*', metavar='NAME=VALUES',
+                        help='e.g. I=1e8,1e9 thickness=0:5:51 r=log:1:100:21; the rest keep their defaults')
+    parser.add_argument('--output', help='.npz file to write the result columns to')
+    parser.add_argument('--workers', type=int, default=None, help='number of worker processes')
+    parser.add_argument('--chunk-size', type=int, default=10**5)
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE)
+    parser.add_argument('--no-cache', action='store_true', help='neither read nor write the cache')
+    parser.add_argument('--clear', action='store_true', help='clear the cache of the model and exit')
+    args = parser.parse_args(argv)
+
+    if args.clear:
+        clear_cache(args.model, args.cache_dir)
+        return
+    grid = {}
+    for param in args.params:
+        name, sep, text = param.partition('=')
+        if not sep:
+            parser.error('parameters are given as NAME=VALUES, not %r' % param)
+        grid[name] = _values(text)
+
+    try:
+        result = sweep(args.model, grid, args.cache_dir, args.workers, args.chunk_size, not args.no_cache)
+    except ValueError as error:
+        parser.error(str(error))
+    if args.output:
+        np.savez(args.output, **{name: result[name] for name in result.dtype.names})
+        print('%d points written to %s' % (result.size, args.output))
+    else:
+        print(' '.join('%12s' % name for name in result.dtype.names))
+        for row in result:
+            print(' '.join('%12.5g' % value for value in row))
+
+
+if __name__ == '__main__':
+    main()
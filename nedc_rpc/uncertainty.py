@@ -0,0 +1,418 @@
+'''
+Monte Carlo propagation of the uncertainties of the model inputs.
+
+The cross-sections, densities and attenuation coefficients of the models are single constants. Here every uncertain
+input gets a relative standard uncertainty, the inputs may be correlated, and the boron, cadmium, gamma and neutron
+models are run on n samples of all of them at once. A sample is a vector of factors multiplying the nominal constants
+of the models: lognormal with mean 1, so positive constants stay positive, and drawn through the Cholesky factor of the
+correlation matrix of their logarithms. Every model sees the same draws, so the factor of the B-10 cross-section, say,
+moves the boron lifetime, the gamma source and the neutron attenuation together.
+
+The samples are drawn and evaluated in chunks of chunk_size on a process pool, and every chunk is reduced to running
+statistics before it leaves the worker, so the memory used depends on the chunk size and not on the number of samples:
+
+    percentiles     from a histogram per output value with bins over the range of the first chunk, widened by half its
+                    span on both sides and log spaced for positive outputs; values outside land in the edge bins
+    sensitivities   the correlation of every output with the logarithm of every input factor, and the standardized
+                    regression coefficients of a linear fit on all of them, from co-moments merged across chunks. For
+                    positive outputs they are taken of the logarithm of the output, in which the models are close to
+                    linear; r2 of the fit tells how much of the variance the coefficients explain
+
+Outputs are scalars, or curves over the grid of a plot (time or thickness), with every statistic per grid point; plot
+draws the median of a curve with its percentile bands.
+
+    result = propagate(['boron', 'gamma'], n_samples=10**6)
+    result['boron']['lifetime']['percentiles']
+'''
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from . import boron_lifetime, cadmium_economy, gamma_current, neutron_absorption
+from .depletion import ABSORBERS, capture_chain_matrix, fraction_remaining, solve_depletion, time_to_fraction
+from .gamma_attenuation import GammaSource
+from .neutron_attenuation import B_10_number_density, component_densities, sigma as sigma_B10
+from .slab_depletion import uniform_lifetime
+
+'''
+Uncertain inputs                    Relative standard uncertainty, and the constant the factor multiplies.
+'''
+
+# The uncertainties are typical of the sources of the constants: evaluated thermal cross-sections, handbook densities
+# and the NIST attenuation tables. Change them, or pass others to propagate, when better numbers are known.
+INPUTS = {
+    'source': (0.10, 'neutron source strength I'),
+    'distance': (0.05, 'distance r from the source'),
+    'sigma_B10': (0.01, 'B-10 thermal absorption cross-section'),
+    'B10_abundance': (0.02, 'B-10 fraction of natural boron'),
+    'boron_density': (0.02, 'density of the boron sheet'),
+    'sigma_Cd112': (0.10, 'Cd-112 thermal capture cross-section'),
+    'sigma_Cd113': (0.02, 'Cd-113 thermal capture cross-section'),
+    'mu_lead': (0.03, 'mass attenuation coefficient of lead at 478 keV'),
+    'lead_density': (0.01, 'density of lead'),
+    'boric_acid_density': (0.02, 'density of boric acid'),
+    'steel_density': (0.01, 'density of steel'),
+    'resin_density': (0.03, 'density of the epoxy resin'),
+    'hardener_density': (0.03, 'density of the epoxy hardener'),
+}
+
+# Correlations of the logarithms of the factors; pairs left out are independent.
+CORRELATIONS = {
+    ('sigma_Cd112', 'sigma_Cd113'): 0.5,                # same evaluation
+    ('resin_density', 'hardener_density'): 0.5,         # same supplier and measurement
+}
+
+default_percentiles = (2.5, 16, 50, 84, 97.5)
+default_bins = 2048
+
+# Grids of the curve outputs, following the plots of the models.
+boron_time = np.geomspace(10**8, 10**14, 61)                 # [s]
+gamma_time = np.geomspace(1, 8e12, 61)                       # [s]
+cadmium_time = cadmium_economy.default_time[::2]             # [s]
+neutron_thickness = neutron_absorption.default_thickness     # [cm]
+neutron_composition = neutron_absorption.compositions[1]
+
+
+'''
+Models. Each takes a dict of factor arrays (n,) for its inputs and returns a dict of outputs of shape (n,) or (n, k)
+for a curve over k grid points.
+'''
+
+def _boron(f):
+    '''
+    B-10 lifetime of the sheet of boron_lifetime [s], without and with self-shielding, and the percentage of B-10 left
+    over boron_time.
+    '''
+
+    flux = boron_lifetime.flux * f['source'] / np.square(f['distance'])
+    sigma = boron_lifetime.sigma_10 * f['sigma_B10']
+    N_0 = boron_lifetime.B_10 * f['boron_density'] * f['B10_abundance']
+    return {'lifetime': time_to_fraction(0.1, flux, sigma),
+            'shielded_lifetime': uniform_lifetime(0.1, boron_lifetime.thickness, N_0, flux, sigma),
+            'remaining': 100 * fraction_remaining(boron_time, flux[:, np.newaxis], sigma[:, np.newaxis])}
+
+
+def _cadmium(f):
+    '''
+    Cd-113 [# nuclei/cm^3] over cadmium_time, and the percentage of it left at the end.
+    '''
+
+    cadmium = ABSORBERS['Cd']
+    scale = np.stack([f['sigma_Cd112'], f['sigma_Cd113'], np.ones_like(f['sigma_Cd113'])], axis=-1)
+    A = capture_chain_matrix(cadmium.sigma * scale, cadmium_economy.flux)
+    cd_113 = solve_depletion(A, cadmium.number_densities, cadmium_time)[..., 1]
+    return {'cd_113_left': 100 * cd_113[:, -1] / cadmium_economy.cd_113, 'cd_113': cd_113}
+
+
+def _gamma(f):
+    '''
+    Initial gamma current density [Bq/cm^3] of gamma_current, the percentage of it attenuated by 5 mm of lead, and the
+    current density over gamma_time.
+    '''
+
+    gc = gamma_current
+    source = GammaSource(gc.I * f['source'], gc.r * f['distance'], gc.rho * f['boron_density'],
+                         gc.x * f['B10_abundance'], gc.M, gc.sigma * f['sigma_B10'])
+    lead, = gc.materials(['Lead'])
+    return {'current_density': source.initial,
+            'lead_atten_percent': source.atten_percent(lead.atten_coeff * f['mu_lead'],
+                                                       lead.density * f['lead_density'], 0.5, 0),
+            'current': source.current_density(gamma_time[:, np.newaxis]).T}
+
+
+def _neutron(f):
+    '''
+    Percentage of thermal neutrons attenuated by 0.5 cm of the 33/33/21/13 composite, and over neutron_thickness.
+    '''
+
+    densities = component_densities * np.stack([f['boric_acid_density'], f['steel_density'], f['resin_density'],
+                                                f['hardener_density']], axis=-1)
+    depth = B_10_number_density(neutron_composition, densities) * f['B10_abundance'] * sigma_B10 * f['sigma_B10']
+    return {'atten_percent': -100 * np.expm1(-depth * 0.5),
+            'attenuation': -100 * np.expm1(-depth[:, np.newaxis] * neutron_thickness)}
+
+
+# name: (function, inputs, curve outputs: name -> (grid, axis label, axis scale))
+MODELS = {
+    'boron': (_boron, ['source', 'distance', 'sigma_B10', 'B10_abundance', 'boron_density'],
+              {'remaining': (boron_time, 'Time elapsed (s)', 'log')}),
+    'cadmium': (_cadmium, ['sigma_Cd112', 'sigma_Cd113'],
+                {'cd_113': (cadmium_time, 'Time elapsed (s)', 'linear')}),
+    'gamma': (_gamma, ['source', 'distance', 'sigma_B10', 'B10_abundance', 'boron_density', 'mu_lead', 'lead_density'],
+              {'current': (gamma_time, 'Time (s)', 'log')}),
+    'neutron': (_neutron, ['sigma_B10', 'B10_abundance', 'boric_acid_density', 'steel_density', 'resin_density',
+                           'hardener_density'],
+                {'attenuation': (neutron_thickness, 'Thickness of material [cm]', 'linear')}),
+}
+
+
+'''
+Sampling and the statistics of a chunk.
+'''
+
+def correlation_matrix(names, correlations=CORRELATIONS):
+    '''
+    Correlation matrix of the logarithms of the factors of the named inputs. Pairs with an input not in names are left
+    out.
+    '''
+
+    index = {name: i for i, name in enumerate(names)}
+    C = np.eye(len(names))
+    for (a, b), rho in correlations.items():
+        if a in index and b in index:
+            C[index[a], index[b]] = C[index[b], index[a]] = rho
+    return C
+
+
+def sample_factors(n, rng, uncertainties, cholesky):
+    '''
+    n samples of the factors (n, inputs), lognormal with mean 1 and the given relative standard uncertainties, and the
+    standard normals behind them, whose correlation matrix is cholesky @ cholesky.T.
+    '''
+
+    z = rng.standard_normal((n, len(uncertainties))) @ cholesky.T
+    s = np.sqrt(np.log1p(np.square(uncertainties)))
+    return np.exp(s * z - s**2 / 2), z
+
+
+def _transform(values, positive):
+    with np.errstate(divide='ignore'):
+        return np.where(positive, np.log(np.maximum(values, 1e-300)), values)
+
+
+def _binning(values, bins):
+    '''
+    Histogram bins of every column of the first chunk of an output: whether the column is binned in log space, the
+    lower edge and the bin width.
+    '''
+
+    positive = np.all(values > 0, axis=0)
+    u = _transform(values, positive)
+    lo, hi = u.min(axis=0), u.max(axis=0)
+    pad = np.where(hi > lo, 0.5 * (hi - lo), np.maximum(1e-6 * np.abs(lo), 1e-300))
+    return positive, lo - pad, (hi - lo + 2 * pad) / bins
+
+
+def _statistics(z, values, binning, bins):
+    '''
+    Count, histogram, extremes, means and co-moments of one chunk of one output (n, k) against its inputs z (n, p).
+    '''
+
+    positive, lo, width = binning
+    n, k = values.shape
+    u = _transform(values, positive)
+    index = np.clip((u - lo) / width, 0, bins - 1).astype(np.intp)
+    counts = np.bincount((index + bins * np.arange(k)).ravel(), minlength=k * bins).reshape(k, bins)
+
+    mean_z, mean_u, mean_y = z.mean(axis=0), u.mean(axis=0), values.mean(axis=0)
+    dz, du = z - mean_z, u - mean_u
+    return {'n': n, 'counts': counts, 'min': values.min(axis=0), 'max': values.max(axis=0),
+            'mean_z': mean_z, 'mean_u': mean_u, 'mean_y': mean_y,
+            'czz': dz.T @ dz, 'czu': dz.T @ du, 'cuu': np.sum(du * du, axis=0),
+            'cyy': np.sum(np.square(values - mean_y), axis=0)}
+
+
+def _merge(a, b):
+    '''
+    Statistics of two chunks together; means and co-moments are combined with the pairwise update of Chan et al.
+    '''
+
+    n = a['n'] + b['n']
+    w = a['n'] * b['n'] / n
+    dz, du, dy = (b[key] - a[key] for key in ('mean_z', 'mean_u', 'mean_y'))
+    return {'n': n, 'counts': a['counts'] + b['counts'],
+            'min': np.minimum(a['min'], b['min']), 'max': np.maximum(a['max'], b['max']),
+            'mean_z': a['mean_z'] + dz * b['n'] / n, 'mean_u': a['mean_u'] + du * b['n'] / n,
+            'mean_y': a['mean_y'] + dy * b['n'] / n,
+            'czz': a['czz'] + b['czz'] + w * np.outer(dz, dz), 'czu': a['czu'] + b['czu'] + w * np.outer(dz, du),
+            'cuu': a['cuu'] + b['cuu'] + w * du * du, 'cyy': a['cyy'] + b['cyy'] + w * dy * dy}
+
+
+def _summary(stats, binning, percentiles):
+    '''
+    Mean, standard deviation, percentiles (len(percentiles), k) interpolated in the histogram, and the sensitivities
+    (p, k) of one output.
+    '''
+
+    positive, lo, width = binning
+    n, counts = stats['n'], stats['counts']
+    cumulative = np.cumsum(counts, axis=1)
+    target = np.asarray(percentiles, dtype=float)[:, np.newaxis] / 100 * n
+    k = np.arange(counts.shape[0])
+    # First bin whose cumulative count reaches the target, and the linear position of the target inside it.
+    i = np.sum(cumulative[np.newaxis] < target[..., np.newaxis], axis=-1)
+    i = np.minimum(i, counts.shape[1] - 1)
+    before = np.where(i > 0, cumulative[k, np.maximum(i - 1, 0)], 0)
+    inside = np.maximum(counts[k, i], 1)
+    u = lo + width * (i + np.clip((target - before) / inside, 0, 1))
+    values = np.clip(np.where(positive, np.exp(u), u), stats['min'], stats['max'])
+
+    czz, czu, cuu = stats['czz'], stats['czu'], stats['cuu']
+    sd_z = np.sqrt(np.diag(czz))
+    beta = np.linalg.solve(czz, czu)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        correlation = czu / (sd_z[:, np.newaxis] * np.sqrt(cuu))
+        src = beta * sd_z[:, np.newaxis] / np.sqrt(cuu)
+        r2 = np.sum(beta * czu, axis=0) / cuu
+    return {'mean': stats['mean_y'], 'std': np.sqrt(stats['cyy'] / max(n - 1, 1)), 'percentiles': values,
+            'correlation': correlation, 'src': src, 'r2': r2}
+
+
+def _run_chunk(task):
+    '''
+    Sample and evaluate one chunk and reduce it to statistics per (model, output). The first chunk comes without
+    binnings and makes them from its own values.
+    '''
+
+    models, names, uncertainties, cholesky, seed, n, binnings, bins = task
+    factors, z = sample_factors(n, np.random.default_rng(seed), uncertainties, cholesky)
+    columns = dict(zip(names, factors.T))
+    binnings = {} if binnings is None else binnings
+    stats = {}
+    for model in models:
+        function, inputs, _ = MODELS[model]
+        used = [names.index(name) for name in inputs]
+        for output, values in function({name: columns[name] for name in inputs}).items():
+            values = np.asarray(values, dtype=float).reshape(n, -1)
+            if (model, output) not in binnings:
+                binnings[model, output] = _binning(values, bins)
+            stats[model, output] = _statistics(z[:, used], values, binnings[model, output], bins)
+    return binnings, stats
+
+
+def propagate(models=None, n_samples=10**6, chunk_size=10**5, workers=None, seed=None, inputs=INPUTS,
+              correlations=CORRELATIONS, percentiles=default_percentiles, bins=default_bins):
+    '''
+    Statistics of the outputs of the models (all by default) over n_samples joint samples of their uncertain inputs.
+
+    inputs maps input names to (relative standard uncertainty, description) and correlations pairs of names to the
+    correlation of the logarithms of their factors. Chunks of chunk_size samples are spread over a process pool, each
+    with an independent random stream spawned from seed; workers=1 runs in the calling process.
+
+    Returns {model: {output: summary}}, a summary being a dict of
+        inputs          names of the inputs of the model, the order of the sensitivities
+        grid            grid of a curve output, None for a scalar
+        mean, std       mean and standard deviation of the output
+        percentiles     the output at the given percentiles, shape (len(percentiles),) + output shape
+        correlation     correlation of the output (its logarithm if positive) with the log factor of every input
+        src             standardized regression coefficients of the same, both shaped (len(inputs),) + output shape
+        r2              coefficient of determination of the regression
+    '''
+
+    if n_samples < 1 or chunk_size < 1:
+        raise ValueError('n_samples and chunk_size must be at least 1')
+    models = list(MODELS) if models is None else list(models)
+    unknown = {name for pair in correlations for name in pair} - set(inputs)
+    if unknown:
+        raise ValueError('correlations of unknown inputs %s' % ', '.join(sorted(unknown)))
+    names = sorted({name for model in models for name in MODELS[model][1]})
+    missing = set(names) - set(inputs)
+    if missing:
+        raise ValueError('no uncertainty given for %s' % ', '.join(sorted(missing)))
+    try:
+        cholesky = np.linalg.cholesky(correlation_matrix(names, correlations))
+    except np.linalg.LinAlgError:
+        raise ValueError('the correlation matrix is not positive definite')
+    uncertainties = np.array([inputs[name][0] for name in names], dtype=float)
+
+    sizes = [min(chunk_size, n_samples - start) for start in range(0, n_samples, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    # The first chunk sets the histogram bins of every output, the others are binned the same way.
+    binnings, total = _run_chunk((models, names, uncertainties, cholesky, seeds[0], sizes[0], None, bins))
+    tasks = [(models, names, uncertainties, cholesky, s, n, binnings, bins) for s, n in zip(seeds[1:], sizes[1:])]
+    if workers == 1 or len(tasks) <= 1:
+        chunks = map(_run_chunk, tasks)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        chunks = pool.map(_run_chunk, tasks)
+    try:
+        for _, stats in chunks:
+            total = {key: _merge(total[key], stats[key]) for key in total}
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    result = {}
+    for (model, output), stats in total.items():
+        _, model_inputs, curves = MODELS[model]
+        summary = _summary(stats, binnings[model, output], percentiles)
+        if output not in curves:
+            summary = {key: value[..., 0] for key, value in summary.items()}
+        summary.update(inputs=list(model_inputs), grid=curves[output][0] if output in curves else None)
+        result.setdefault(model, {})[output] = summary
+    return result
+
+
+def plot(model='boron', output=None, result=None, ax=None, n_samples=10**5, **kwargs):
+    '''
+    Median of a curve output (the first of the model by default) with the bands between the outer and the inner pairs
+    of percentiles. Without a result, one is computed from n_samples samples. pyplot is imported only when no axes
+    are given.
+    '''
+
+    _, _, curves = MODELS[model]
+    output = output or next(iter(curves))
+    if result is None:
+        result = propagate([model], n_samples, **kwargs)
+    summary = result[model][output]
+    grid, label, scale = curves[output]
+    bands = summary['percentiles']
+
+    if ax is None:
+        import matplotlib.pyplot as plt
+        ax = plt.figure().gca()
+    ax.set_xscale(scale)
+    for j, alpha in zip(range(len(bands) // 2), (0.2, 0.4, 0.6)):
+        ax.fill_between(grid, bands[j], bands[-1 - j], color='b', alpha=alpha, linewidth=0)
+    ax.plot(grid, bands[len(bands) // 2], 'b-', label='median')
+    ax.set_xlabel(label)
+    ax.set_ylabel(output)
+    ax.set_title('%s: %s with percentile bands' % (model, output))
+    return ax
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Monte Carlo uncertainty of the model outputs.')
+    parser.add_argument('models', nargs='*', metavar='MODEL',
+                        help='models to run: %s; all by default' % ', '.join(MODELS))
+    parser.add_argument('--samples', type=int, default=10**6)
+    parser.add_argument('--chunk-size', type=int, default=10**5)
+    parser.add_argument('--workers', type=int, default=None, help='number of worker processes')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--plot', metavar='DIR', help='render the bands of the curve outputs to DIR')
+    parser.add_argument('--format', default='png')
+    args = parser.parse_args(argv)
+    for model in args.models:
+        if model not in MODELS:
+            parser.error('unknown model %r' % model)
+
+    result = propagate(args.models or None, args.samples, args.chunk_size, args.workers, args.seed)
+    q = default_percentiles
+    for model, outputs in result.items():
+        print('%s, %d samples' % (model, args.samples))
+        for output, summary in outputs.items():
+            if summary['grid'] is not None:
+                continue
+            print('  %-20s mean %11.5g  std %10.4g  ' % (output, summary['mean'], summary['std'])
+                  + '  '.join('p%g %11.5g' % (p, v) for p, v in zip(q, summary['percentiles'])))
+            ranked = np.argsort(-np.abs(np.nan_to_num(summary['src'])))
+            print('  %-20s r2 %.3f  src ' % ('', summary['r2'])
+                  + '  '.join('%s %+.3f' % (summary['inputs'][i], summary['src'][i]) for i in ranked))
+
+    if args.plot:
+        from .plotting import render
+        os.makedirs(args.plot, exist_ok=True)
+        for model, outputs in result.items():
+            for output, summary in outputs.items():
+                if summary['grid'] is not None:
+                    path = os.path.join(args.plot, '%s_%s.%s' % (model, output, args.format))
+                    print('wrote', render(plot, path, model=model, output=output, result=result))
+
+
+if __name__ == '__main__':
+    main()
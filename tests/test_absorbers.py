@@ -0,0 +1,32 @@
+import numpy as np
+
+from nedc_rpc.depletion import ABSORBERS, catalog_lifetime, deplete_catalog, solve_depletion, time_to_fraction
+
+flux = np.array([1e8, 1e10])
+
+
+def test_catalog_matches_each_absorber():
+    times = np.array([0.0, 1e6, 1e9])
+    N = deplete_catalog(['B', 'Cd', 'Gd'], flux, times)
+    assert N.shape == (3, 2, 3, 4)
+    for i, name in enumerate(['B', 'Cd', 'Gd']):
+        absorber = ABSORBERS[name]
+        m = len(absorber.isotopes)
+        expected = solve_depletion(absorber.matrix(flux), absorber.number_densities, times)
+        assert np.allclose(N[i, ..., :m], expected, rtol=1e-8)
+        assert np.all(N[i, ..., m:] == 0)
+
+
+def test_lifetime_of_unfed_isotopes_is_closed_form():
+    # Nothing captures into B-10 or Sm-149, so their lifetime is that of a single exponential.
+    lifetime = catalog_lifetime(['B', 'Sm'], flux, fraction=0.1)
+    for row, name in zip(lifetime, ['B', 'Sm']):
+        absorber = ABSORBERS[name]
+        assert np.allclose(row, time_to_fraction(0.1, flux, absorber.sigma[absorber.key_index]), rtol=1e-8)
+
+
+def test_fed_isotope_lives_longer():
+    # Cd-112 captures feed Cd-113, which stretches its lifetime past the single exponential.
+    cadmium = ABSORBERS['Cd']
+    lifetime = catalog_lifetime(['Cd'], flux, fraction=0.1)[0]
+    assert np.all(lifetime > time_to_fraction(0.1, flux, cadmium.sigma[cadmium.key_index]))
@@ -0,0 +1,30 @@
+import numpy as np
+
+from nedc_rpc.background import estimate_background, rolling_percentile, snip
+
+channels = np.arange(1024)
+continuum = 200 * np.exp(-channels / 400.0) + 10
+peaks = 1000 * np.exp(-0.5 * ((channels - 300) / 3.0) ** 2) + 500 * np.exp(-0.5 * ((channels - 700) / 4.0) ** 2)
+
+
+def test_snip_removes_peaks_and_keeps_the_continuum():
+    background = snip(continuum + peaks, max_half_width=20)
+    assert np.max(np.abs(background - continuum)[20:-20] / continuum[20:-20]) < 0.05
+    assert np.all(background <= continuum + peaks + 1e-9)
+
+
+def test_rolling_percentile_follows_a_flat_continuum():
+    rng = np.random.default_rng(0)
+    y = rng.poisson(100 + peaks).astype(float)
+    background = rolling_percentile(y, window=81, q=10)
+    assert np.all(np.abs(background - 100) < 20)
+
+
+def test_stacks_and_lists_agree():
+    spectra = [continuum + peaks, 2 * (continuum + peaks), (continuum + peaks)[:500]]
+    stacked = snip(np.stack(spectra[:2]))
+    backgrounds = estimate_background(spectra)
+    assert np.allclose(backgrounds[0], stacked[0]) and np.allclose(backgrounds[1], stacked[1])
+    assert np.allclose(backgrounds[2], snip(spectra[2]))
+    assert np.allclose(estimate_background(spectra[:1], 'percentile', window=21)[0],
+                       rolling_percentile(spectra[0], window=21))
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from nedc_rpc.batch_pipeline import process_files, read_peak_table, table_dtype
+from nedc_rpc.peak_finder import find_peaks
+from nedc_rpc.spectrum_io import read_spectrum
+
+
+def spectrum(seed):
+    rng = np.random.default_rng(seed)
+    channels = np.arange(512)
+    mean = 20 + sum(a * np.exp(-0.5 * ((channels - c) / 3.0) ** 2) for a, c in [(500, 100), (300, 260), (800, 400)])
+    return rng.poisson(mean).astype(float)
+
+
+def write(path, counts):
+    '''
+    Write counts in the format of the file extension.
+    '''
+
+    ext = path.suffix
+    if ext in ('.csv', '.txt'):
+        path.write_text('channel,counts\n' + ''.join('%d,%d\n' % (i, c) for i, c in enumerate(counts)))
+    elif ext == '.mca':
+        path.write_text('<<PMCA SPECTRUM>>\n<<DATA>>\n%s\n<<END>>\n' % '\n'.join('%d' % c for c in counts))
+    elif ext == '.spe':
+        path.write_text('$SPEC_ID:\ntest\n$DATA:\n0 %d\n%s\n$ENER_FIT:\n0 1\n' % (
+            len(counts) - 1, '\n'.join('%8d' % c for c in counts)))
+    elif ext == '.chn':
+        header = np.zeros(16, dtype='<i2')
+        header[0] = -1
+        header[15] = len(counts)
+        path.write_bytes(header.tobytes() + np.asarray(counts, dtype='<u4').tobytes() + b'\0' * 512)
+    else:
+        np.save(path, counts)
+
+
+@pytest.mark.parametrize('ext', ['.csv', '.txt', '.mca', '.spe', '.chn', '.npy'])
+def test_readers(tmp_path, ext):
+    counts = spectrum(0)
+    write(tmp_path / ('spectrum' + ext), counts)
+    assert np.array_equal(read_spectrum(str(tmp_path / ('spectrum' + ext))), counts)
+
+
+def test_text_sections_end_where_the_counts_end(tmp_path):
+    counts = spectrum(1)
+    path = tmp_path / 'spectrum.mca'
+    path.write_text('<<PMCA SPECTRUM>>\nTAG - live_data\n<<DATA>>\n%s\n<<END>>\n<<DP5 CONFIGURATION>>\nRESC=Y;\n' % (
+        '\n'.join('%d' % c for c in counts)))
+    assert np.array_equal(read_spectrum(str(path)), counts)
+
+    path = tmp_path / 'spectrum.txt'
+    path.write_text('# channel counts\n' + ''.join('%d %d\n' % (i, c) for i, c in enumerate(counts[:5])))
+    assert np.array_equal(read_spectrum(str(path)), counts[:5])
+
+
+def test_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        read_spectrum(str(tmp_path / 'spectrum.xyz'))
+
+
+def test_process_files(tmp_path):
+    paths = []
+    for i, ext in enumerate(['.csv', '.mca', '.spe', '.chn', '.npy']):
+        paths.append(tmp_path / ('run%d%s' % (i, ext)))
+        write(paths[-1], spectrum(i))
+
+    output = str(tmp_path / 'peaks.npz')
+    table = process_files(paths, output, workers=1, chunk_size=2, min_prominence=100)
+    assert table.dtype == table_dtype
+    for i in range(len(paths)):
+        expected = find_peaks(spectrum(i), min_prominence=100)
+        assert np.array_equal(table['index'][table['spectrum'] == i], expected['index'])
+        assert len(expected) == 3
+
+    stored, files = read_peak_table(output)
+    assert files == [str(path) for path in paths]
+    assert np.array_equal(stored, table)
+
+
+def test_background_and_fit(tmp_path):
+    path = tmp_path / 'run.npy'
+    write(path, spectrum(0))
+    table = process_files([path], workers=1, background='snip', fit=True, min_prominence=100)
+    assert np.allclose(np.sort(table['centroid']), [100, 260, 400], atol=0.5)
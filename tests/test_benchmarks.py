@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+from nedc_rpc import benchmarks
+from nedc_rpc.benchmarks import BENCHMARKS, append_history, compare, load_history, measure
+
+
+@pytest.mark.parametrize('name', sorted(BENCHMARKS))
+def test_smallest_size_runs(name):
+    setup, sizes, _, _ = BENCHMARKS[name]
+    seconds, peak = measure(setup(sizes[0]), repeat=1, min_time=0)
+    assert seconds > 0 and peak > 0
+
+
+def record(**seconds):
+    return {'results': {name: [{'size': 10, 'seconds': s}] for name, s in seconds.items()}}
+
+
+def test_compare():
+    baseline = record(a=1.0, b=1.0, c=1.0)
+    assert compare(record(a=1.1, b=1.3, d=5.0), baseline) == [('b', 10, 1.3, 1.0)]
+    assert compare(record(a=1.1), baseline, threshold=0.05) == [('a', 10, 1.1, 1.0)]
+
+
+def test_history_and_exit_status(tmp_path, monkeypatch):
+    history, baseline = str(tmp_path / 'history.json'), str(tmp_path / 'baseline.json')
+    assert load_history(history) == []
+    append_history({'run': 1}, history)
+    append_history({'run': 2}, history)
+    assert load_history(history) == [{'run': 1}, {'run': 2}]
+
+    times = iter([record(peak_finder=1.0), record(peak_finder=2.0), record(peak_finder=1.0)])
+    monkeypatch.setattr(benchmarks, 'run', lambda *args: next(times))
+    argv = ['peak_finder', '--history', history, '--baseline', baseline]
+    assert benchmarks.main(argv + ['--save-baseline']) == 0
+    assert json.loads((tmp_path / 'baseline.json').read_text()) == record(peak_finder=1.0)
+    assert benchmarks.main(argv) == 1
+    assert benchmarks.main(argv) == 0
+    assert len(load_history(history)) == 5
+    with pytest.raises(SystemExit):
+        benchmarks.main(['nonexistent'])
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from nedc_rpc.calibration import Calibration, LineLibrary, default_lines, fit_calibration
+
+
+def test_fit_recovers_a_quadratic():
+    truth = Calibration([2.0, 0.5, 1e-5])
+    channels = np.array([100.0, 800.0, 1500.0, 2600.0, 3900.0])
+    calibration = fit_calibration(channels, truth(channels), degree=2)
+    assert np.allclose(calibration.coefficients, truth.coefficients)
+    assert np.allclose(calibration.residuals, 0, atol=1e-9)
+    assert np.allclose(calibration.channel(truth(channels)), channels)
+    with pytest.raises(ValueError):
+        fit_calibration([1.0, 2.0], [1.0, 2.0], degree=2)
+
+
+def test_matches_and_identify():
+    library = LineLibrary([661.657, 477.595, 1173.228, 1332.492], [85.1, 93.9, 99.85, 99.98],
+                          ['Cs-137', 'B-10(n,a)Li-7', 'Co-60', 'Co-60'])
+    assert library.lines('Co-60').tolist() == [1173.228, 1332.492]
+
+    energies = np.array([478.0, 1250.0, 1330.0])
+    line, source = library.identify(energies, 3.0)
+    assert line.tolist() == [0, -1, 3] and source.tolist() == ['B-10(n,a)Li-7', '', 'Co-60']
+
+    matches = library.matches(energies, [1.0, 100.0, 3.0])
+    assert matches[['peak', 'line']].tolist() == [(0, 0), (1, 2), (1, 3), (2, 3)]
+    assert np.allclose(matches['delta'], energies[matches['peak']] - library.energy[matches['line']])
+
+
+def test_default_library_has_the_li7_line():
+    line, source = default_lines().identify([477.6], 1.0)
+    assert source[0] == 'B-10(n,a)Li-7'
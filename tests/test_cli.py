@@ -0,0 +1,27 @@
+import pytest
+
+from nedc_rpc import cli
+
+
+def test_model_report_without_plots(capsys):
+    assert cli.main(['boron']) == 0
+    assert capsys.readouterr().out
+
+
+def test_passthrough_hands_arguments_on(capsys, tmp_path):
+    with pytest.raises(SystemExit):
+        cli.main(['endf', '--store', str(tmp_path), 'add', str(tmp_path / 'missing.endf')])
+    assert 'no such file' in capsys.readouterr().err
+
+
+def test_optimize_and_transport(capsys):
+    assert cli.main(['optimize', '--samples', '2000', '--workers', '1', '--rows', '3']) == 0
+    assert 'Pareto optimal designs' in capsys.readouterr().out
+    assert cli.main(['transport', '--histories', '1000', '--workers', '1', '--thickness', '0.1']) == 0
+    assert 'TransportResult' in capsys.readouterr().out
+
+
+def test_render(tmp_path):
+    pytest.importorskip('matplotlib')
+    assert cli.main(['render', str(tmp_path), '--workers', '1', '--dpi', '20']) == 0
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted(name + '.png' for name in cli.FIGURES)
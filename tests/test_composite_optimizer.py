@@ -0,0 +1,37 @@
+import numpy as np
+
+from nedc_rpc.composite_optimizer import format_front, optimize, pareto_2d, sample_simplex
+from nedc_rpc.neutron_attenuation import neut_atten_percent
+
+
+def test_pareto_2d_matches_pairwise_dominance():
+    rng = np.random.default_rng(0)
+    cost = rng.integers(0, 20, 300).astype(float)
+    gain = rng.integers(0, 20, 300).astype(float)
+    dominated = ((cost[:, None] >= cost) & (gain[:, None] <= gain)
+                 & ((cost[:, None] > cost) | (gain[:, None] < gain))).any(axis=1)
+    mask = pareto_2d(cost, gain)
+    # Of the points tied in both cost and gain only one is kept.
+    assert np.array_equal(np.unique(np.c_[cost, gain][mask], axis=0), np.unique(np.c_[cost, gain][~dominated], axis=0))
+
+
+def test_samples_are_on_the_simplex():
+    fracs = sample_simplex(1000, np.random.default_rng(1))
+    assert np.all(fracs >= 0)
+    assert np.allclose(fracs.sum(axis=1), 1)
+
+
+def test_front():
+    front = optimize(n_samples=20000, thickness=[0.1, 0.2, 0.5], chunk_size=5000, workers=1, seed=0)
+    fracs = np.stack([front[name] for name in ('boric_acid', 'steel', 'resin', 'hardener')])
+    assert np.allclose(front['attenuation'], neut_atten_percent(front['thickness'], *fracs))
+    assert np.allclose(front['areal_mass'], front['density'] * front['thickness'])
+    for x in (0.1, 0.2, 0.5):
+        level = front[front['thickness'] == x]
+        assert pareto_2d(level['areal_mass'], level['B_10_density']).all()
+    assert np.array_equal(front, optimize(n_samples=20000, thickness=[0.1, 0.2, 0.5], chunk_size=5000, workers=1,
+                                          seed=0))
+
+    lines = format_front(front, rows=5).splitlines()
+    assert lines[0] == '%d Pareto optimal designs' % len(front)
+    assert 2 < len(lines) <= 2 + 2 * 5
@@ -0,0 +1,32 @@
+import os
+
+import numpy as np
+
+from nedc_rpc.cross_sections import CrossSectionTable, load_table, one_over_v, thermal_energy
+from nedc_rpc.depletion import barn
+
+
+def test_one_over_v_is_exact():
+    table = one_over_v(3.8468e-21)
+    energy = np.logspace(-5, np.log10(2e7), 50)
+    assert np.allclose(table(energy), 3.8468e-21 * np.sqrt(thermal_energy / energy), rtol=1e-12)
+
+
+def test_threshold_is_interpolated_lin_lin():
+    table = CrossSectionTable(np.array([1.0, 2.0, 4.0]), np.array([0.0, 0.0, 2.0]))
+    assert np.allclose(table(np.array([1.5, 3.0, 4.0, 10.0])) / barn, [0.0, 1.0, 2.0, 2.0])
+
+
+def test_load_table_cache(tmp_path):
+    path = str(tmp_path / 'b10.txt')
+    with open(path, 'w') as f:
+        f.write('# energy [eV], sigma [b]\n1.0, 10.0\n1e-2 100.0\n100 1.0\n')
+    table = load_table(path)
+    assert os.path.exists(path + '.npy')
+    assert table.energy.tolist() == [1e-2, 1.0, 100.0]
+    assert np.allclose(table(np.array([0.1, 10.0])) / barn, [np.sqrt(1000.0), np.sqrt(10.0)])
+
+    # The second load maps the cache instead of parsing the text.
+    mtime = os.path.getmtime(path + '.npy')
+    assert isinstance(load_table(path).energy, np.memmap)
+    assert os.path.getmtime(path + '.npy') == mtime
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from nedc_rpc.depletion import (_expm, bisect_time, capture_chain_matrix, fraction_remaining, solve_depletion,
+                                time_to_fraction)
+
+
+def test_time_to_fraction_inverts_fraction_remaining():
+    fraction = np.array([0.9, 0.5, 0.1, 1e-6])
+    flux, sigma = 1e9 / (4 * np.pi), 3.8e-21
+    t = time_to_fraction(fraction, flux, sigma)
+    assert np.allclose(fraction_remaining(t, flux, sigma), fraction, rtol=1e-12)
+    assert time_to_fraction(0.5, 0.0, sigma) == np.inf
+    with np.errstate(all='raise'):
+        assert time_to_fraction([1.0, 0.5], [0.0, flux], sigma).tolist() == [0.0, time_to_fraction(0.5, flux, sigma)]
+    with pytest.raises(ValueError):
+        time_to_fraction(0.0, flux, sigma)
+
+
+def test_bisect_time_matches_closed_form():
+    flux = np.array([1e6, 1e8, 1e10])
+    sigma = 3.8e-21
+    t = bisect_time(lambda t: fraction_remaining(t, flux, sigma), 0.1, t_max=1e20)
+    assert np.allclose(t, time_to_fraction(0.1, flux, sigma), rtol=1e-9)
+    assert bisect_time(lambda t: fraction_remaining(t, flux, sigma), 0.1, t_max=1.0).tolist() == [np.inf] * 3
+
+
+def test_two_member_chain_matches_bateman():
+    # A -> B -> (out) with removal rates a and b: N_B = N_A0 a (exp(-a t) - exp(-b t)) / (b - a).
+    a, b = 2e-9, 5e-9
+    A = capture_chain_matrix([a, b], 1.0)
+    times = np.array([0.0, 1e7, 1e8, 1e9, 1e10])
+    N = solve_depletion(A, [1.0, 0.0], times)
+    assert np.allclose(N[:, 0], np.exp(-a * times), rtol=1e-12)
+    assert np.allclose(N[:, 1], a * (np.exp(-a * times) - np.exp(-b * times)) / (b - a), rtol=1e-10, atol=1e-300)
+
+
+def test_equal_rates_fall_back_on_expm():
+    # Equal removal rates make A defective: N_B = N_A0 k t exp(-k t).
+    k = 3e-9
+    A = capture_chain_matrix([k, k], 1.0)
+    times = np.array([0.0, 1e8, 1e9, 1e10])
+    N = solve_depletion(A, [1.0, 0.0], times)
+    assert np.allclose(N[:, 1], k * times * np.exp(-k * times), rtol=1e-10, atol=1e-300)
+
+
+def test_expm_of_diagonal_stack():
+    w = np.array([[-1.0, -30.0], [0.5, -1e-3]])
+    M = np.zeros((2, 2, 2))
+    M[:, [0, 1], [0, 1]] = w
+    assert np.allclose(_expm(M)[:, [0, 1], [0, 1]], np.exp(w), rtol=1e-12)
@@ -0,0 +1,132 @@
+import numpy as np
+import pytest
+
+from nedc_rpc import endf
+from nedc_rpc.endf import EndfTable, Store, material_name, parse, reaction_number
+
+
+'''
+A synthetic ENDF-6 tape: File 1 MT 451 for LISO and File 3 TAB1 sections.
+'''
+
+def _float(v):
+    if v == 0:
+        return ' 0.000000+0'
+    mantissa, exponent = ('%.6e' % v).split('e')
+    return '%11s' % ('%s%+d' % (mantissa, int(exponent)))
+
+
+def _line(fields, mat, mf, mt, n):
+    return '%-66s%4d%2d%3d%5d' % (''.join(fields), mat, mf, mt, n)
+
+
+def _end(mat, mf, mt):
+    return _line([_float(0)] * 2 + ['%11d' % 0] * 4, mat, mf, mt, 99999)
+
+
+def write_tape(path, materials):
+    '''
+    materials: (MAT, ZA, AWR, LISO, [(MT, nbt, law, energy, sigma)]).
+    '''
+
+    lines = [_line([' tape'], 1, 0, 0, 0)]
+    for mat, za, awr, liso, sections in materials:
+        ints = ['%11d' % 0] * 4
+        lines.append(_line([_float(za), _float(awr)] + ints, mat, 1, 451, 1))
+        lines.append(_line([_float(0), _float(0), '%11d' % 0, '%11d' % liso, '%11d' % 0, '%11d' % 6], mat, 1, 451, 2))
+        lines.append(_end(mat, 1, 0))
+        for mt, nbt, law, energy, sigma in sections:
+            lines.append(_line([_float(za), _float(awr)] + ints, mat, 3, mt, 1))
+            lines.append(_line([_float(0), _float(0), '%11d' % 0, '%11d' % 0, '%11d' % len(nbt),
+                                '%11d' % len(energy)], mat, 3, mt, 2))
+            pairs = ['%11d' % v for pair in zip(nbt, law) for v in pair]
+            values = [_float(v) for pair in zip(energy, sigma) for v in pair]
+            lines += [_line(pairs[k:k + 6], mat, 3, mt, 3) for k in range(0, len(pairs), 6)]
+            lines += [_line(values[k:k + 6], mat, 3, mt, 4) for k in range(0, len(values), 6)]
+            lines.append(_end(mat, 3, 0))
+        lines.append(_end(mat, 0, 0))
+    lines.append(_end(-1, 0, 0))
+    path.write_text('\n'.join(lines) + '\n')
+
+
+energy = np.logspace(-5, 7, 25)
+b10 = (525, 5010.0, 9.926921, 0, [
+    (107, [25], [5], energy, 3840.0 * np.sqrt(0.0253 / energy)),
+    (102, [25], [5], energy, 0.5 * np.sqrt(0.0253 / energy)),
+    (103, [10, 25], [2, 1], energy, np.linspace(0.0, 1.0, 25)),
+])
+am242m = (9547, 95242.0, 239.98, 1, [(102, [2], [2], [1e-5, 2e7], [1000.0, 10.0])])
+
+
+@pytest.fixture
+def tape(tmp_path):
+    path = tmp_path / 'tape.endf'
+    write_tape(path, [b10, am242m])
+    return path
+
+
+def test_names():
+    assert material_name(5010) == 'B-10'
+    assert material_name(95242, 1) == 'Am-242m'
+    assert material_name(48000) == 'Cd-nat'
+    assert reaction_number('n,alpha') == 107 and reaction_number('102') == 102 and reaction_number(3) == 3
+    with pytest.raises(ValueError):
+        reaction_number('n,gamma')
+
+
+def test_parse(tape):
+    sections = parse(str(tape))
+    assert [(s['material'], s['mt']) for s in sections] == [('B-10', 107), ('B-10', 102), ('B-10', 103),
+                                                            ('Am-242m', 102)]
+    assert np.allclose(sections[0]['energy'], energy, rtol=1e-6)
+    assert sections[2]['nbt'] == [10, 25] and sections[2]['int'] == [2, 1]
+
+
+def test_interpolation_laws():
+    x, y = np.array([1.0, 10.0, 100.0, 1000.0]), np.array([8.0, 4.0, 2.0, 1.0])
+    at = np.array([1.0, 5.5, np.sqrt(10) * 10, 300.0, 2000.0])
+    histogram, linear = EndfTable(x, y, [4], [1]).barns(at), EndfTable(x, y, [4], [2]).barns(at)
+    assert histogram.tolist() == [8.0, 8.0, 4.0, 2.0, 0.0]
+    assert np.allclose(linear[:2], [8.0, 6.0])
+    assert np.allclose(EndfTable(x, y, [4], [5]).barns(at[:3]), [8.0, 8.0 * 5.5 ** -np.log10(2), 2 * np.sqrt(2)])
+    # Two ranges: lin-lin up to point 2, log-log after it.
+    table = EndfTable(x, y, [2, 4], [2, 5])
+    assert np.allclose(table.barns([5.5, np.sqrt(10) * 10]), [6.0, 2 * np.sqrt(2)])
+
+
+def test_store_round_trip(tape, tmp_path, monkeypatch):
+    store = Store(str(tmp_path / 'store'))
+    keys = store.add(str(tape))
+    assert sorted(keys) == store.keys()
+    assert ('B-10', 'n,alpha') in store and ('B-10', 'absorption') in store and ('B-10', 'nonelastic') not in store
+
+    # 1/v data is exact under log-log interpolation.
+    assert store.thermal('B-10', 'n,alpha') == pytest.approx(3840.0 * endf.barn, rel=1e-6)
+    assert store.cross_section('Am-242m', 102, [1e-5, 3e7])[1] == 0.0
+
+    # Absorption is summed from the reactions the tape gives on the union of their grids.
+    absorption = store.table('B-10', 'absorption')
+    expected = sum(store.table('B-10', mt).barns(absorption.energy) for mt in (102, 103, 107))
+    assert np.allclose(absorption.sigma, expected)
+
+    # A second store reads the binary data without parsing the tape again.
+    monkeypatch.setattr(endf, 'parse', lambda path: pytest.fail('parsed again'))
+    again = Store(store.directory)
+    assert again.current(str(tape))
+    assert again.add(str(tape)) == keys
+    assert np.array_equal(again.table('B-10', 107).sigma, store.table('B-10', 107).sigma)
+
+
+def test_concurrent_stores_keep_each_others_files(tmp_path):
+    write_tape(tmp_path / 'b10.endf', [b10])
+    write_tape(tmp_path / 'am.endf', [am242m])
+    first, second = Store(str(tmp_path / 'store')), Store(str(tmp_path / 'store'))
+    first.add(str(tmp_path / 'b10.endf'))
+    second.add(str(tmp_path / 'am.endf'))
+    assert len(Store(str(tmp_path / 'store')).index['files']) == 2
+
+
+def test_main_add_missing_file(tmp_path, capsys):
+    with pytest.raises(SystemExit):
+        endf.main(['--store', str(tmp_path), 'add', str(tmp_path / 'missing.endf')])
+    assert 'no such file' in capsys.readouterr().err
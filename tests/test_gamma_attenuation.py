@@ -0,0 +1,25 @@
+import numpy as np
+
+from nedc_rpc.gamma_attenuation import GammaSource, Material, attenuation_tensor
+
+
+def test_current_density_decays_with_the_b10():
+    source = GammaSource(I=[1e9, 1e10], r=2.0)
+    t = np.array([[0.0], [1e10]])
+    flux = np.array([1e9, 1e10]) / (4 * np.pi * 4)
+    expected = source.rho_knot * source.sigma * flux * np.exp(-source.sigma * flux * t)
+    assert np.allclose(source.current_density(t), expected)
+
+
+def test_tensor_matches_atten_percent():
+    source = GammaSource()
+    materials = [Material('Lead', 0.1614, 11.34), Material('Polyethylene', 0.1077, 0.95)]
+    thickness = np.linspace(0, 5, 11)
+    times = np.array([0.0, 1e8, 1e9])
+    tensor = attenuation_tensor(materials, thickness, times, source)
+    assert tensor.shape == (2, 11, 3)
+
+    loop = [[[source.atten_percent(m.atten_coeff, m.density, x, t) for t in times] for x in thickness]
+            for m in materials]
+    assert np.allclose(tensor, loop, rtol=1e-12)
+    assert np.allclose(attenuation_tensor(materials, thickness, times, source, dtype=np.float32), loop, rtol=1e-6)
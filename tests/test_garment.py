@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from nedc_rpc.depletion import point_source_flux
+from nedc_rpc.garment import dose_map, load_obj, occluded, vertex_normals
+from nedc_rpc.neutron_attenuation import neut_atten_percent
+
+
+def plate(z, n=20, size=10.0, facing=-1):
+    '''
+    Square grid of n x n vertices in the plane at z, with normals along facing * z.
+    '''
+
+    u = np.linspace(-size / 2, size / 2, n)
+    x, y = np.meshgrid(u, u, indexing='ij')
+    vertices = np.stack([x.ravel(), y.ravel(), np.full(n * n, float(z))], axis=-1)
+    i, j = np.meshgrid(np.arange(n - 1), np.arange(n - 1), indexing='ij')
+    a = (i * n + j).ravel()
+    faces = np.concatenate([np.stack([a, a + n, a + 1], -1), np.stack([a + 1, a + n, a + n + 1], -1)])
+    return vertices, faces[:, ::-1] if facing < 0 else faces
+
+
+def sphere(radius=10.0, n=40):
+    theta, phi = np.meshgrid(np.linspace(0, np.pi, n), np.linspace(0, 2 * np.pi, 2 * n, endpoint=False),
+                             indexing='ij')
+    vertices = radius * np.stack([np.sin(theta) * np.cos(phi), np.sin(theta) * np.sin(phi), np.cos(theta)],
+                                 axis=-1).reshape(-1, 3)
+    i, j = np.meshgrid(np.arange(n - 1), np.arange(2 * n), indexing='ij')
+    a, b = (i * 2 * n + j).ravel(), (i * 2 * n + (j + 1) % (2 * n)).ravel()
+    return vertices, np.concatenate([np.stack([a, a + 2 * n, b], -1), np.stack([b, a + 2 * n, b + 2 * n], -1)])
+
+
+def test_load_obj(tmp_path):
+    path = tmp_path / 'quad.obj'
+    path.write_text('# quad and triangle\nv 0 0 0\nv 1 0 0\nv 1 1 0\nv 0 1 0 0.5 0.5 0.5\nvt 0 0\nvn 0 0 1\n'
+                    'f 1/1/1 2/1/1 3/1/1 4/1/1\nf -4//1 -2//1 -1//1\n')
+    vertices, faces = load_obj(str(path))
+    assert vertices.shape == (4, 3)
+    assert faces.tolist() == [[0, 1, 2], [0, 2, 3], [0, 2, 3]]
+    path.write_text('v 0 0 0\nf 1 2 3\n')
+    with pytest.raises(ValueError):
+        load_obj(str(path))
+
+
+def test_normal_incidence_matches_the_slab_formulas():
+    vertices, faces = plate(z=50.0)
+    table = dose_map(vertices, faces, source=(0.0, 0.0, 0.0), thickness=0.5)
+    assert not table['occluded'].any()
+    centre = np.argmin(np.linalg.norm(vertices[:, :2], axis=-1))
+    assert table['cos_incidence'][centre] == pytest.approx(1.0, abs=2e-3)
+    incident = point_source_flux(10**9, table['distance'])
+    assert np.allclose(table['incident'], incident)
+    absorbed = neut_atten_percent(table['path'], 0.333, 0.333, 0.206, 0.128) / 100
+    assert np.allclose(table['neutron_flux'], incident * (1 - absorbed))
+    assert np.all(table['dose'] > table['neutron_dose'])
+
+
+def test_back_plate_is_shadowed():
+    front, front_faces = plate(z=20.0, size=20.0)
+    back, back_faces = plate(z=40.0, size=10.0)
+    vertices = np.concatenate([front, back])
+    faces = np.concatenate([front_faces, back_faces + len(front)])
+    shadow = occluded(vertices, faces, (0.0, 0.0, 0.0), vertex_normals(vertices, faces))
+    assert not shadow[:len(front)].any()
+    assert shadow[len(front):].all()
+    assert np.all(dose_map(vertices, faces)['dose'][len(front):] == 0)
+
+    # Without the shadow map the back plate is lit, but a plate facing away from the source still is not.
+    assert np.all(dose_map(vertices, faces, occlusion=False)['dose'][len(front):] > 0)
+    away, away_faces = plate(z=20.0, facing=1)
+    table = dose_map(away, away_faces, occlusion=False)
+    assert table['occluded'].all() and np.all(table['dose'] == 0)
+
+
+def test_sphere_lit_side_faces_the_source():
+    vertices, faces = sphere()
+    source = np.array([100.0, 0.0, 0.0])
+    table = dose_map(vertices, faces, source=source)
+    lit = ~table['occluded']
+    assert np.all(table['cos_incidence'][lit] > 0)
+    assert np.all(lit[table['cos_incidence'] > 0.2])
+    with pytest.raises(ValueError):
+        occluded(vertices, faces, (1.0, 0.0, 0.0))
@@ -0,0 +1,58 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from nedc_rpc.laminate import default_layers, evaluate, optimize
+
+flux = 10**9 / (4 * np.pi)
+thickness = np.arange(0.1, 1.05, 0.1)
+
+
+def brute_force(layers, neutron_limit, gamma_limit, max_layers):
+    '''
+    Least areal mass over every stack of at most max_layers layers with different neighbours.
+    '''
+
+    best = np.inf
+    for k in range(1, max_layers + 1):
+        orders = np.array([o for o in itertools.product(range(len(layers)), repeat=k)
+                           if all(a != b for a, b in zip(o, o[1:]))])
+        thick = np.array(list(itertools.product(thickness, repeat=k)))
+        order = np.repeat(orders, len(thick), axis=0)
+        t = np.tile(thick, (len(orders), 1))
+        mass, neutron, gamma = evaluate(layers, order, t, flux)
+        ok = (neutron <= neutron_limit) & (gamma <= gamma_limit)
+        if ok.any():
+            best = min(best, mass[ok].min())
+    return best
+
+
+@pytest.mark.parametrize('limits, max_layers, subset', [
+    ((3e4, 3e4), 3, [0, 1, 3, 7, 8, 9]),
+    ((1e5, 1e5), 2, None),
+    ((5e4, 5e4), 3, [0, 3, 7, 9]),
+    ((1e5, 3e4), 3, [0, 3, 7, 9]),
+])
+def test_optimize_matches_brute_force(limits, max_layers, subset):
+    layers = default_layers()
+    if subset is not None:
+        layers = layers[subset]
+    stack, summary = optimize(*limits, flux=flux, layers=layers, thickness=thickness, max_layers=max_layers)
+    expected = brute_force(layers, *limits, max_layers)
+    if np.isinf(expected):
+        assert stack is None
+        return
+
+    assert summary['areal_mass'] == pytest.approx(expected, rel=1e-12)
+    assert summary['evaluated'] <= summary['stacks']
+    order = [list(layers['name']).index(name) for name in stack['layer']]
+    mass, neutron, gamma = evaluate(layers, order, stack['thickness'], flux)
+    assert mass == pytest.approx(summary['areal_mass'])
+    assert neutron <= limits[0] and gamma <= limits[1]
+
+
+def test_unreachable_limits():
+    stack, summary = optimize(1e-30, 1e-30, flux=flux, layers=default_layers()[:2], thickness=thickness, max_layers=2)
+    assert stack is None
+    assert np.isnan(summary['areal_mass'])
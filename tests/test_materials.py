@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from nedc_rpc.materials import COMPOUNDS, default_table, li7_gamma_energy
+
+
+def test_grid_energies_are_exact():
+    table = default_table()
+    element = table.elements[0]
+    expected = np.exp(table.log_mu(element))
+    assert np.allclose(table.mass_atten_coeff(element, table.energies), expected, rtol=1e-12)
+
+
+def test_compound_is_weighted_sum_of_elements():
+    table = default_table()
+    energy = np.array([0.1, li7_gamma_energy, 2.0])
+    density, fractions = COMPOUNDS['Polyethylene']
+    # Log-log interpolation of the sum agrees with the sum of the interpolations on the grid, and closely between.
+    mixed = sum(w * table.mass_atten_coeff(element, energy) for element, w in fractions.items())
+    assert np.allclose(table.mass_atten_coeff('Polyethylene', energy), mixed, rtol=1e-2)
+    assert np.allclose(table.linear_atten_coeff('Polyethylene', energy),
+                       density * table.mass_atten_coeff('Polyethylene', energy))
+    assert table.mass_atten_coeff(['Lead', 'Iron'], energy).shape == (2, 3)
+
+
+def test_single_line_transmission_is_exponential():
+    table = default_table()
+    mu = table.linear_atten_coeff('Lead', li7_gamma_energy)
+    thickness = np.array([0.0, 0.5, 2.0])
+    transmitted = table.spectrum_transmission('Lead', thickness, [li7_gamma_energy], [3.0])
+    assert np.allclose(transmitted, np.exp(-mu * thickness))
+
+
+def test_errors():
+    table = default_table()
+    with pytest.raises(KeyError):
+        table.mass_atten_coeff('Unobtainium', 1.0)
+    with pytest.raises(ValueError):
+        table.mass_atten_coeff('Lead', table.energies[-1] * 10)
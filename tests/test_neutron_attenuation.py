@@ -0,0 +1,29 @@
+import numpy as np
+
+from nedc_rpc.neutron_attenuation import (maxwellian, neut_atten_percent, quadrature_weights, spectrum_atten_percent,
+                                          spectrum_transmission, thermal_energy, thermal_epithermal)
+
+compositions = np.array([[0.333, 0.333, 0.206, 0.128], [0.5, 0.0, 0.306, 0.194]])
+x = np.array([0.0, 0.1, 0.5])
+
+
+def test_monoenergetic_spectrum_matches_narrow_beam():
+    energy = thermal_energy * np.array([1 - 1e-9, 1, 1 + 1e-9])
+    percent = spectrum_atten_percent(x, compositions, energy, np.ones(3))
+    assert percent.shape == (2, 3)
+    assert np.allclose(percent, neut_atten_percent(x, *compositions.T[:, :, np.newaxis]), rtol=1e-6)
+
+
+def test_spectra_are_normalized():
+    energy = np.logspace(-5, 7, 20001)
+    assert np.isclose(np.sum(quadrature_weights(energy, np.ones_like(energy))), 1.0)
+    assert np.isclose(np.trapezoid(maxwellian(energy), energy), 1.0, rtol=1e-4)
+    assert np.isclose(np.trapezoid(thermal_epithermal(energy), energy), 1.0, rtol=1e-2)
+
+
+def test_chunking_does_not_change_transmission():
+    rng = np.random.default_rng(0)
+    sigma = rng.uniform(0, 10, (7, 50))
+    weights = rng.uniform(size=50)
+    assert np.allclose(spectrum_transmission(sigma, x, weights, max_bytes=1),
+                       spectrum_transmission(sigma, x, weights))
@@ -0,0 +1,29 @@
+import numpy as np
+
+from nedc_rpc.neutron_transport import Slab, simulate
+
+composite = [0.333, 0.333, 0.206, 0.128]
+
+
+def test_collision_table_ends_at_one():
+    slab = Slab([(composite, 0.2), ([0.5, 0.0, 0.306, 0.194], 0.3)])
+    assert np.all(slab.collision_cdf[:, -1] == 1)
+    assert np.all(np.diff(slab.collision_cdf, axis=1) >= 0)
+
+
+def test_transmission_between_uncollided_and_pure_absorber():
+    # A transmitted neutron travels at least the thickness, so it gets through no more often than through a pure
+    # absorber, and at least as often as without a collision.
+    thickness = 0.2
+    slab = Slab([(composite, thickness)])
+    result = simulate([(composite, thickness)], histories=20000, workers=1, seed=1)
+    assert result.counts.sum() == 20000
+    assert np.exp(-slab.sigma_t[0] * thickness) < result.transmitted - 3 * result.errors[0]
+    assert result.transmitted + 3 * result.errors[0] < np.exp(-slab.sigma_a.sum() * thickness)
+
+
+def test_split_layer_is_the_same_slab():
+    one = simulate([(composite, 0.2)], histories=20000, workers=1, seed=2)
+    two = simulate([(composite, 0.1), (composite, 0.1)], histories=20000, workers=1, seed=3)
+    assert np.all(np.abs(one.fractions - two.fractions) < 4 * np.hypot(one.errors, two.errors))
+    assert np.array_equal(one.counts, simulate([(composite, 0.2)], histories=20000, workers=1, seed=2).counts)
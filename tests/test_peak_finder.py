@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from nedc_rpc.peak_finder import find_peaks, peak_dtype
+
+
+@pytest.mark.parametrize('y', [[], [1.0], [1.0, 2.0]])
+def test_short_spectra_have_no_peaks(y):
+    peaks = find_peaks(np.array(y))
+    assert peaks.dtype == peak_dtype
+    assert peaks.size == 0
+
+
+def test_single_peak():
+    peaks = find_peaks([1.0, 3.0, 1.0])
+    assert peaks['index'].tolist() == [1]
+    assert peaks['prominence'].tolist() == [2.0]
+    assert peaks['width'].tolist() == [1.0]
+
+
+def test_matches_scipy():
+    signal = pytest.importorskip('scipy.signal')
+    rng = np.random.default_rng(0)
+    y = rng.poisson(50 + 400 * np.exp(-0.5 * ((np.arange(4000) - 1200) / 6.0) ** 2), 4000).astype(float)
+
+    peaks = find_peaks(y, min_prominence=10)
+    index, props = signal.find_peaks(y, prominence=10, width=0, rel_height=0.5)
+    assert np.array_equal(peaks['index'], index)
+    assert np.allclose(peaks['prominence'], props['prominences'])
+    assert np.allclose(peaks['width'], props['widths'])
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from nedc_rpc.peak_finder import find_peaks
+from nedc_rpc.peak_fitting import fit_peaks, fit_spectra, peak_model, sigma_to_fwhm
+
+channels = np.arange(400, dtype=float)
+truth = [(5000.0, 100.3, 3.0), (20000.0, 250.7, 4.0)]
+
+
+def model(background=30.0):
+    return background + sum(a * np.exp(-0.5 * ((channels - c) / s) ** 2) / (np.sqrt(2 * np.pi) * s)
+                            for a, c, s in truth)
+
+
+def test_noiseless_fit_recovers_the_peaks():
+    y = model()
+    fits = fit_peaks(y, find_peaks(y, min_prominence=100))
+    assert fits['converged'].all()
+    assert np.allclose(fits['area'], [a for a, _, _ in truth], rtol=1e-4)
+    assert np.allclose(fits['centroid'], [c for _, c, _ in truth], atol=1e-4)
+    assert np.allclose(fits['fwhm'], [s * sigma_to_fwhm for _, _, s in truth], rtol=1e-4)
+    assert np.allclose(fits['background'], 30.0, rtol=1e-3)
+    assert np.isnan(fits['tail_fraction']).all()
+
+
+def test_errors_cover_the_poisson_scatter():
+    rng = np.random.default_rng(0)
+    spectra = [rng.poisson(model()).astype(float) for _ in range(200)]
+    fits = np.concatenate(fit_spectra(spectra, [find_peaks(y, min_prominence=100) for y in spectra]))
+    fits = fits[fits['converged']]
+    first = fits[np.abs(fits['centroid'] - truth[0][1]) < 2]
+    assert len(first) > 150
+    pull = (first['centroid'] - truth[0][1]) / first['centroid_err']
+    assert abs(np.mean(pull)) < 0.3 and 0.7 < np.std(pull) < 1.3
+    assert abs(np.mean(first['area']) - truth[0][0]) < 3 * np.std(first['area']) / np.sqrt(len(first))
+
+
+def test_tail_model_integrates_to_the_area():
+    x = np.arange(-200.0, 200.0, 0.05)[None]
+    p = np.array([[1000.0, 0.0, 3.0, 0.0, 0.0, 0.4, 5.0]])
+    assert np.sum(peak_model(x, p)) * 0.05 == pytest.approx(1000.0, rel=1e-4)
+
+
+def test_no_peaks():
+    assert fit_spectra([], []) == []
+    assert fit_peaks(model(), find_peaks(model(), min_prominence=1e9)).size == 0
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from nedc_rpc.plotting import downsample, lttb_indices, minmax_indices
+
+
+def test_minmax_keeps_the_envelope_of_every_column():
+    rng = np.random.default_rng(0)
+    x = np.arange(100000, dtype=float)
+    y = rng.normal(size=x.size)
+    y[31415] = 50.0
+    i = minmax_indices(x, y, n=100)
+    assert i.size <= 2 * 100 + 2
+    assert np.all(np.diff(i) > 0)
+    assert 31415 in i and 0 in i and x.size - 1 in i
+    columns = np.minimum((x / x[-1] * 100).astype(int), 99)
+    for extreme in (np.min, np.max):
+        kept = [extreme(y[i][columns[i] == c]) for c in range(100)]
+        assert np.array_equal(kept, [extreme(y[columns == c]) for c in range(100)])
+
+
+def test_lttb_picks_one_point_per_column():
+    x = np.linspace(0, 1, 10001)
+    y = np.sin(20 * x)
+    y[5000] = 10.0
+    i = lttb_indices(x, y, n=50)
+    assert i[0] == 0 and i[-1] == x.size - 1
+    assert np.all(np.diff(i) > 0) and i.size <= 50 + 2
+    assert 5000 in i
+
+
+def test_short_series_and_log_axes():
+    x = np.array([1.0, 2.0, 3.0])
+    assert np.array_equal(minmax_indices(x, x, n=10), [0, 1, 2])
+    x = np.logspace(-3, 3, 100000)
+    y = np.where(np.arange(x.size) % 2, 1.0, -1.0)
+    xs, ys = downsample(x, y, n=60, xscale='log', yscale='log')
+    assert np.all(ys > 0)
+    # Log bucketing gives every decade the same number of columns.
+    counts = np.histogram(np.log10(xs), bins=6, range=(-3, 3))[0]
+    assert counts.max() - counts.min() <= 4
+
+
+def test_render(tmp_path):
+    pytest.importorskip('matplotlib')
+    from nedc_rpc.plotting import plot, render, render_all
+
+    def plotter(ax):
+        x = np.linspace(0, 1, 100000)
+        lines = plot(ax, x, np.sin(x), pixels=200)
+        assert len(lines[0].get_xdata()) <= 402
+
+    assert render(plotter, str(tmp_path / 'a.png')) == str(tmp_path / 'a.png')
+    paths = render_all([(plotter, str(tmp_path / 'sub' / 'b.svg'))], workers=1)
+    assert (tmp_path / 'sub' / 'b.svg').stat().st_size > 0 and paths == [str(tmp_path / 'sub' / 'b.svg')]
+
+
+def test_gamma_plots_share_the_given_axes():
+    pytest.importorskip('matplotlib')
+    from matplotlib.figure import Figure
+
+    from nedc_rpc import gamma_current
+
+    axes = Figure().subplots(1, 2)
+    assert gamma_current.plot(ax=axes) == tuple(axes)
+    assert all(ax.lines for ax in axes)
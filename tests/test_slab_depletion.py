@@ -0,0 +1,33 @@
+import numpy as np
+
+from nedc_rpc.slab_depletion import (default_flux, deplete_slab, exact_uniform, front_depth, inventory_fraction,
+                                     sigma_10, uniform_lifetime)
+
+# A slab of optical thickness 5, burnt up to s = sigma phi t = 10.
+thickness = 0.1
+N_0 = 5 / (sigma_10 * thickness)
+burnup = np.array([0.0, 1.0, 3.0, 10.0])
+times = burnup / (sigma_10 * default_flux)
+
+
+def test_uniform_slab_matches_closed_form():
+    cells = 400
+    N = deplete_slab(N_0, thickness, times, cells=cells)
+    z = (np.arange(cells) + 0.5) * thickness / cells
+    assert N.shape == (len(times), cells)
+    assert np.max(np.abs(N - exact_uniform(z, times[:, np.newaxis], N_0))) < 1e-4 * N_0
+
+    expected = np.log1p(np.expm1(5.0) * np.exp(-burnup)) / 5.0
+    assert np.allclose(inventory_fraction(N, N_0), expected, rtol=1e-4)
+
+
+def test_uniform_lifetime_inverts_inventory():
+    fraction = np.log1p(np.expm1(5.0) * np.exp(-burnup[1:])) / 5.0
+    assert np.allclose(uniform_lifetime(fraction, thickness, N_0), times[1:], rtol=1e-10)
+
+
+def test_front_moves_inward():
+    N = deplete_slab(N_0, thickness, times, cells=200)
+    depth = front_depth(N, N_0, thickness)
+    assert depth[0] == 0
+    assert np.all(np.diff(depth) > 0)
@@ -0,0 +1,57 @@
+import numpy as np
+
+from nedc_rpc.peak_finder import find_peaks
+from nedc_rpc.streaming_peaks import StreamingPeakFinder, stream_peaks
+
+n_channels = 2048
+centres = [300, 900, 1500]
+
+
+def batches(seed=0, n=20, size=5000):
+    '''
+    Events of three well separated Gaussian lines on a flat continuum.
+    '''
+
+    rng = np.random.default_rng(seed)
+    for _ in range(n):
+        lines = rng.normal(rng.choice(centres, size), 4.0)
+        flat = rng.uniform(0, n_channels, size // 5)
+        yield np.clip(np.concatenate([lines, flat]).astype(np.int64), 0, n_channels - 1)
+
+
+def test_final_peaks_match_full_search():
+    cuts = {'min_prominence': 50}
+    finder = StreamingPeakFinder(n_channels, **cuts)
+    for batch in batches():
+        finder.update(batch)
+    full = find_peaks(finder.counts, **cuts)
+    assert finder.peaks['index'].tolist() == full['index'].tolist()
+    assert np.allclose(finder.peaks['prominence'], full['prominence'])
+
+
+def test_events_replay_to_the_peak_table():
+    cuts = {'min_prominence': 50}
+    table = {}
+    for kind, peak in stream_peaks(batches(seed=1), n_channels, **cuts):
+        if kind == 'disappear':
+            del table[int(peak['index'])]
+        else:
+            # An update may move the peak by up to match_distance channels.
+            if kind == 'update':
+                near = [i for i in table if abs(i - int(peak['index'])) <= 2]
+                del table[near[0]]
+            table[int(peak['index'])] = peak
+
+    finder = StreamingPeakFinder(n_channels, **cuts)
+    for batch in batches(seed=1):
+        finder.update(batch)
+    assert sorted(table) == finder.peaks['index'].tolist()
+    assert all(abs(i - c) <= 3 for i, c in zip(sorted(table), centres))
+
+
+def test_histogrammed_updates():
+    finder = StreamingPeakFinder(64)
+    events = finder.update(counts=[[30, 100], [29, 40], [31, 40]])
+    assert [kind for kind, _ in events] == ['appear']
+    assert events[0].peak['index'] == 30
+    assert finder.update() == []
@@ -0,0 +1,64 @@
+import os
+
+import numpy as np
+
+from nedc_rpc import sweep as sweep_module
+from nedc_rpc.sweep import _load_cache, cache_directory, clear_cache, grid_points, sweep
+
+
+def counting(monkeypatch):
+    '''
+    Patch the chunk runner to record how many points are computed.
+    '''
+
+    computed = []
+    run = sweep_module._run_chunk
+
+    def run_chunk(args):
+        computed.append(len(args[1]))
+        return run(args)
+
+    monkeypatch.setattr(sweep_module, '_run_chunk', run_chunk)
+    return computed
+
+
+def test_cache_round_trip(tmp_path, monkeypatch):
+    computed = counting(monkeypatch)
+    grid = {'I': [1e8, 1e9, 1e10], 'r': [1.0, 2.0]}
+    first = sweep('boron', grid, cache_dir=str(tmp_path), workers=1, chunk_size=4)
+    assert sum(computed) == 6
+    assert np.array_equal(first, sweep('boron', grid, use_cache=False, workers=1))
+
+    # An overlapping sweep computes only its new points and gives the same values for the old ones.
+    computed.clear()
+    second = sweep('boron', {'I': [1e9, 1e10, 1e11], 'r': [1.0, 2.0]}, cache_dir=str(tmp_path), workers=1)
+    assert sum(computed) == 2
+    assert np.array_equal(second[:4], first[2:])
+    assert np.array_equal(second, sweep('boron', {'I': [1e9, 1e10, 1e11], 'r': [1.0, 2.0]}, use_cache=False))
+
+    names = os.listdir(cache_directory('boron', str(tmp_path)))
+    assert 'index.txt' in names
+    assert not [name for name in names if name.endswith('.tmp')]
+
+
+def test_only_overlapping_chunks_are_read(tmp_path):
+    sweep('boron', {'I': [1e8, 1e9]}, cache_dir=str(tmp_path), workers=1)
+    sweep('boron', {'I': [1e12, 1e13]}, cache_dir=str(tmp_path), workers=1)
+    directory = cache_directory('boron', str(tmp_path))
+
+    keys, outputs = _load_cache(directory, grid_points('boron', {'I': [1e12]}))
+    assert len(keys) == 2 and all(len(column) == 2 for column in outputs.values())
+    keys, _ = _load_cache(directory, grid_points('boron', {'I': [1e10]}))
+    assert keys is None
+
+
+def test_clear_cache(tmp_path):
+    sweep('boron', {'I': [1e8]}, cache_dir=str(tmp_path), workers=1)
+    sweep('cadmium', {'t': [1e7]}, cache_dir=str(tmp_path), workers=1)
+    # A temporary chunk left behind by an interrupted sweep goes too.
+    open(os.path.join(cache_directory('boron', str(tmp_path)), '0123456789abcdef0123.npz.1234.tmp'), 'w').close()
+    clear_cache('boron', cache_dir=str(tmp_path))
+    assert not os.path.exists(cache_directory('boron', str(tmp_path)))
+    assert os.path.exists(cache_directory('cadmium', str(tmp_path)))
+    clear_cache(cache_dir=str(tmp_path))
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,32 @@
+import numpy as np
+
+from nedc_rpc.calibration import Calibration
+from nedc_rpc.synthetic import electron_mass, generate, klein_nishina, resolution, truth_dtype
+
+
+def test_klein_nishina_is_normalized():
+    energy = 661.657
+    edge = energy * 2 * energy / electron_mass / (1 + 2 * energy / electron_mass)
+    deposited = np.linspace(0, edge, 200001)
+    assert abs(np.trapezoid(klein_nishina(energy, deposited), deposited) - 1) < 1e-3
+    assert klein_nishina(energy, edge * 1.01) == 0
+
+
+def test_truth_table():
+    spectra, truth = generate(n_spectra=5, n_channels=1024, n_peaks=(2, 4), seed=3)
+    assert spectra.shape == (5, 1024)
+    assert truth.dtype == truth_dtype
+    assert np.all(np.bincount(truth['spectrum'], minlength=5) >= 2)
+    assert np.allclose(truth['channel'], truth['energy'] / 0.75)
+    assert np.allclose(truth['fwhm'], resolution(truth['energy']) / 0.75)
+    again, _ = generate(n_spectra=5, n_channels=1024, n_peaks=(2, 4), seed=3)
+    assert np.array_equal(spectra, again)
+
+
+def test_counts_add_up():
+    # One peak without continua: the spectrum holds its area.
+    spectra, truth = generate(n_spectra=200, n_channels=512, n_peaks=1, seed=0, calibration=Calibration([0.0, 1.0]),
+                              lines=[300.0], area=(1e4, 1e4), compton_ratio=0.0, continuum=(0.0, 1.0))
+    assert np.all(truth['channel'] == 300.0)
+    total = spectra.sum(axis=1)
+    assert abs(total.mean() - 1e4) < 4 * np.sqrt(1e4 / 200)
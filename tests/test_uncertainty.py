@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from nedc_rpc import boron_lifetime
+from nedc_rpc.depletion import time_to_fraction
+from nedc_rpc.uncertainty import INPUTS, _binning, _merge, _statistics, correlation_matrix, propagate
+
+
+def test_lifetime_is_lognormal():
+    # The boron lifetime is r^2 / (I sigma) times a constant, so its logarithm is normal with a known mean and
+    # variance, and linear in the log factors with known coefficients.
+    result = propagate(['boron'], n_samples=2 * 10**5, chunk_size=5 * 10**4, workers=1, seed=0)['boron']['lifetime']
+    s = {name: np.sqrt(np.log1p(INPUTS[name][0] ** 2)) for name in ('source', 'distance', 'sigma_B10')}
+    nominal = time_to_fraction(0.1, boron_lifetime.flux, boron_lifetime.sigma_10)
+    mean = np.log(nominal) + s['source'] ** 2 / 2 - s['distance'] ** 2 + s['sigma_B10'] ** 2 / 2
+    sd = np.sqrt(s['source'] ** 2 + 4 * s['distance'] ** 2 + s['sigma_B10'] ** 2)
+
+    z = np.array([-1.959964, -0.994458, 0.0, 0.994458, 1.959964])
+    assert np.allclose(result['percentiles'], np.exp(mean + sd * z), rtol=3e-3)
+    assert result['mean'] == pytest.approx(np.exp(mean + sd ** 2 / 2), rel=3e-3)
+
+    coefficients = {'source': -s['source'], 'distance': 2 * s['distance'], 'sigma_B10': -s['sigma_B10'],
+                    'B10_abundance': 0.0, 'boron_density': 0.0}
+    expected = np.array([coefficients[name] for name in result['inputs']]) / sd
+    assert np.allclose(result['src'], expected, atol=5e-3)
+    assert np.allclose(result['correlation'], expected, atol=1e-2)
+    assert result['r2'] == pytest.approx(1.0)
+
+
+def test_merged_statistics_equal_one_chunk():
+    rng = np.random.default_rng(1)
+    z = rng.standard_normal((1000, 3))
+    values = np.exp(z @ [0.1, -0.2, 0.05])[:, np.newaxis] * [1.0, 2.0]
+    binning = _binning(values, 64)
+    merged = _merge(_statistics(z[:300], values[:300], binning, 64), _statistics(z[300:], values[300:], binning, 64))
+    whole = _statistics(z, values, binning, 64)
+    for key in whole:
+        assert np.allclose(merged[key], whole[key])
+
+
+def test_correlations():
+    C = correlation_matrix(['resin_density', 'source', 'hardener_density'])
+    assert C.tolist() == [[1.0, 0.0, 0.5], [0.0, 1.0, 0.0], [0.5, 0.0, 1.0]]
+    with pytest.raises(ValueError):
+        propagate(['cadmium'], n_samples=100, workers=1, correlations={('sigma_Cd112', 'sigma_Cd113'): 1.5})
+    with pytest.raises(ValueError):
+        propagate(['boron'], n_samples=100, workers=1, inputs={'source': (0.1, '')})
+
+
+@pytest.mark.parametrize('sizes', [{'n_samples': 0}, {'chunk_size': 0}])
+def test_empty_runs_are_refused(sizes):
+    with pytest.raises(ValueError):
+        propagate(['boron'], workers=1, **dict({'n_samples': 100}, **sizes))
+
+
+def test_curves_have_a_row_per_percentile():
+    result = propagate(['neutron'], n_samples=2000, workers=1, seed=2)['neutron']
+    assert result['attenuation']['percentiles'].shape == (5, len(result['attenuation']['grid']))
+    assert np.all(np.diff(result['attenuation']['percentiles'], axis=0) >= 0)
+    assert result['atten_percent']['percentiles'].shape == (5,)